@@ -0,0 +1,4 @@
+"""
+性能基准测试
+Micro-benchmarks (run from backend/: python -m benchmarks.<name>)
+"""
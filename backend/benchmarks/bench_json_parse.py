@@ -0,0 +1,99 @@
+"""
+JSON解析基准测试
+LLM response parsing micro-benchmark
+
+语料来自已保存对局的 game_logs.json 中记录的模型原始响应（raw_resp），
+对比旧路径（清理混合语言 → marko → yaml.safe_load）与分层的 parse_json，
+并输出各层级的命中次数。没有找到对局记录时使用内置的小语料。
+
+用法（在 backend/ 目录下）:
+    python -m benchmarks.bench_json_parse [日志目录 ...] [--repeat 5]
+    （默认读取 settings.paths.logs_dir 下的所有对局目录）
+"""
+
+import argparse
+import json
+import timeit
+from pathlib import Path
+from typing import Any, List
+
+from src.config.settings import settings
+from src.services.logger.game_logger import read_logs
+from src.utils.helpers import (
+    clean_mixed_language_response,
+    get_parse_stats,
+    parse_json,
+    parse_json_markdown,
+    parse_json_str,
+    reset_parse_stats,
+)
+
+# 内置语料：覆盖对局中常见的几种响应形式
+BUILTIN_CORPUS = [
+    json.dumps({"reasoning": "P3昨晚的发言前后矛盾，" * 8, "vote": "P3"}, ensure_ascii=False),
+    "```json\n" + json.dumps({"reasoning": "我是预言家，" * 10, "say": "大家好，" * 20}, ensure_ascii=False, indent=2) + "\n```",
+    "好的，以下是我的回答：\n" + json.dumps({"reasoning": "保护自己", "protect": "P2"}, ensure_ascii=False),
+    json.dumps({"reasoning": "分析{括号}", "bid": "2"}, ensure_ascii=False) + "\n希望这个回答有帮助。",
+    "{reasoning: 没有引号的字段名, remove: P4}",
+    "```\n{\n  \"reasoning\": \"总结本轮\",\n  \"summary\": \"" + "发言要点。" * 30 + "\"\n}\n```",
+]
+
+
+def legacy_parse_json(text: str) -> Any:
+    """旧实现：每条响应都走 marko + yaml"""
+    cleaned_text = clean_mixed_language_response(text)
+    result_json = parse_json_markdown(cleaned_text)
+    if not result_json:
+        result_json = parse_json_str(cleaned_text)
+    return result_json
+
+
+def _collect_raw_responses(node: Any, out: List[str]) -> None:
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "raw_resp" and isinstance(value, str) and value:
+                # 多次重试失败时响应用 "-------" 连接
+                out.extend(part for part in value.split("-------") if part.strip())
+            else:
+                _collect_raw_responses(value, out)
+    elif isinstance(node, list):
+        for item in node:
+            _collect_raw_responses(item, out)
+
+
+def load_corpus(directories: List[Path]) -> List[str]:
+    corpus: List[str] = []
+    for directory in directories:
+        for log_file in sorted(directory.glob("**/game_logs.json")):
+            _collect_raw_responses(read_logs(str(log_file.parent)), corpus)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directories", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.directories or [settings.paths.logs_dir])
+    source = "对局记录"
+    if not corpus:
+        corpus, source = BUILTIN_CORPUS * 50, "内置语料"
+
+    mismatches = sum(1 for text in corpus if parse_json(text) != legacy_parse_json(text))
+    reset_parse_stats()
+    for text in corpus:
+        parse_json(text)
+    tiers = get_parse_stats()
+
+    print(f"语料: {len(corpus)} 条响应（{source}），结果与旧实现不同: {mismatches} 条")
+    print(f"命中层级: {tiers}")
+    old = min(timeit.repeat(lambda: [legacy_parse_json(t) for t in corpus], number=1, repeat=args.repeat))
+    new = min(timeit.repeat(lambda: [parse_json(t) for t in corpus], number=1, repeat=args.repeat))
+    print(f"  旧: marko + yaml                 {old / len(corpus) * 1000:8.3f} ms/条")
+    print(f"  新: 分层 parse_json               {new / len(corpus) * 1000:8.3f} ms/条")
+    print(f"  加速: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+提示词渲染基准测试
+Prompt template rendering micro-benchmark
+
+对比每次调用 jinja2.Template(...) 重新解析编译模板的旧路径，
+与共享 Environment + 缓存编译结果的 format_prompt。
+
+用法（在 backend/ 目录下）:
+    python -m benchmarks.bench_prompts [--repeat 500]
+"""
+
+import argparse
+import timeit
+
+import jinja2
+
+from src.core.game.prompts import ACTION_PROMPTS_AND_SCHEMAS
+from src.services.llm.generator import format_prompt
+from benchmarks.bench_serialization import build_game
+
+
+def bench(label, fn, repeat):
+    seconds = min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat
+    print(f"  {label:42s} {seconds * 1000:8.3f} ms")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    state, _ = build_game(args.rounds)
+    worldstate = state.players["P1"]._get_game_state()
+    worldstate["options"] = ", ".join(state.players)
+
+    print(f"提示词渲染（{args.rounds}轮游戏后的状态，每次调用平均耗时）")
+    total_old = total_new = 0.0
+    for action, (prompt_template, _schema) in ACTION_PROMPTS_AND_SCHEMAS.items():
+        assert format_prompt(prompt_template, worldstate) == jinja2.Template(prompt_template).render(worldstate)
+        print(action)
+        total_old += bench("旧: jinja2.Template(...).render",
+                           lambda: jinja2.Template(prompt_template).render(worldstate), args.repeat)
+        total_new += bench("新: format_prompt（缓存编译）",
+                           lambda: format_prompt(prompt_template, worldstate), args.repeat)
+    print(f"全部行动合计加速: {total_old / total_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+状态序列化基准测试
+State / RoundLog serialization micro-benchmark
+
+对比旧的“JsonEncoder 编码再 json.loads 解析”与显式 to_dict，
+以及 json.dumps 与 to_json（orjson 快速路径）在10轮游戏数据上的耗时。
+
+用法（在 backend/ 目录下）:
+    python -m benchmarks.bench_serialization [--rounds 10] [--repeat 200]
+"""
+
+import argparse
+import json
+import random
+import timeit
+
+from src.core.models.game_state import JsonEncoder, Round, State, to_dict, to_json, orjson
+from src.core.models.logs import LmLog, RoundLog, VoteLog
+from src.core.models.player import Doctor, Seer, Villager, Werewolf
+
+NAMES = ["P1", "P2", "P3", "P4", "P5", "P6"]
+PROMPT = "你正在玩狼人杀游戏。" * 150  # 与真实提示词长度相当（约1.5KB）
+
+
+def _lm_log(result):
+    return LmLog(prompt=PROMPT, raw_resp=json.dumps(result, ensure_ascii=False), result=result)
+
+
+def build_game(num_rounds: int):
+    """构造一局 num_rounds 轮、数据量接近真实对局的游戏"""
+    random.seed(0)
+    seer = Seer(name="P1", model="siliconflow/model")
+    doctor = Doctor(name="P2", model="siliconflow/model")
+    werewolves = [Werewolf(name="P3", model="siliconflow/model")]
+    villagers = [Villager(name=name, model="siliconflow/model") for name in NAMES[3:]]
+    players = [seer, doctor] + werewolves + villagers
+    for player in players:
+        player.initialize_game_view(current_players=list(NAMES), round_number=0)
+
+    state = State("bench", seer, doctor, villagers, werewolves)
+    logs = []
+    for round_number in range(num_rounds):
+        game_round, round_log = Round(), RoundLog()
+        game_round.players = list(NAMES)
+        game_round.eliminated, game_round.protected, game_round.unmasked = "P4", "P5", "P3"
+        round_log.eliminate = _lm_log({"remove": "P4", "reasoning": "推理" * 50})
+        round_log.protect = _lm_log({"protect": "P5", "reasoning": "推理" * 50})
+        round_log.investigate = _lm_log({"investigate": "P3", "reasoning": "推理" * 50})
+        for name in NAMES:
+            say = f"{name}的发言。" * 30
+            game_round.debate.append([name, say])
+            round_log.debate.append((name, _lm_log({"say": say, "reasoning": "推理" * 50})))
+            round_log.summaries.append((name, _lm_log({"summary": "总结" * 80})))
+            for player in players:
+                player.gamestate.update_debate(name, say)
+                player._add_observation(f"{name}发言：{say[:40]}")
+        votes = {name: "P3" for name in NAMES}
+        game_round.votes.append(votes)
+        round_log.votes.append([VoteLog(name, "P3", _lm_log({"vote": "P3"})) for name in NAMES])
+        game_round.bids.append({name: 1 for name in NAMES})
+        round_log.bid.append([(name, _lm_log({"bid": "1"})) for name in NAMES])
+        game_round.success = True
+        state.rounds.append(game_round)
+        logs.append(round_log)
+        for player in players:
+            player.gamestate.round_number = round_number + 1
+            player.gamestate.clear_debate()
+    return state, logs
+
+
+def legacy_to_dict(o):
+    """旧实现：编码为JSON字符串后再解析"""
+    return json.loads(JsonEncoder().encode(o))
+
+
+def legacy_state_to_dict(state):
+    data = legacy_to_dict(state)
+    current_players = state.rounds[-1].players if state.rounds else list(state.players)
+    for name, player_data in data["players"].items():
+        player_data["alive"] = name in current_players
+    return data
+
+
+def bench(label, fn, repeat):
+    seconds = min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat
+    print(f"  {label:42s} {seconds * 1000:8.3f} ms")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    state, logs = build_game(args.rounds)
+    assert state.to_dict() == legacy_state_to_dict(state)
+    assert to_dict(logs) == legacy_to_dict(logs)
+
+    print(f"{args.rounds}轮游戏序列化（每次调用平均耗时，orjson: {'是' if orjson else '否'}）")
+    print("State.to_dict")
+    old = bench("旧: encode + json.loads", lambda: legacy_state_to_dict(state), args.repeat)
+    new = bench("新: 显式 to_dict", state.to_dict, args.repeat)
+    print(f"  加速: {old / new:.1f}x")
+
+    print("RoundLog 列表 to_dict")
+    old = bench("旧: encode + json.loads", lambda: legacy_to_dict(logs), args.repeat)
+    new = bench("新: 显式 to_dict", lambda: to_dict(logs), args.repeat)
+    print(f"  加速: {old / new:.1f}x")
+
+    print("game_update 消息编码（to_dict + 字符串）")
+    message = {"type": "game_update", "session_id": "bench"}
+    old = bench("旧: json.dumps(encode + json.loads)",
+                lambda: json.dumps({**message, "data": legacy_state_to_dict(state)}), args.repeat)
+    new = bench("新: to_json(to_dict)", lambda: to_json({**message, "data": state.to_dict()}), args.repeat)
+    print(f"  加速: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
+import asyncio
 from pathlib import Path
 
 from src.config import settings
 from src.services.llm.client import LLMClient
 from src.services.llm.generator import set_global_llm_client
+from src.services.game_manager.event_bridge import event_bridge
+from src.services.llm.transport import http_pool
 
 
 @asynccontextmanager
@@ -37,12 +40,17 @@ async def lifespan(app: FastAPI):
         print(f"❌ Failed to initialize LLM client: {e}")
         print("⚠️  Game functionality will be limited")
 
+    # 游戏事件桥：游戏引擎的WebSocket通知统一由主事件循环发送
+    event_bridge.attach(asyncio.get_running_loop())
+
     print("🎮 Ready to start games!")
 
     yield
 
     # 关闭时
     print("🛑 Shutting down Werewolf Arena API...")
+    await event_bridge.aclose()
+    await http_pool.aclose()
 
 
 # 创建FastAPI应用
@@ -5,9 +5,7 @@ Games API Routes
 
 from fastapi import APIRouter, HTTPException, status
 from typing import List, Dict, Any
-import json
 import os
-from pathlib import Path
 
 from src.api.v1.schemas.game import (
     GameConfigRequest,
@@ -19,6 +17,9 @@ from src.api.v1.schemas.game import (
     RoundSummary,
 )
 from src.services.game_manager.session_manager import game_manager
+from src.services.logger.game_logger import read_logs
+from src.services.logger.usage_report import summarize_usage
+from src.core.models.game_state import to_dict
 
 router = APIRouter()
 
@@ -206,7 +207,8 @@ async def delete_game_session(session_id: str):
             detail="Cannot delete a running game. Stop it first."
         )
 
-    # 从管理器中移除会话
+    # 写出未完成的持久化数据后，从管理器中移除会话
+    session.close_journal()
     with game_manager._lock:
         del game_manager._sessions[session_id]
 
@@ -231,21 +233,28 @@ async def get_game_logs(session_id: str):
         )
 
     try:
-        # 读取日志文件
-        logs_file = Path(session.log_dir) / "game_logs.json"
-
-        if not logs_file.exists():
-            return []  # 如果日志文件不存在，返回空数组
-
-        with open(logs_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            if not content:
-                return []  # 如果文件为空，返回空数组
-
-            logs = json.loads(content)
-            return logs if isinstance(logs, list) else []
+        # 读取日志文件（快照 + 尚未压缩的增量日志）
+        return read_logs(session.log_dir)
 
     except Exception as e:
         # 如果读取失败，返回空数组而不是抛出错误
         print(f"Error reading logs for session {session_id}: {e}")
         return []
+
+
+@router.get("/{session_id}/usage")
+async def get_game_usage(session_id: str):
+    """
+    获取LLM用量统计（按玩家、角色、行动类型、模型和整局汇总的 token 数和耗时）
+    Get token and latency accounting for a game session
+    """
+    session = game_manager.get_session(session_id)
+
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Game session {session_id} not found"
+        )
+
+    usage = summarize_usage(session.state.to_dict(), to_dict(session.gamemaster.logs))
+    return {"session_id": session_id, **usage}
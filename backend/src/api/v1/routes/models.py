@@ -14,6 +14,8 @@ from src.api.v1.schemas.model import (
 )
 from src.config.loader import ModelRegistry
 from src.services.llm.client import LLMClient
+from src.services.llm.generator import get_global_llm_client
+from src.services.llm.pool import ProviderPool
 from src.config.settings import settings
 
 router = APIRouter()
@@ -56,6 +58,40 @@ async def list_models():
     )
 
 
+@router.get("/providers")
+async def get_provider_status():
+    """
+    LLM提供商实时状态（熔断器状态、最近失败率和密钥池用量）
+    Live status of configured LLM providers and models
+    """
+    try:
+        llm_client = get_global_llm_client()
+    except RuntimeError:
+        try:
+            llm_client = get_llm_client()
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    circuits = llm_client.breakers.get_stats() if llm_client.breakers else {"providers": {}, "models": {}}
+    providers = {}
+    for name, provider in llm_client.providers.items():
+        available = llm_client.breakers is None or llm_client.breakers.is_available(name)
+        providers[name] = {
+            "configured": provider.validate_config(),
+            "available": available,
+            "circuit": circuits["providers"].get(name, {"state": "closed"}),
+        }
+        if isinstance(provider, ProviderPool):
+            providers[name]["key_pool"] = provider.get_stats()
+
+    return {
+        "providers": providers,
+        "models": circuits["models"],
+        "total": len(providers),
+        "available": sum(1 for p in providers.values() if p["available"]),
+    }
+
+
 @router.get("/{model_alias}", response_model=ModelInfo)
 async def get_model(model_alias: str):
     """
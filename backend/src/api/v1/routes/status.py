@@ -11,6 +11,11 @@ from datetime import datetime
 
 from src.config.settings import settings
 from src.services.game_manager.session_manager import game_manager
+from src.services.game_manager.event_bridge import event_bridge
+from src.api.v1.routes.websocket import manager as websocket_manager
+from src.utils.helpers import get_parse_stats
+from src.services.llm.transport import http_pool
+from src.services.llm.generator import get_global_llm_client
 
 router = APIRouter()
 
@@ -21,10 +26,12 @@ async def health_check():
     健康检查
     Health check endpoint
     """
+    open_circuits = _open_circuits()
     return {
-        "status": "healthy",
+        "status": "degraded" if open_circuits else "healthy",
         "timestamp": datetime.now().isoformat(),
-        "version": settings.version
+        "version": settings.version,
+        "open_circuits": open_circuits,
     }
 
 
@@ -76,6 +83,15 @@ async def server_info() -> Dict[str, Any]:
             "completed": completed_games,
             "stopped": len(sessions) - running_games - completed_games
         },
+        "event_bridge": event_bridge.get_stats(),
+        "websocket": websocket_manager.get_stats(),
+        "json_parser": get_parse_stats(),
+        "http_pool": http_pool.get_stats(),
+        "llm_limiter": _llm_limiter_stats(),
+        "llm_cache": _llm_cache_stats(),
+        "llm_hedging": _llm_hedging_stats(),
+        "llm_circuits": _llm_circuit_stats(),
+        "llm_key_pools": _llm_key_pool_stats(),
         "config": {
             "max_debate_turns": settings.game.max_debate_turns,
             "default_threads": settings.game.default_threads,
@@ -84,6 +100,60 @@ async def server_info() -> Dict[str, Any]:
     }
 
 
+def _llm_limiter_stats():
+    """LLM准入控制统计（LLM客户端未初始化时为 None）"""
+    try:
+        return get_global_llm_client().limiter.get_stats()
+    except RuntimeError:
+        return None
+
+
+def _llm_cache_stats():
+    """LLM响应缓存统计（未启用缓存时为 None）"""
+    try:
+        cache = get_global_llm_client().cache
+    except RuntimeError:
+        return None
+    return cache.get_stats() if cache else None
+
+
+def _llm_hedging_stats():
+    """对冲请求统计（未开启对冲时为 None）"""
+    try:
+        hedging = get_global_llm_client().hedging
+    except RuntimeError:
+        return None
+    return hedging.get_stats() if hedging else None
+
+
+def _llm_circuit_stats():
+    """熔断器状态（未启用熔断或LLM客户端未初始化时为 None）"""
+    try:
+        breakers = get_global_llm_client().breakers
+    except RuntimeError:
+        return None
+    return breakers.get_stats() if breakers else None
+
+
+def _llm_key_pool_stats():
+    """密钥池各成员的用量和限额余量（LLM客户端未初始化时为 None）"""
+    try:
+        return get_global_llm_client().get_pool_stats()
+    except RuntimeError:
+        return None
+
+
+def _open_circuits():
+    """当前处于熔断（open）状态的提供商和模型"""
+    stats = _llm_circuit_stats() or {}
+    return [
+        f"{kind[:-1]}:{name}"
+        for kind, entries in stats.items()
+        for name, entry in entries.items()
+        if entry["state"] == "open"
+    ]
+
+
 @router.get("/stats")
 async def game_stats() -> Dict[str, Any]:
     """
@@ -3,35 +3,150 @@ WebSocket API路由
 WebSocket API Routes for real-time game updates
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Set
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from src.services.game_manager.session_manager import game_manager
 from src.services.logger.realtime_logger import realtime_logger
 from src.services.game_manager.sequence_manager import sequence_manager, ActionType
+from src.core.models.game_state import to_json
+from src.services.game_manager.state_stream import StateStream
+from src.config.settings import settings
 import json
 import asyncio
 from datetime import datetime
 
 router = APIRouter()
 
+
+class ClientConnection:
+    """Outbound side of one WebSocket: a bounded send queue drained by its own writer task
+
+    Broadcasting only enqueues, so a slow spectator never stalls the others.
+    When the queue is full the overflow policy either drops the oldest queued
+    message ("drop_oldest") or disconnects the client ("disconnect").
+    """
+
+    def __init__(self, websocket: WebSocket, session_id: str, on_close: Callable[["ClientConnection"], None],
+                 maxsize: int = 256, overflow_policy: str = "drop_oldest"):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.overflow_policy = overflow_policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.closed = False
+        self.overflowed = False
+        self._on_close = on_close
+        self._writer = asyncio.get_running_loop().create_task(self._run())
+
+    def enqueue(self, message: str) -> bool:
+        """Queue a message without waiting; returns False if it was not queued"""
+        if self.closed:
+            return False
+        if self.queue.full():
+            if self.overflow_policy == "disconnect":
+                print(f"WebSocket client in session {self.session_id} fell behind ({self.queue.qsize()} queued), disconnecting")
+                self.overflowed = True
+                self.close(code=1013)
+                return False
+            # drop_oldest: a newer message is worth more than a stale one
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    async def _run(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websocket.send_text(message)
+                self.sent += 1
+            except Exception as e:
+                print(f"Error sending to connection in session {self.session_id}: {e}")
+                self.close()
+                return
+            finally:
+                self.queue.task_done()
+
+    async def drain(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far has been sent"""
+        if self.closed:
+            return False
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def close(self, code: Optional[int] = None):
+        """Stop the writer and unregister; optionally close the socket with a code"""
+        if self.closed:
+            return
+        self.closed = True
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        if code is not None:
+            asyncio.get_running_loop().create_task(self._close_socket(code))
+        self._on_close(self)
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+        }
+
+
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
         # Store active connections: {session_id: [websocket1, websocket2, ...]}
         self.active_connections: Dict[str, List[WebSocket]] = {}
-
-    async def connect(self, websocket: WebSocket, session_id: str):
+        # Outbound queue and writer task per connection
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        # Clients disconnected by the "disconnect" overflow policy
+        self.slow_client_disconnects = 0
+        # Connections that opted into versioned game_patch deltas instead of full game_update
+        self.delta_connections: Set[WebSocket] = set()
+        # Versioned state per session: {session_id: StateStream}
+        self.state_streams: Dict[str, StateStream] = {}
+
+    async def connect(self, websocket: WebSocket, session_id: str, delta: bool = False):
         """Accept and store WebSocket connection"""
         await websocket.accept()
 
+        if delta:
+            self.delta_connections.add(websocket)
+
         if session_id not in self.active_connections:
             self.active_connections[session_id] = []
 
         self.active_connections[session_id].append(websocket)
+        self.clients[websocket] = ClientConnection(
+            websocket,
+            session_id,
+            on_close=self._on_client_closed,
+            maxsize=settings.server.ws_send_queue_size,
+            overflow_policy=settings.server.ws_overflow_policy,
+        )
         print(f"WebSocket connected for session {session_id}. Total connections: {len(self.active_connections[session_id])}")
 
     def disconnect(self, websocket: WebSocket, session_id: str):
         """Remove WebSocket connection"""
+        self.delta_connections.discard(websocket)
+        client = self.clients.pop(websocket, None)
+        if client is not None:
+            client.close()
         if session_id in self.active_connections:
             if websocket in self.active_connections[session_id]:
                 self.active_connections[session_id].remove(websocket)
@@ -41,8 +156,18 @@ class ConnectionManager:
                 if len(self.active_connections[session_id]) == 0:
                     del self.active_connections[session_id]
 
+    def _on_client_closed(self, client: ClientConnection):
+        """Writer failed or the client overflowed: drop it from the session"""
+        if client.overflowed:
+            self.slow_client_disconnects += 1
+        self.disconnect(client.websocket, client.session_id)
+
     async def send_personal_message(self, message: str, websocket: WebSocket):
-        """Send message to specific WebSocket"""
+        """Send message to specific WebSocket (via its queue, keeping order with broadcasts)"""
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.enqueue(message)
+            return
         try:
             await websocket.send_text(message)
         except Exception as e:
@@ -50,30 +175,112 @@ class ConnectionManager:
 
     async def broadcast_to_session(self, message: str, session_id: str):
         """Broadcast message to all connections in a session"""
-        if session_id in self.active_connections:
-            # Create a copy of the list to avoid modification during iteration
-            connections = self.active_connections[session_id].copy()
-            disconnected_connections = []
-
-            for connection in connections:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    print(f"Error broadcasting to connection in session {session_id}: {e}")
-                    disconnected_connections.append(connection)
-
-            # Remove disconnected connections
-            for connection in disconnected_connections:
-                self.disconnect(connection, session_id)
+        await self._broadcast(session_id, message, message)
+
+    async def _broadcast(self, session_id: str, message: Optional[str], delta_message: Optional[str]):
+        """Queue message for full connections and delta_message for delta connections (None skips)
+
+        Only enqueues: each connection's writer task does the actual send, so
+        a publish costs the same however slow the audience is.
+        """
+        for connection in self.active_connections.get(session_id, []).copy():
+            text = delta_message if connection in self.delta_connections else message
+            if text is None:
+                continue
+            client = self.clients.get(connection)
+            if client is not None:
+                client.enqueue(text)
+
+    async def drain(self, session_id: str, timeout: float = 5.0):
+        """Wait for the send queues of a session to empty"""
+        clients = [self.clients[c] for c in self.active_connections.get(session_id, []) if c in self.clients]
+        await asyncio.gather(*(client.drain(timeout) for client in clients))
+
+    def get_state_stream(self, session_id: str) -> StateStream:
+        """Get (or create) the versioned state of a session"""
+        stream = self.state_streams.get(session_id)
+        if stream is None:
+            stream = self.state_streams[session_id] = StateStream()
+        return stream
 
     async def broadcast_game_update(self, session_id: str, game_data: dict):
-        """Broadcast game state update to all connections in a session"""
-        message = {
+        """Broadcast game state update to all connections in a session
+
+        Each message is serialized once per broadcast. Full clients get the
+        whole game_update; delta clients get a game_patch with only the
+        changes since the previous version.
+        """
+        timestamp = datetime.now().isoformat()
+        game_state = game_data.get("game_state")
+        if game_state is None:
+            message = {"type": "game_update", "data": game_data, "timestamp": timestamp}
+            await self.broadcast_to_session(to_json(message), session_id)
+            return
+
+        stream = self.get_state_stream(session_id)
+        is_initial = stream.snapshot is None
+        previous_status = stream.status
+        patch = stream.update(game_state)
+        stream.status = game_data.get("status")
+
+        message = to_json({
             "type": "game_update",
-            "data": game_data,
-            "timestamp": datetime.now().isoformat()
+            "data": {**game_data, "version": stream.version},
+            "timestamp": timestamp
+        })
+        delta_message = None
+        if is_initial:
+            # No base version yet: delta clients start from the full snapshot
+            delta_message = message
+        elif patch is not None or stream.status != previous_status:
+            delta_message = to_json(self._patch_message(stream.version, patch or [], stream.status, timestamp))
+        await self._broadcast(session_id, message, delta_message)
+
+    @staticmethod
+    def _patch_message(version: int, patch: list, status: Optional[str], timestamp: str) -> dict:
+        return {
+            "type": "game_patch",
+            "data": {
+                "version": version,
+                "base_version": version - 1,
+                "patch": patch,
+                "status": status
+            },
+            "timestamp": timestamp
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+
+    async def send_state_sync(self, websocket: WebSocket, session_id: str, since_version: Optional[int] = None):
+        """Bring a delta client up to date
+
+        Sends the patches after since_version when they are still kept,
+        otherwise a full game_update snapshot with its version.
+        """
+        stream = self.get_state_stream(session_id)
+        if stream.snapshot is None:
+            game_session = game_manager.get_session(session_id)
+            if not game_session or not game_session.state:
+                return
+            stream.update(game_session.state.to_dict())
+            stream.status = "running" if game_session.is_running else "stopped"
+
+        timestamp = datetime.now().isoformat()
+        deltas = stream.deltas_since(since_version) if since_version is not None else None
+        if deltas is None:
+            await self.send_personal_message(to_json({
+                "type": "game_update",
+                "data": {
+                    "game_state": stream.snapshot,
+                    "status": stream.status,
+                    "version": stream.version
+                },
+                "timestamp": timestamp
+            }), websocket)
+            return
+
+        for version, patch in deltas:
+            await self.send_personal_message(
+                to_json(self._patch_message(version, patch, stream.status, timestamp)), websocket
+            )
 
     async def broadcast_round_complete(self, session_id: str, round_data: dict, next_phase: dict = None):
         """Broadcast round completion to all connections in a session"""
@@ -85,7 +292,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(to_json(message), session_id)
 
     async def broadcast_game_complete(self, session_id: str, winner: str, final_round: dict, game_state: dict):
         """Broadcast game completion to all connections in a session"""
@@ -98,7 +305,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(to_json(message), session_id)
 
     async def broadcast_game_complete_v2(self, session_id: str, winner: str, winner_name: str, players_info: dict, round_number: int):
         """Broadcast game completion with player roles to all connections in a session"""
@@ -112,7 +319,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(to_json(message), session_id)
 
     
     async def broadcast_player_action(self, session_id: str, action_event):
@@ -122,7 +329,7 @@ class ConnectionManager:
             "data": action_event.to_dict(),
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(to_json(message), session_id)
 
     async def broadcast_debate_turn(self, session_id: str, player_name: str, dialogue: str, sequence_number: int):
         """Broadcast debate turn with sequence"""
@@ -136,7 +343,27 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(to_json(message), session_id)
+
+    async def broadcast_debate_delta(self, session_id: str, player_name: str, delta: str, turn_number: int, round_number: int, attempt: int = 0):
+        """Broadcast a partial debate speech while it is being generated
+
+        Deltas are not sequenced; clients append them per (round_number, turn_number)
+        and restart the draft when attempt changes. The debate_turn message that
+        follows carries the final text.
+        """
+        message = {
+            "type": "debate_delta",
+            "data": {
+                "player_name": player_name,
+                "turn_number": turn_number,
+                "round_number": round_number,
+                "attempt": attempt,
+                "delta": delta,
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+        await self.broadcast_to_session(to_json(message), session_id)
 
     async def broadcast_vote_cast(self, session_id: str, voter: str, target: str, sequence_number: int):
         """Broadcast individual vote with sequence"""
@@ -150,7 +377,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(to_json(message), session_id)
 
     async def broadcast_night_action(self, session_id: str, action_type: str, player_name: str, target_name: Optional[str] = None, details: Optional[Dict[str, Any]] = None, sequence_number: Optional[int] = None):
         """Broadcast night action with sequence"""
@@ -167,7 +394,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(to_json(message), session_id)
 
     async def broadcast_phase_change(self, session_id: str, phase: str, round_number: int, sequence_number: Optional[int] = None):
         """Broadcast phase change with sequence"""
@@ -181,7 +408,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(to_json(message), session_id)
 
     async def broadcast_player_exile(self, session_id: str, exiled_player: str, round_number: int, sequence_number: Optional[int] = None):
         """Broadcast player exile"""
@@ -195,7 +422,7 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(to_json(message), session_id)
 
     async def broadcast_player_summary(self, session_id: str, player_name: str, summary: str, round_number: int, sequence_number: Optional[int] = None):
         """Broadcast player summary"""
@@ -210,19 +437,41 @@ class ConnectionManager:
             },
             "timestamp": datetime.now().isoformat()
         }
-        await self.broadcast_to_session(json.dumps(message), session_id)
+        await self.broadcast_to_session(to_json(message), session_id)
 
     def get_connection_count(self, session_id: str) -> int:
         """Get number of active connections for a session"""
         return len(self.active_connections.get(session_id, []))
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection and send-queue metrics"""
+        clients = list(self.clients.values())
+        depths = [client.queue.qsize() for client in clients]
+        return {
+            "connections": len(clients),
+            "sessions": len(self.active_connections),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "max_queue_size": settings.server.ws_send_queue_size,
+            "overflow_policy": settings.server.ws_overflow_policy,
+            "messages_sent": sum(client.sent for client in clients),
+            "messages_dropped": sum(client.dropped for client in clients),
+            "slow_client_disconnects": self.slow_client_disconnects,
+        }
+
 # Global connection manager instance
 manager = ConnectionManager()
 
 @router.websocket("/ws/{session_id}")
-async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    """WebSocket endpoint for real-time game updates"""
-    await manager.connect(websocket, session_id)
+async def websocket_endpoint(websocket: WebSocket, session_id: str, mode: Optional[str] = None, version: Optional[int] = None):
+    """WebSocket endpoint for real-time game updates
+
+    Query params:
+        mode: "delta" to receive versioned game_patch messages instead of full game_update
+        version: last state version the client has (delta mode reconnects)
+    """
+    delta = mode == "delta"
+    await manager.connect(websocket, session_id, delta=delta)
 
     try:
         # Send initial connection confirmation
@@ -237,7 +486,9 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
 
         # Send current game state if game exists
         game_session = game_manager.get_session(session_id)
-        if game_session and game_session.state:
+        if delta:
+            await manager.send_state_sync(websocket, session_id, version)
+        elif game_session and game_session.state:
             await manager.send_personal_message(json.dumps({
                 "type": "game_update",
                 "data": {
@@ -278,6 +529,10 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                         # Just acknowledge it silently, no need to respond
                         pass
 
+                    elif message.get("type") == "sync":
+                        # Delta client detected a version gap: resend patches (or a snapshot)
+                        await manager.send_state_sync(websocket, session_id, message.get("version"))
+
                     elif message.get("type") == "get_status":
                         # Send current game status
                         game_session = game_manager.get_session(session_id)
@@ -374,6 +629,10 @@ async def notify_debate_turn(session_id: str, player_name: str, dialogue: str, p
 
     return sequence_number
 
+async def notify_debate_delta(session_id: str, player_name: str, delta: str, turn_number: int, round_number: int, attempt: int = 0):
+    """Notify all clients about a partial debate speech"""
+    await manager.broadcast_debate_delta(session_id, player_name, delta, turn_number, round_number, attempt)
+
 async def notify_vote_cast(session_id: str, voter: str, target: str, voter_role: str):
     """Notify all clients about an individual vote"""
     sequence_number = sequence_manager.get_next_sequence(session_id)
@@ -429,6 +688,7 @@ __all__ = [
     'notify_game_complete',
     'notify_player_action',
     'notify_debate_turn',
+    'notify_debate_delta',
     'notify_vote_cast',
     'notify_night_action',
     'notify_phase_change',
@@ -33,6 +33,14 @@ class ModelRegistry:
         self.config_path = config_path
         self.models: Dict[str, ModelConfig] = {}
         self.aliases: Dict[str, str] = {}
+        # 提供商/模型的并发和速率限制: {"providers": {...}, "models": {...}}
+        self.rate_limits: Dict[str, Any] = {}
+        # 对冲请求的等价模型: {"equivalents": {"provider/model": [...]}}
+        self.hedging: Dict[str, Any] = {}
+        # 模型路由规则: {"keywords": [...], "fallback": [...]}
+        self.routing: Dict[str, Any] = {}
+        # 多密钥/多端点负载均衡: {"providers": {name: {...}}}
+        self.key_pools: Dict[str, Any] = {}
         self._load_config()
 
     def _load_config(self):
@@ -57,6 +65,16 @@ class ModelRegistry:
         # 加载别名
         self.aliases = config.get("aliases", {})
 
+        # 加载速率限制
+        self.rate_limits = config.get("rate_limits") or {}
+
+        # 加载对冲配置
+        self.hedging = config.get("hedging") or {}
+
+        # 加载路由规则和密钥池配置
+        self.routing = config.get("routing") or {}
+        self.key_pools = config.get("key_pools") or {}
+
     def get_model(self, model_id: str) -> Optional[ModelConfig]:
         """获取模型配置"""
         # 先检查别名
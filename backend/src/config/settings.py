@@ -4,7 +4,7 @@ Unified Configuration System using Pydantic Settings
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pathlib import Path
 import random
 from .timing_loader import get_timing_config, TimingConfig
@@ -16,8 +16,24 @@ class GameSettings(BaseSettings):
     max_debate_turns: int = 1  # 增加辩论轮数到5轮
     default_threads: int = 4
     debate_concurrent: int = 3  # 发言阶段并发数
+    night_concurrent: bool = True  # 狼人、医生、预言家同时生成夜间行动
+    vote_timeout: float = 15.0  # 投票阶段所有玩家共用的截止时间（秒），超时按默认投票处理
+    speculative_prefetch: bool = True  # 发言展示期间预取投票，投票公布期间预取总结
+    stream_debate: bool = True  # 流式生成发言并通过 debate_delta 消息实时推送
+    stream_flush_interval: float = 0.1  # 发言增量合并推送的间隔（秒）
     retries: int = 2
+    retry_budget: int = 60  # 每局游戏所有LLM调用可用的重试总次数
     run_synthetic_votes: bool = True
+    # 随机种子：设置后角色分配、发言顺序等可复现（配合 replay 缓存重跑整局），None 表示不固定
+    seed: Optional[int] = None
+    # 进度持久化：journal = 增量日志 + 定期快照（默认）；full = 每次进度全量重写
+    persistence_mode: str = "journal"
+    persistence_debounce: float = 0.5  # 写入合并间隔（秒）
+    snapshot_interval: int = 200  # 累计多少条增量日志后压缩为快照
+    # 提示词上下文窗口：观察记录和本轮辩论的token预算（0 表示不限制）
+    context_budget: int = 3000
+    context_budgets: Dict[str, int] = {}  # 按行动类型覆盖，如 {"vote": 2000, "summarize": 4000}
+    context_recent_rounds: int = 2  # 始终保持原文的最近回合数
 
     @property
     def timing(self) -> TimingConfig:
@@ -74,9 +90,58 @@ class LLMSettings(BaseSettings):
     siliconflow_api_key: Optional[str] = None
     siliconflow_base_url: str = "https://api.siliconflow.cn/v1"
 
+    # 以上 *_api_key / *_base_url 可以用逗号分隔多个值，组成密钥池（权重和每个密钥的限额见 models.yaml 的 key_pools 段）
+    key_pool_strategy: str = "least_outstanding"  # least_outstanding 或 weighted_round_robin
+    key_pool_cooldown: float = 10.0  # 密钥被限流（无 Retry-After）或认证失败后暂停使用的秒数
+
     # 默认使用的模型 - 改为硅基流动的模型
     default_model: str = "siliconflow/deepseek-ai/DeepSeek-V3"
 
+    # 共享HTTP连接池（每个base_url一个，所有提供商共用）
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0  # 空闲连接保留秒数
+    http_connect_timeout: float = 10.0
+    http_read_timeout: float = 600.0  # 与OpenAI SDK默认超时一致
+    http_write_timeout: float = 30.0
+    http_pool_timeout: float = 30.0  # 连接池满时等待空闲连接的秒数
+    http2: bool = False  # 需要安装 h2
+
+    # 准入控制默认值（models.yaml 的 rate_limits 未配置的提供商使用；0 表示不限制）
+    default_max_concurrency: int = 0
+    default_rpm: int = 0
+    default_tpm: int = 0
+    rate_limit_completion_tokens: int = 512  # 预约TPM时为响应预留的token数
+
+    # 重试策略（限流和传输错误；响应无效时的重新生成次数见 GAME__RETRIES）
+    retry_max_transport_retries: int = 3
+    retry_base_delay: float = 1.0  # 指数退避基础秒数（限流时加倍）
+    retry_max_delay: float = 20.0  # 单次退避上限
+    retry_max_retry_after: float = 60.0  # 接受的 Retry-After 上限
+
+    # 响应缓存：off / read_through / replay（replay 只读缓存，未命中即失败，不产生API调用）
+    cache_mode: str = "off"
+    cache_path: Optional[str] = None  # 默认 shared/cache/llm_responses.sqlite
+    cache_max_entries: int = 50000
+
+    # 对冲请求和故障转移（等价模型见 models.yaml 的 hedging 段）
+    hedge_enabled: bool = False  # 只对异步调用（acall）生效
+    hedge_percentile: float = 0.95  # 超过该分位延迟时发出对冲请求
+    hedge_min_samples: int = 20  # 延迟样本不足时使用 hedge_initial_delay
+    hedge_initial_delay: float = 10.0
+    hedge_min_delay: float = 1.0
+    hedge_failover_threshold: int = 3  # 连续失败多少次后优先调用等价模型
+    hedge_failover_cooldown: float = 60.0
+
+    # 熔断器（每个提供商、每个模型各一个）
+    breaker_enabled: bool = True
+    breaker_failure_rate: float = 0.5  # 最近调用的失败率达到该值时熔断
+    breaker_window: int = 20  # 统计最近多少次调用
+    breaker_min_calls: int = 5  # 至少多少次调用后才会熔断
+    breaker_slow_call_seconds: float = 120.0  # 超过该耗时的调用也算失败（0 不统计）
+    breaker_open_seconds: float = 30.0  # 熔断多久后放行探测调用
+    breaker_half_open_calls: int = 1  # 探测时同时放行的调用数
+
 
 class ServerSettings(BaseSettings):
     """服务器配置"""
@@ -84,7 +149,12 @@ class ServerSettings(BaseSettings):
     port: int = 8000
     reload: bool = False
     log_level: str = "info"
+    log_format: str = "text"  # 结构化日志格式：text 或 json
+    log_sample_rate: float = 1.0  # debug/info 日志的采样比例
     workers: int = 1
+    event_queue_size: int = 1000  # 游戏事件桥队列上限
+    ws_send_queue_size: int = 256  # 每个WebSocket连接的发送队列上限
+    ws_overflow_policy: str = "drop_oldest"  # 发送队列满时的策略：drop_oldest（丢弃最旧消息）或 disconnect（断开慢客户端）
 
 
 class CORSSettings(BaseSettings):
@@ -14,9 +14,9 @@
 
 """Werewolf game."""
 
+import asyncio
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor
-import random
+import copy
 from typing import List, Optional, Callable, Dict, Any
 from datetime import datetime
 
@@ -27,7 +27,10 @@ from src.core.models.game_state import Round, State
 from src.core.models.logs import RoundLog, VoteLog
 from src.config.settings import MAX_DEBATE_TURNS, RUN_SYNTHETIC_VOTES
 from src.config.settings import settings
+from src.core.game.seeding import GameRandom
 from src.config.timing_loader import apply_game_mode, get_delay
+from src.core.game.scheduler import RoundScheduler, Stage
+from src.services.llm.retry import RetryBudget, current_retry_budget
 
 def get_max_bids(d):
   """Gets all the keys with the highest value in the dictionary."""
@@ -56,6 +59,36 @@ class Timer:
     return elapsed
 
 
+class DeltaBuffer:
+  """合并发言增量后再推送，避免每个token发一条WebSocket消息
+
+  第一段立即推送（尽快让观众看到内容），之后按 interval 合并；
+  重试（attempt 变化）时先推送上一轮剩余的增量。
+  """
+
+  def __init__(self, publish: Callable[[str, int], None], interval: float):
+    self.publish = publish
+    self.interval = interval
+    self._parts: List[str] = []
+    self._attempt = 0
+    self._last_flush: Optional[float] = None
+
+  def __call__(self, delta: str, attempt: int) -> None:
+    if attempt != self._attempt:
+      self.flush()
+      self._attempt = attempt
+      self._last_flush = None
+    self._parts.append(delta)
+    if self._last_flush is None or time.monotonic() - self._last_flush >= self.interval:
+      self.flush()
+
+  def flush(self) -> None:
+    if self._parts:
+      self.publish("".join(self._parts), self._attempt)
+      self._parts = []
+      self._last_flush = time.monotonic()
+
+
 class GameMaster:
 
   def __init__(
@@ -79,6 +112,13 @@ class GameMaster:
     self.logs: List[RoundLog] = []
     self.on_progress = on_progress
     self.should_stop = False  # 添加停止标志
+    # 本局所有LLM调用共用的重试预算
+    self.retry_budget = RetryBudget(settings.game.retry_budget)
+    # 按用途划分的随机流（配置 GAME__SEED 时可复现）
+    self.random = GameRandom.from_settings()
+    # 推测预取：发言展示期间提前生成的投票、投票公布期间提前生成的总结
+    self._vote_prefetch = None  # (开始时间, {玩家: 任务})
+    self._summary_prefetch = None  # (预计放逐的玩家, {玩家: 任务})
     
     # 时间统计
     self.timing_stats = {
@@ -96,6 +136,11 @@ class GameMaster:
     if self.on_progress:
       self.on_progress(self.state, self.logs)
 
+  async def _pause(self, seconds: float) -> None:
+    """节奏暂停（不阻塞事件循环）"""
+    if seconds > 0:
+      await asyncio.sleep(seconds)
+
   @property
   def this_round(self) -> Round:
     return self.state.rounds[self.current_round_num]
@@ -104,16 +149,15 @@ class GameMaster:
   def this_round_log(self) -> RoundLog:
     return self.logs[self.current_round_num]
 
-  def eliminate(self):
-    """Werewolves choose a player to eliminate."""
-    action_timer = Timer("狼人击杀")
-    
-    # 添加夜间行动延迟（使用配置文件）
+  async def _night_pause(self) -> None:
+    """夜间行动延迟（使用配置文件）"""
     delay = get_delay("night_action", self.delay_multiplier)
     if delay > 0:
       tqdm.tqdm.write(f"⏱️ [夜间延迟] 暂停{delay:.2f}秒")
-    time.sleep(delay)
+    await self._pause(delay)
 
+  async def _decide_eliminate(self):
+    """狼人生成击杀决定（不修改游戏状态）"""
     werewolves_alive = [
         w for w in self.state.werewolves if w.name in self.this_round.players
     ]
@@ -121,11 +165,16 @@ class GameMaster:
     if not werewolves_alive:
       raise ValueError("No werewolves alive to eliminate players.")
 
-    wolf = random.choice(werewolves_alive)
-    eliminated, log = wolf.eliminate()
-    self.this_round_log.eliminate = log
-    
+    wolf = self.random.stream("werewolf").choice(werewolves_alive)
+    action_timer = Timer("狼人击杀")
+    eliminated, log = await wolf.aeliminate()
     action_timer.log(f"狼人 {wolf.name} 行动完成")
+    return wolf, werewolves_alive, eliminated, log
+
+  def _apply_eliminate(self, decision) -> None:
+    """结算狼人击杀并发送通知"""
+    wolf, werewolves_alive, eliminated, log = decision
+    self.this_round_log.eliminate = log
 
     # 如果返回None，选择一个默认目标
     if eliminated is None:
@@ -134,7 +183,7 @@ class GameMaster:
           if p != wolf.name and p not in [w.name for w in self.state.werewolves]
       ]
       if available_targets:
-        eliminated = random.choice(available_targets)
+        eliminated = self.random.stream("eliminate").choice(available_targets)
         print(f"Warning: {wolf.name} failed to choose target, randomly selected {eliminated}")
         # 更新日志以反映随机选择
         log.result = {"remove": eliminated, "reasoning": "Random fallback selection"}
@@ -178,29 +227,33 @@ class GameMaster:
 
     self._progress()
 
-  def protect(self):
-    """Doctor chooses a player to protect."""
+  async def eliminate(self):
+    """Werewolves choose a player to eliminate."""
+    await self._night_pause()
+    self._apply_eliminate(await self._decide_eliminate())
+
+  async def _decide_protect(self):
+    """医生生成保护决定（医生已出局时返回 None）"""
     if self.state.doctor.name not in self.this_round.players:
-      return  # Doctor no longer in the game
+      return None  # Doctor no longer in the game
 
     action_timer = Timer("医生保护")
-    
-    # 添加夜间行动延迟（使用配置文件）
-    delay = get_delay("night_action", self.delay_multiplier)
-    if delay > 0:
-      tqdm.tqdm.write(f"⏱️ [夜间延迟] 暂停{delay:.2f}秒")
-    time.sleep(delay)
+    protect, log = await self.state.doctor.asave()
+    action_timer.log(f"医生 {self.state.doctor.name} 行动完成")
+    return protect, log
 
-    protect, log = self.state.doctor.save()
+  def _apply_protect(self, decision) -> None:
+    """结算医生保护并发送通知（医生已出局时 decision 为 None）"""
+    if decision is None:
+      return
+    protect, log = decision
     self.this_round_log.protect = log
-    
-    action_timer.log(f"医生 {self.state.doctor.name} 行动完成")
 
     if protect is None:
       # 如果没有返回保护目标，随机选择一个
       available_targets = list(self.this_round.players)
       if available_targets:
-        protect = random.choice(available_targets)
+        protect = self.random.stream("protect").choice(available_targets)
         print(f"Warning: {self.state.doctor.name} failed to choose protection target, randomly selected {protect}")
         # 更新日志
         log.result = {"protect": protect, "reasoning": "Random fallback selection"}
@@ -239,23 +292,30 @@ class GameMaster:
 
     self._progress()
 
-  def unmask(self):
-    """Seer chooses a player to unmask."""
+  async def protect(self):
+    """Doctor chooses a player to protect."""
+    if self.state.doctor.name not in self.this_round.players:
+      return  # Doctor no longer in the game
+
+    await self._night_pause()
+    self._apply_protect(await self._decide_protect())
+
+  async def _decide_unmask(self):
+    """预言家生成查验决定（预言家已出局时返回 None）"""
     if self.state.seer.name not in self.this_round.players:
-      return  # Seer no longer in the game
+      return None  # Seer no longer in the game
 
     action_timer = Timer("预言家查验")
-    
-    # 添加夜间行动延迟（使用配置文件）
-    delay = get_delay("night_action", self.delay_multiplier)
-    if delay > 0:
-      tqdm.tqdm.write(f"⏱️ [夜间延迟] 暂停{delay:.2f}秒")
-    time.sleep(delay)
+    unmask, log = await self.state.seer.aunmask()
+    action_timer.log(f"预言家 {self.state.seer.name} 行动完成")
+    return unmask, log
 
-    unmask, log = self.state.seer.unmask()
+  def _apply_unmask(self, decision) -> None:
+    """结算预言家查验并发送通知（预言家已出局时 decision 为 None）"""
+    if decision is None:
+      return
+    unmask, log = decision
     self.this_round_log.investigate = log
-    
-    action_timer.log(f"预言家 {self.state.seer.name} 行动完成")
 
     if unmask is None:
       # 如果没有返回调查目标，随机选择一个未调查过的玩家
@@ -264,7 +324,7 @@ class GameMaster:
           if p != self.state.seer.name and p not in self.state.seer.previously_unmasked.keys()
       ]
       if available_targets:
-        unmask = random.choice(available_targets)
+        unmask = self.random.stream("unmask").choice(available_targets)
         print(f"Warning: {self.state.seer.name} failed to choose investigation target, randomly selected {unmask}")
         # 更新日志
         log.result = {"investigate": unmask, "reasoning": "Random fallback selection"}
@@ -306,11 +366,19 @@ class GameMaster:
 
     self._progress()
 
-  def _get_bid(self, player_name):
+  async def unmask(self):
+    """Seer chooses a player to unmask."""
+    if self.state.seer.name not in self.this_round.players:
+      return  # Seer no longer in the game
+
+    await self._night_pause()
+    self._apply_unmask(await self._decide_unmask())
+
+  async def _get_bid(self, player_name):
     """Gets the bid for a specific player."""
     player = self.state.players[player_name]
     try:
-      bid, log = player.bid()
+      bid, log = await player.abid()
       if bid is None:
         # 如果出价为空，使用默认出价并记录警告
         print(f"Warning: {player_name} did not return a valid bid, using default")
@@ -345,29 +413,40 @@ class GameMaster:
       tqdm.tqdm.write(f"{player_name} bid: {bid}")
     return bid, log
 
-  def get_next_speaker(self):
+  async def _gather_limited(self, coros):
+    """并发执行协程，同时运行的数量不超过 num_threads，结果按输入顺序返回"""
+    semaphore = asyncio.Semaphore(max(1, self.num_threads))
+
+    async def run(coro):
+      async with semaphore:
+        return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros))
+
+  async def get_next_speaker(self):
     """Determine the next speaker based on bids."""
     previous_speaker, previous_dialogue = (
         self.this_round.debate[-1] if self.this_round.debate else (None, None)
     )
 
-    with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-      player_bids = {
-          player_name: executor.submit(self._get_bid, player_name)
-          for player_name in self.this_round.players
-          if player_name != previous_speaker
-      }
-
-      bid_log = []
-      bids = {}
-      try:
-        for player_name, bid_task in player_bids.items():
-          bid, log = bid_task.result()
-          bids[player_name] = bid
-          bid_log.append((player_name, log))
-      except TypeError as e:
-        print(e)
-        raise e
+    bidders = [
+        player_name
+        for player_name in self.this_round.players
+        if player_name != previous_speaker
+    ]
+    results = await self._gather_limited(
+        self._get_bid(player_name) for player_name in bidders
+    )
+
+    bid_log = []
+    bids = {}
+    try:
+      for player_name, (bid, log) in zip(bidders, results):
+        bids[player_name] = bid
+        bid_log.append((player_name, log))
+    except TypeError as e:
+      print(e)
+      raise e
 
     self.this_round.bids.append(bids)
     self.this_round_log.bid.append(bid_log)
@@ -379,60 +458,96 @@ class GameMaster:
           [name for name in potential_speakers if name in previous_dialogue]
       )
 
-    random.shuffle(potential_speakers)
-    return random.choice(potential_speakers)
+    rng = self.random.stream("bid")
+    rng.shuffle(potential_speakers)
+    return rng.choice(potential_speakers)
 
-  def run_summaries(self):
+  async def _summarize(self, player_name: str):
+    """获取单个玩家的总结，异常时返回 (None, 异常)"""
+    try:
+      return await self.state.players[player_name].asummarize()
+    except Exception as e:
+      return None, e
+
+  async def _consume_summary(self, player_name: str, task: "asyncio.Future"):
+    """取出预取的总结并记入玩家的观察记录，异常时返回 (None, 异常)"""
+    try:
+      result, log = await task
+      return self.state.players[player_name]._record_summary(result, log)
+    except Exception as e:
+      return None, e
+
+  async def run_summaries(self):
     """Collect summaries from players after the debate."""
     
     summary_timer = Timer("玩家总结")
     tqdm.tqdm.write("⏱️ [玩家总结] 开始收集玩家总结...")
 
-    with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-      player_summaries = {
-          name: executor.submit(self.state.players[name].summarize)
-          for name in self.this_round.players
-      }
+    player_names = list(self.this_round.players)
+    prefetch, self._summary_prefetch = self._summary_prefetch, None
+    if (prefetch is not None and prefetch[0] == self.this_round.exiled
+        and list(prefetch[1]) == player_names):
+      tqdm.tqdm.write("⏱️ [玩家总结] 使用投票公布期间预取的总结")
+      results = await asyncio.gather(
+          *(self._consume_summary(name, prefetch[1][name]) for name in player_names)
+      )
+    else:
+      if prefetch is not None:
+        for task in prefetch[1].values():
+          task.cancel()
+      results = await self._gather_limited(
+          self._summarize(name) for name in player_names
+      )
 
-      for player_name, summary_task in player_summaries.items():
-        try:
-            summary, log = summary_task.result()
-            if summary is None:
-                # 如果总结为空，使用默认总结并记录警告
-                print(f"Warning: {player_name} did not return a valid summary, using default")
-                summary = "我需要仔细思考今天发生的情况，并仔细分析局势。"
-                log = f"Default summary used due to empty response"
-            tqdm.tqdm.write(f"{player_name} summary: {summary}")
-            self.this_round_log.summaries.append((player_name, log))
-            
-            # 发送总结通知
-            self._notify_player_summary(player_name, summary, self.current_round_num)
-        except Exception as e:
-            # 如果总结过程出错，使用默认总结并记录错误
-            print(f"Error during summary for {player_name}: {e}")
-            summary = "我需要仔细思考今天发生的情况，并仔细分析局势。"
-            log = f"Error: {str(e)}"
-            tqdm.tqdm.write(f"{player_name} summary: {summary}")
-            self.this_round_log.summaries.append((player_name, log))
-            
-            # 发送总结通知
-            self._notify_player_summary(player_name, summary, self.current_round_num)
-
-            # 添加总结延迟（使用配置文件）
-            delay = get_delay("summary", self.delay_multiplier)
-            if delay > 0:
-              tqdm.tqdm.write(f"⏱️ [总结延迟] 暂停{delay:.2f}秒")
-            time.sleep(delay)
+    for player_name, (summary, log) in zip(player_names, results):
+      if not isinstance(log, Exception):
+          if summary is None:
+              # 如果总结为空，使用默认总结并记录警告
+              print(f"Warning: {player_name} did not return a valid summary, using default")
+              summary = "我需要仔细思考今天发生的情况，并仔细分析局势。"
+              log = f"Default summary used due to empty response"
+          tqdm.tqdm.write(f"{player_name} summary: {summary}")
+          self.this_round_log.summaries.append((player_name, log))
+          
+          # 发送总结通知
+          self._notify_player_summary(player_name, summary, self.current_round_num)
+      else:
+          # 如果总结过程出错，使用默认总结并记录错误
+          e = log
+          print(f"Error during summary for {player_name}: {e}")
+          summary = "我需要仔细思考今天发生的情况，并仔细分析局势。"
+          log = f"Error: {str(e)}"
+          tqdm.tqdm.write(f"{player_name} summary: {summary}")
+          self.this_round_log.summaries.append((player_name, log))
+          
+          # 发送总结通知
+          self._notify_player_summary(player_name, summary, self.current_round_num)
 
-        self._progress()
+          # 添加总结延迟（使用配置文件）
+          delay = get_delay("summary", self.delay_multiplier)
+          if delay > 0:
+            tqdm.tqdm.write(f"⏱️ [总结延迟] 暂停{delay:.2f}秒")
+          await self._pause(delay)
+
+      self._progress()
     
     summary_timer.log("玩家总结完成")
 
-  def _generate_speech(self, speaker_name: str):
-    """生成单个玩家的发言内容"""
+  async def _generate_speech(self, speaker_name: str, turn_number: Optional[int] = None):
+    """生成单个玩家的发言内容（开启 stream_debate 时边生成边推送 debate_delta）"""
     player = self.state.players[speaker_name]
+    on_delta = None
+    if settings.game.stream_debate and turn_number is not None:
+      round_number = self.current_round_num
+
+      def publish(delta: str, attempt: int):
+        self._notify_debate_delta(speaker_name, delta, turn_number, round_number, attempt)
+
+      on_delta = DeltaBuffer(publish, settings.game.stream_flush_interval)
     try:
-      dialogue, log = player.debate()
+      dialogue, log = await player.adebate(on_delta=on_delta)
+      if on_delta is not None:
+        on_delta.flush()
       if dialogue is None:
         # 如果发言为空，使用默认发言并记录警告
         print(f"Warning: {speaker_name} did not return a valid dialogue, using default")
@@ -450,15 +565,15 @@ class GameMaster:
     
     return dialogue, log
 
-  def run_day_phase(self):
-    """Run the day phase with concurrent speech generation but sequential delivery."""
+  async def run_day_phase(self):
+    """Run the day phase: pipelined speech generation with in-order delivery."""
     
     phase_timer = Timer("发言阶段")
 
     # 状态切换前暂停1秒
     tqdm.tqdm.write("⏱️ [阶段切换] 暂停1秒...")
     pause_timer = Timer("切换暂停")
-    time.sleep(1)
+    await self._pause(1)
     pause_timer.log("切换暂停完成")
     
     # 发送白天/发言阶段通知
@@ -468,88 +583,72 @@ class GameMaster:
 
     # 改为每个存活玩家都发言一次（打乱顺序以增加随机性）
     speakers = self.this_round.players.copy()
-    random.shuffle(speakers)  # 打乱发言顺序
+    self.random.stream("speakers").shuffle(speakers)  # 打乱发言顺序
     
     tqdm.tqdm.write(f"本轮发言顺序: {', '.join(speakers)}")
-    tqdm.tqdm.write(f"[并发生成] 使用3线程并发生成发言内容...")
+    concurrency = max(1, settings.game.debate_concurrent)
+    tqdm.tqdm.write(f"[流水线] 最多{concurrency}个发言同时生成，按顺序就绪即展示...")
 
-    # 并发生成所有发言内容（分批处理，每批最多3个）
-    speeches = {}
-    speech_logs = {}
-    
-    generation_timer = Timer("发言生成")
-    batch_size = 3  # 每批3个玩家并发
-    for batch_start in range(0, len(speakers), batch_size):
-      batch_speakers = speakers[batch_start:batch_start+batch_size]
-      batch_num = batch_start // batch_size + 1
-      total_batches = (len(speakers) + batch_size - 1) // batch_size
-      
-      batch_timer = Timer(f"批次{batch_num}")
-      tqdm.tqdm.write(f"[批次 {batch_num}/{total_batches}] 并发生成: {', '.join(batch_speakers)}")
-      
-      with ThreadPoolExecutor(max_workers=3) as executor:
-        # 提交任务
-        futures = {
-          speaker: executor.submit(self._generate_speech, speaker)
-          for speaker in batch_speakers
-        }
-        
-        # 等待这一批全部完成
-        for speaker in batch_speakers:
-          dialogue, log = futures[speaker].result()
-          speeches[speaker] = dialogue
-          speech_logs[speaker] = log
-          tqdm.tqdm.write(f"  ✓ {speaker} 发言生成完成 ({len(dialogue)}字)")
-      
-      batch_timer.log(f"批次{batch_num}完成")
-    
-    generation_timer.log("所有发言生成完成")
-    tqdm.tqdm.write(f"[生成完成] 所有发言已生成，开始按顺序发送和展示...")
+    # 流水线：所有发言在并发上限内生成，第k位在生成完成且前k-1位展示完后立即展示，
+    # 展示暂停期间后面的发言继续生成
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(turn_number: int, speaker: str):
+      async with semaphore:
+        return await self._generate_speech(speaker, turn_number=turn_number)
+
+    tasks = [
+        asyncio.ensure_future(generate(idx + 1, speaker))
+        for idx, speaker in enumerate(speakers)
+    ]
+
+    # 全部生成完后立即更新玩家视角并预取投票（不必等展示暂停结束）
+    generated = asyncio.ensure_future(self._after_speeches(speakers, tasks))
 
-    # 按顺序发送和处理（保证顺序）
     delivery_timer = Timer("发言发送")
     total_pause_time = 0
-    
-    for idx, speaker in enumerate(speakers):
-      dialogue = speeches[speaker]
-      log = speech_logs[speaker]
-      
-      send_timer = Timer(f"发送-{speaker}")
-      
-      # 保存到游戏状态
-      self.this_round_log.debate.append((speaker, log))
-      self.this_round.debate.append([speaker, dialogue])
-      tqdm.tqdm.write(f"[{idx + 1}/{len(speakers)}] {speaker} ({self.state.players[speaker].role}): {dialogue}")
-      
-      # 发送 WebSocket 通知
-      self._notify_debate_turn(
-        player_name=speaker,
-        dialogue=dialogue,
-        player_role=self.state.players[speaker].role,
-        turn_number=idx + 1
-      )
-      
-      # 更新其他玩家的游戏状态
-      for name in self.this_round.players:
-        player = self.state.players[name]
-        if player.gamestate:
-          player.gamestate.update_debate(speaker, dialogue)
-        else:
-          raise ValueError(f"{name}.gamestate needs to be initialized.")
-      
-      self._progress()
-      
-      send_elapsed = send_timer.log(f"{speaker}发送完成")
-      
-      # 计算暂停时间：每15个字1秒，最少0.5秒
-      char_count = len(dialogue)
-      pause_seconds = max(0.5, char_count / 15.0)
-      tqdm.tqdm.write(f"⏱️ [展示暂停] {char_count}字 → 暂停 {pause_seconds:.1f}秒")
-      time.sleep(pause_seconds)
-      total_pause_time += pause_seconds
-    
+    total_wait_time = 0.0
+
+    try:
+      for idx, speaker in enumerate(speakers):
+        wait_timer = Timer(f"等待-{speaker}")
+        dialogue, log = await tasks[idx]
+        total_wait_time += wait_timer.elapsed()
+        tqdm.tqdm.write(f"  ✓ {speaker} 发言生成完成 ({len(dialogue)}字)")
+
+        send_timer = Timer(f"发送-{speaker}")
+
+        # 保存到游戏状态
+        self.this_round_log.debate.append((speaker, log))
+        self.this_round.debate.append([speaker, dialogue])
+        tqdm.tqdm.write(f"[{idx + 1}/{len(speakers)}] {speaker} ({self.state.players[speaker].role}): {dialogue}")
+
+        # 发送 WebSocket 通知
+        self._notify_debate_turn(
+          player_name=speaker,
+          dialogue=dialogue,
+          player_role=self.state.players[speaker].role,
+          turn_number=idx + 1
+        )
+
+        self._progress()
+
+        send_elapsed = send_timer.log(f"{speaker}发送完成")
+
+        # 计算暂停时间：每15个字1秒，最少0.5秒
+        char_count = len(dialogue)
+        pause_seconds = max(0.5, char_count / 15.0)
+        tqdm.tqdm.write(f"⏱️ [展示暂停] {char_count}字 → 暂停 {pause_seconds:.1f}秒")
+        await self._pause(pause_seconds)
+        total_pause_time += pause_seconds
+      await generated
+    finally:
+      for task in tasks + [generated]:
+        task.cancel()
+      await asyncio.gather(*tasks, generated, return_exceptions=True)
+
     delivery_timer.log("所有发言发送完成")
-    tqdm.tqdm.write(f"⏱️ [发言暂停汇总] 总暂停时间: {total_pause_time:.1f}秒")
+    tqdm.tqdm.write(f"⏱️ [发言暂停汇总] 总暂停时间: {total_pause_time:.1f}秒，等待生成: {total_wait_time:.1f}秒")
     
     phase_timer.log("发言阶段总耗时")
 
@@ -559,7 +658,7 @@ class GameMaster:
         # 状态切换前暂停1秒
         tqdm.tqdm.write("⏱️ [投票阶段] 切换暂停1秒...")
         pause_timer = Timer("投票切换")
-        time.sleep(1)
+        await self._pause(1)
         pause_timer.log("投票切换完成")
         
         # 发送投票阶段通知
@@ -568,7 +667,7 @@ class GameMaster:
         notify_timer.log("投票通知发送")
         
         voting_timer = Timer("投票阶段")
-        votes, vote_logs = self.run_voting()
+        votes, vote_logs = await self.run_voting()
         voting_timer.log("投票阶段完成")
         
         self.this_round.votes.append(votes)
@@ -578,104 +677,175 @@ class GameMaster:
     for player, vote in self.this_round.votes[-1].items():
       tqdm.tqdm.write(f"{player} 投票淘汰 {vote}")
 
-  def run_voting(self):
-    """Conduct a vote among players to exile someone."""
+  async def _after_speeches(self, speakers: List[str], tasks: List["asyncio.Future"]) -> None:
+    """所有发言生成完后更新玩家视角，开启推测预取时立即开始生成投票
+
+    每位发言者生成时看到的都是阶段开始时的状态，提示词不随生成完成的先后变化
+    （响应缓存回放依赖这一点）。
+    """
+    results = await asyncio.gather(*tasks)
+    for speaker, (dialogue, _) in zip(speakers, results):
+      for name in self.this_round.players:
+        player = self.state.players[name]
+        if player.gamestate:
+          player.gamestate.update_debate(speaker, dialogue)
+        else:
+          raise ValueError(f"{name}.gamestate needs to be initialized.")
+
+    if settings.game.speculative_prefetch:
+      tqdm.tqdm.write("[推测预取] 发言已全部生成，展示期间提前生成投票")
+      self._vote_prefetch = (time.monotonic(), self._start_votes(list(self.this_round.players)))
+
+  def _start_votes(self, voters: List[str]) -> Dict[str, "asyncio.Future"]:
+    """同时开始生成所有玩家的投票"""
+    return {
+        player_name: asyncio.ensure_future(self.state.players[player_name].avote())
+        for player_name in voters
+    }
+
+  def _cancel_prefetch(self) -> None:
+    """取消未使用的预取任务（玩家列表变化、游戏结束或停止时）"""
+    for prefetch in (self._vote_prefetch, self._summary_prefetch):
+      if prefetch is not None:
+        for task in prefetch[1].values():
+          task.cancel()
+    self._vote_prefetch = None
+    self._summary_prefetch = None
+
+  def _default_vote(self, player_name: str) -> str:
+    """没有有效投票时的默认目标：第一个不是自己的存活玩家"""
+    return next((p for p in self.this_round.players if p and p != player_name), player_name)
+
+  def _settle_vote(self, player_name: str, task: "asyncio.Future", timeout: float):
+    """把一个投票任务的结果整理为 (投票目标, 日志)"""
+    if task.cancelled() or isinstance(task.exception(), asyncio.TimeoutError):
+      # 投票超时，使用默认投票
+      tqdm.tqdm.write(f"⚠️ [{player_name}] 投票超时(>{timeout:.0f}秒)，使用默认投票")
+      return self._default_vote(player_name), f"Timeout: Default vote used after {timeout:.0f}s timeout"
+
+    error = task.exception()
+    if error is not None:
+      # 如果投票过程出错，使用默认投票并记录错误
+      tqdm.tqdm.write(f"❌ [{player_name}] 投票异常: {error}")
+      return self._default_vote(player_name), f"Error: {str(error)}"
+
+    vote, log = task.result()
+    if vote is None:
+      # 如果没有返回投票，使用默认投票
+      tqdm.tqdm.write(f"⚠️ [{player_name}] 未返回有效投票，使用默认投票")
+      vote = self._default_vote(player_name)
+      log = f"Default vote used due to empty response"
+
+    # 验证投票是否是有效的玩家名
+    if vote not in self.this_round.players:
+      tqdm.tqdm.write(f"⚠️ [{player_name}] 投票目标无效 '{vote}'，使用默认投票")
+      vote = self._default_vote(player_name)
+      log = f"Invalid vote corrected to: {vote}"
+    return vote, log
+
+  async def run_voting(self):
+    """Conduct a vote among players to exile someone.
+
+    所有玩家的投票同时生成（共用 vote_timeout 截止时间，超时的按默认投票处理），
+    再按玩家顺序逐个公布，每票之间保持投票延迟。
+    """
     vote_log = []
     votes = {}
+    voters = list(self.this_round.players)
+    timeout = settings.game.vote_timeout
+
+    prefetch, self._vote_prefetch = self._vote_prefetch, None
+    if prefetch is not None and list(prefetch[1]) == voters:
+      # 使用发言展示期间预取的投票，截止时间从预取开始计算
+      started, tasks = prefetch
+      ready = sum(task.done() for task in tasks.values())
+      tqdm.tqdm.write(f"⏱️ [投票] 使用预取的投票（已完成{ready}/{len(voters)}，{timeout:.0f}秒截止）...")
+    else:
+      if prefetch is not None:
+        for task in prefetch[1].values():
+          task.cancel()
+      started, tasks = time.monotonic(), self._start_votes(voters)
+      tqdm.tqdm.write(f"⏱️ [投票] 并发生成{len(voters)}票（{timeout:.0f}秒截止）...")
+    collect_timer = Timer("投票生成")
+    try:
+      pending = [task for task in tasks.values() if not task.done()]
+      if pending:
+        await asyncio.wait(pending, timeout=max(0.0, started + timeout - time.monotonic()))
+    finally:
+      pending = [task for task in tasks.values() if not task.done()]
+      for task in pending:
+        task.cancel()
+      await asyncio.gather(*pending, return_exceptions=True)
+    collect_timer.log("投票生成完成")
+
+    settled = [self._settle_vote(player_name, tasks[player_name], timeout) for player_name in voters]
+    if settings.game.speculative_prefetch:
+      # 投票结果已确定，公布期间提前生成放逐后的总结
+      self._start_summary_prefetch(
+          {player_name: vote for player_name, (vote, _) in zip(voters, settled)}
+      )
 
-    tqdm.tqdm.write("⏱️ [投票] 开始顺序处理投票（15秒超时）...")
-    # 改为顺序处理投票，以便发送实时通知，添加15秒超时机制
-    for player_name in self.this_round.players:
-      player_timer = Timer(f"投票-{player_name}")
+    # 按顺序公布投票
+    for player_name, (vote, log) in zip(voters, settled):
       player = self.state.players[player_name]
+      votes[player_name] = vote
+      vote_log.append(VoteLog(player_name, vote, log))
+
+      # 发送 WebSocket 通知 - 投票
+      self._notify_vote_cast(
+        voter=player_name,
+        target=vote,
+        voter_role=player.role
+      )
 
-      # 使用线程池实现15秒超时机制
-      with ThreadPoolExecutor(max_workers=1) as executor:
-        try:
-          future = executor.submit(player.vote)
-          vote, log = future.result(timeout=15.0)  # 15秒超时
-
-          if vote is None:
-            # 如果没有返回投票，使用默认投票
-            tqdm.tqdm.write(f"⚠️ [{player_name}] 未返回有效投票，使用默认投票")
-            vote = next((p for p in self.this_round.players if p and p != player_name), player_name)
-            log = f"Default vote used due to empty response"
-
-          # 验证投票是否是有效的玩家名
-          if vote not in self.this_round.players:
-            tqdm.tqdm.write(f"⚠️ [{player_name}] 投票目标无效 '{vote}'，使用默认投票")
-            vote = next((p for p in self.this_round.players if p and p != player_name), player_name)
-            log = f"Invalid vote corrected to: {vote}"
-
-          votes[player_name] = vote
-          vote_log.append(VoteLog(player_name, vote, log))
-
-          # 发送 WebSocket 通知 - 投票
-          self._notify_vote_cast(
-            voter=player_name,
-            target=vote,
-            voter_role=player.role
-          )
-          
-          player_timer.log(f"{player_name}投票完成")
-
-          # 添加投票延迟（使用配置文件）
-          delay = get_delay("vote", self.delay_multiplier)
-          time.sleep(delay)
-
-        except TimeoutError:
-          # 投票超时，使用默认投票
-          tqdm.tqdm.write(f"⚠️ [{player_name}] 投票超时(>15秒)，使用默认投票")
-          vote = next((p for p in self.this_round.players if p and p != player_name), player_name)
-          log = f"Timeout: Default vote used after 15s timeout"
-          votes[player_name] = vote
-          vote_log.append(VoteLog(player_name, vote, log))
-          
-          # 发送 WebSocket 通知 - 投票
-          self._notify_vote_cast(
-            voter=player_name,
-            target=vote,
-            voter_role=player.role
-          )
-          
-          player_timer.log(f"{player_name}投票超时，使用默认")
-          
-        except Exception as e:
-          # 如果投票过程出错，使用默认投票并记录错误
-          tqdm.tqdm.write(f"❌ [{player_name}] 投票异常: {e}")
-          default_target = next((p for p in self.this_round.players if p and p != player_name), player_name)
-          votes[player_name] = default_target
-          vote_log.append(VoteLog(player_name, default_target, f"Error: {str(e)}"))
-
-          # 发送 WebSocket 通知 - 投票错误
-          self._notify_vote_cast(
-            voter=player_name,
-            target=default_target,
-            voter_role=player.role
-          )
+      # 添加投票延迟（使用配置文件）
+      delay = get_delay("vote", self.delay_multiplier)
+      await self._pause(delay)
 
     return votes, vote_log
 
+  def _exile_outcome(self, votes: Dict[str, str]):
+    """按投票计算 (被放逐的玩家, 放逐公告)，exile 和总结预取共用"""
+    if not votes:
+      return None, "没有玩家被放逐。"
+    most_voted, vote_count = Counter(votes.values()).most_common(1)[0]
+    if most_voted not in self.this_round.players:
+      return most_voted, f"No valid player was exiled (target: {most_voted})."
+    return most_voted, f"{most_voted} 获得最高票数({vote_count}票)，被投票放逐。"
+
+  def _start_summary_prefetch(self, votes: Dict[str, str]) -> None:
+    """按已确定的投票，在玩家视角的副本上应用放逐公告并提前生成总结"""
+    exiled, announcement = self._exile_outcome(votes)
+    if self.get_winner([p for p in self.this_round.players if p != exiled]):
+      return  # 放逐后游戏结束，不会进行总结
+    tasks = {}
+    for name in self.this_round.players:
+      if name == exiled:
+        continue
+      preview = copy.copy(self.state.players[name])
+      preview.observations = list(preview.observations)
+      if preview.gamestate:
+        preview.gamestate = copy.copy(preview.gamestate)
+        preview.gamestate.current_players = [
+            p for p in preview.gamestate.current_players if p != exiled
+        ]
+      preview.add_announcement(announcement)
+      tasks[name] = asyncio.ensure_future(preview._agenerate_action("summarize", []))
+    self._summary_prefetch = (exiled, tasks)
+
   def exile(self):
     """Exile the player who received the most votes (relative majority)."""
 
     exile_timer = Timer("放逐处理")
 
-    most_voted, vote_count = Counter(
-        self.this_round.votes[-1].values()
-    ).most_common(1)[0]
-
     # 相对多数制：得票最多的玩家直接出局（无需超过50%）
-    self.this_round.exiled = most_voted
+    self.this_round.exiled, announcement = self._exile_outcome(self.this_round.votes[-1])
 
     if self.this_round.exiled is not None:
       exiled_player = self.this_round.exiled
       # 安全地从玩家列表中移除被流放的玩家
       if exiled_player in self.this_round.players:
         self.this_round.players.remove(exiled_player)
-        announcement = (
-            f"{exiled_player} 获得最高票数({vote_count}票)，被投票放逐。"
-        )
 
         tqdm.tqdm.write(f"⏱️ [放逐] {exiled_player} 被投票放逐")
 
@@ -691,14 +861,12 @@ class GameMaster:
             player.add_announcement(announcement)
       else:
         print(f"Warning: Exiled player {exiled_player} not found in players list")
-        announcement = f"No valid player was exiled (target: {exiled_player})."
         # 仍然通知所有玩家
         for name in self.this_round.players:
           player = self.state.players.get(name)
           if player:
             player.add_announcement(announcement)
     else:
-      announcement = "没有玩家被放逐。"
       tqdm.tqdm.write("⏱️ [放逐] 无人被放逐")
       # 通知所有玩家
       for name in self.this_round.players:
@@ -748,16 +916,58 @@ class GameMaster:
 
     tqdm.tqdm.write(announcement)
 
+  async def _dawn(self):
+    """天亮：暂停后发送白天阶段通知"""
     # 状态切换前暂停1秒
     tqdm.tqdm.write("⏱️ [天亮阶段] 切换暂停1秒...")
-    time.sleep(1)
+    await self._pause(1)
 
     # 发送天亮阶段通知
     self._notify_phase_change(phase="day", round_number=self.current_round_num)
     
     self._progress()
 
-  def run_round(self):
+  def _round_stages(self) -> List[Stage]:
+    """本轮各阶段的依赖图
+
+    夜间三个角色的决定互不依赖，同时生成；夜晚结算只需要击杀和保护（按 击杀 -> 保护 的顺序结算）。
+    查验的决定与夜晚结算、天亮并行，结果在夜晚结算之后记入预言家的观察记录，
+    在读取观察记录的白天阶段（以及胜负检查）之前汇合。
+    关闭 night_concurrent 时夜间行动逐个执行。
+    """
+    if settings.game.night_concurrent:
+      night = [
+          Stage("night_delay", self._night_pause),
+          Stage("decide_eliminate", self._decide_eliminate, after=("night_delay",),
+                message="狼人正在选择淘汰目标。"),
+          Stage("decide_protect", self._decide_protect, after=("night_delay",),
+                message="医生正在选择保护目标。"),
+          Stage("decide_unmask", self._decide_unmask, after=("night_delay",),
+                message="预言家正在查验身份。"),
+          Stage("eliminate", self._apply_eliminate, needs=("decide_eliminate",)),
+          Stage("protect", self._apply_protect, needs=("decide_protect",), after=("eliminate",)),
+          Stage("resolve_night", self.resolve_night_phase, after=("protect",), message="夜晚阶段解决"),
+          Stage("unmask", self._apply_unmask, needs=("decide_unmask",), after=("resolve_night",)),
+          Stage("dawn", self._dawn, after=("resolve_night",)),
+      ]
+    else:
+      night = [
+          Stage("eliminate", self.eliminate, message="狼人正在选择淘汰目标。"),
+          Stage("protect", self.protect, after=("eliminate",), message="医生正在选择保护目标。"),
+          Stage("unmask", self.unmask, after=("protect",), message="预言家正在查验身份。"),
+          Stage("resolve_night", self.resolve_night_phase, after=("unmask",), message="夜晚阶段解决"),
+          Stage("dawn", self._dawn, after=("resolve_night",)),
+      ]
+
+    return night + [
+        Stage("check_night", self.check_for_winner, after=("dawn", "unmask"), message="夜晚阶段后检查胜负。"),
+        Stage("day", self.run_day_phase, after=("check_night",), message="玩家开始辩论和投票。"),
+        Stage("exile", self.exile, after=("day",), message="投票后放逐"),
+        Stage("check_day", self.check_for_winner, after=("exile",), message="白天阶段后检查胜负。"),
+        Stage("summaries", self.run_summaries, after=("check_day",), message="玩家开始总结辩论。"),
+    ]
+
+  async def run_round(self):
     """Run a single round of the game."""
     round_timer = Timer(f"第{self.current_round_num}轮")
     tqdm.tqdm.write(f"\n{'='*80}")
@@ -776,7 +986,7 @@ class GameMaster:
     # 状态切换前暂停1秒
     tqdm.tqdm.write("⏱️ [夜晚开始] 切换暂停1秒...")
     pause_timer = Timer("夜晚切换")
-    time.sleep(1)
+    await self._pause(1)
     pause_timer.log("夜晚切换完成")
     
     # 发送夜晚阶段通知
@@ -785,39 +995,39 @@ class GameMaster:
     notify_timer.log("夜晚通知发送")
 
     action_timers = {}
-    for action, message in [
-        (
-            self.eliminate,
-            "狼人正在选择淘汰目标。",
-        ),
-        (self.protect, "医生正在选择保护目标。"),
-        (self.unmask, "预言家正在查验身份。"),
-        (self.resolve_night_phase, "夜晚阶段解决"),
-        (self.check_for_winner, "夜晚阶段后检查胜负。"),
-        (self.run_day_phase, "玩家开始辩论和投票。"),
-        (self.exile, "投票后放逐"),
-        (self.check_for_winner, "白天阶段后检查胜负。"),
-        (self.run_summaries, "玩家开始总结辩论。"),
-    ]:
-      if message:
-        tqdm.tqdm.write(f"\n⏱️ 【{message}】")
-        action_timer = Timer(message)
-      
-      action()
-      
-      if message:
-        action_timers[message] = action_timer.elapsed()
-        action_timer.log(f"{message}完成")
-      
-      # Save progress after each major action in the round
+    stage_timers = {}
+
+    def on_start(stage: Stage):
+      if stage.message:
+        tqdm.tqdm.write(f"\n⏱️ 【{stage.message}】")
+        stage_timers[stage.name] = Timer(stage.message)
+
+    def on_done(stage: Stage, elapsed: float):
+      if stage.message:
+        action_timers[stage.message] = elapsed
+        stage_timers.pop(stage.name).log(f"{stage.message}完成")
+      # Save progress after each stage in the round
       self._progress()
 
-      if self.state.winner:
-        tqdm.tqdm.write(f"\n⏱️ 第{self.current_round_num}轮结束（游戏结束）")
-        self.this_round.success = True
-        round_timer.log(f"第{self.current_round_num}轮总耗时")
-        self._print_round_summary(action_timers, round_timer.elapsed())
-        return
+    scheduler = RoundScheduler(
+        self._round_stages(),
+        on_start=on_start,
+        on_done=on_done,
+        should_halt=lambda: bool(self.state.winner),
+    )
+    try:
+      await scheduler.run()
+    finally:
+      self.timing_stats["action_times"].append(
+          {"round": self.current_round_num, "stages": scheduler.timings}
+      )
+
+    if self.state.winner:
+      tqdm.tqdm.write(f"\n⏱️ 第{self.current_round_num}轮结束（游戏结束）")
+      self.this_round.success = True
+      round_timer.log(f"第{self.current_round_num}轮总耗时")
+      self._print_round_summary(action_timers, round_timer.elapsed())
+      return
 
     tqdm.tqdm.write(f"\n⏱️ 第{self.current_round_num}轮结束")
     self.this_round.success = True
@@ -840,12 +1050,13 @@ class GameMaster:
     tqdm.tqdm.write(f"  {'总耗时':30s}: {total_time:6.2f}秒 (100.0%)")
     tqdm.tqdm.write(f"{'='*80}\n")
 
-  def get_winner(self) -> str:
-    """Determine the winner of the game."""
-    active_wolves = set(self.this_round.players) & set(
+  def get_winner(self, players: Optional[List[str]] = None) -> str:
+    """Determine the winner of the game (players 默认为本轮存活玩家)."""
+    players = self.this_round.players if players is None else players
+    active_wolves = set(players) & set(
         w.name for w in self.state.werewolves
     )
-    active_villagers = set(self.this_round.players) - active_wolves
+    active_villagers = set(players) - active_wolves
     if len(active_wolves) >= len(active_villagers):
       return "Werewolves"
     return "Villagers" if not active_wolves else ""
@@ -868,51 +1079,29 @@ class GameMaster:
     self.should_stop = True
     tqdm.tqdm.write("收到停止请求，将在完成当前轮后优雅退出。")
 
+  def _dispatch_notification(self, notify_fn, description: str, **kwargs):
+    """通过事件桥投递一个 WebSocket 通知（线程安全，不阻塞游戏引擎）"""
+    from src.services.game_manager.event_bridge import event_bridge
+
+    event_bridge.publish(notify_fn, description=description, **kwargs)
+
   def _notify_night_action(self, action_type: str, player_name: str, player_role: str, target_name: Optional[str] = None, details: Optional[Dict[str, Any]] = None):
     """发送夜间行动 WebSocket 通知"""
     try:
       # 延迟导入避免循环依赖
       from src.services.game_manager.session_manager import _notify_night_action
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          # 从 ActionType 导入
-          from src.services.game_manager.sequence_manager import ActionType
-          action_type_enum = ActionType(action_type)
-
-          loop.run_until_complete(
-            _notify_night_action(
-              session_id=self.state.session_id,
-              action_type=action_type_enum,
-              player_name=player_name,
-              player_role=player_role,
-              target_name=target_name,
-              details=details
-            )
-          )
-          print(f"[WebSocket] 夜间行动通知已发送: {action_type} by {player_name}")
-        except Exception as e:
-          print(f"[WebSocket错误] 夜间行动通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      # 在线程池中运行异步函数，并等待完成
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      # 等待最多1秒，确保消息发送完成
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 夜间行动通知发送超时")
-      except Exception as e:
-        print(f"[WebSocket错误] 夜间行动通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
-
+      from src.services.game_manager.sequence_manager import ActionType
+
+      self._dispatch_notification(
+        _notify_night_action,
+        f"夜间行动({action_type} by {player_name})",
+        session_id=self.state.session_id,
+        action_type=ActionType(action_type),
+        player_name=player_name,
+        player_role=player_role,
+        target_name=target_name,
+        details=details
+      )
     except Exception as e:
       print(f"[WebSocket错误] 夜间行动通知失败: {e}")
 
@@ -920,77 +1109,49 @@ class GameMaster:
     """发送辩论发言 WebSocket 通知"""
     try:
       from src.services.game_manager.session_manager import _notify_debate_turn
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          loop.run_until_complete(
-            _notify_debate_turn(
-              session_id=self.state.session_id,
-              player_name=player_name,
-              dialogue=dialogue,
-              player_role=player_role
-            )
-          )
-          print(f"[WebSocket] 辩论发言通知已发送: {player_name}")
-        except Exception as e:
-          print(f"[WebSocket错误] 辩论发言通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 辩论发言通知发送超时")
-      except Exception as e:
-        print(f"[WebSocket错误] 辩论发言通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
 
+      self._dispatch_notification(
+        _notify_debate_turn,
+        f"辩论发言({player_name})",
+        session_id=self.state.session_id,
+        player_name=player_name,
+        dialogue=dialogue,
+        player_role=player_role
+      )
     except Exception as e:
       print(f"[WebSocket错误] 辩论发言通知失败: {e}")
 
+  def _notify_debate_delta(self, player_name: str, delta: str, turn_number: int, round_number: int, attempt: int):
+    """发送发言增量 WebSocket 通知（不占用序列号，最终内容以 debate_turn 为准）"""
+    try:
+      from src.services.game_manager.session_manager import _notify_debate_delta
+
+      self._dispatch_notification(
+        _notify_debate_delta,
+        f"发言增量({player_name})",
+        session_id=self.state.session_id,
+        player_name=player_name,
+        delta=delta,
+        turn_number=turn_number,
+        round_number=round_number,
+        attempt=attempt
+      )
+    except Exception as e:
+      print(f"[WebSocket错误] 发言增量通知失败: {e}")
+
   def _notify_vote_cast(self, voter: str, target: str, voter_role: str):
     """发送投票 WebSocket 通知"""
     try:
       from src.services.game_manager.session_manager import _notify_vote_cast
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          loop.run_until_complete(
-            _notify_vote_cast(
-              session_id=self.state.session_id,
-              voter=voter,
-              target=target,
-              voter_role=voter_role
-            )
-          )
-          print(f"[WebSocket] 投票通知已发送: {voter} -> {target}")
-        except Exception as e:
-          print(f"[WebSocket错误] 投票通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 投票通知发送超时")
-      except Exception as e:
-        print(f"[WebSocket错误] 投票通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
 
+      self._dispatch_notification(
+        _notify_vote_cast,
+        f"投票({voter} -> {target})",
+        session_id=self.state.session_id,
+        voter=voter,
+        target=target,
+        voter_role=voter_role
+      )
     except Exception as e:
       print(f"[WebSocket错误] 投票通知失败: {e}")
 
@@ -998,37 +1159,14 @@ class GameMaster:
     """发送阶段变更 WebSocket 通知"""
     try:
       from src.services.game_manager.session_manager import _notify_phase_change
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          loop.run_until_complete(
-            _notify_phase_change(
-              session_id=self.state.session_id,
-              phase=phase,
-              round_number=round_number
-            )
-          )
-          print(f"[WebSocket] 阶段变更通知已发送: {phase} (第{round_number}轮)")
-        except Exception as e:
-          print(f"[WebSocket错误] 阶段变更通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 阶段变更通知发送超时: {phase}")
-      except Exception as e:
-        print(f"[WebSocket错误] 阶段变更通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
 
+      self._dispatch_notification(
+        _notify_phase_change,
+        f"阶段变更({phase} 第{round_number}轮)",
+        session_id=self.state.session_id,
+        phase=phase,
+        round_number=round_number
+      )
     except Exception as e:
       print(f"[WebSocket错误] 阶段变更通知失败: {e}")
 
@@ -1036,37 +1174,14 @@ class GameMaster:
     """发送玩家放逐 WebSocket 通知"""
     try:
       from src.services.game_manager.session_manager import _notify_player_exile
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          loop.run_until_complete(
-            _notify_player_exile(
-              session_id=self.state.session_id,
-              exiled_player=exiled_player,
-              round_number=round_number
-            )
-          )
-          print(f"[WebSocket] 玩家放逐通知已发送: {exiled_player} (第{round_number}轮)")
-        except Exception as e:
-          print(f"[WebSocket错误] 玩家放逐通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 玩家放逐通知发送超时: {exiled_player}")
-      except Exception as e:
-        print(f"[WebSocket错误] 玩家放逐通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
 
+      self._dispatch_notification(
+        _notify_player_exile,
+        f"玩家放逐({exiled_player} 第{round_number}轮)",
+        session_id=self.state.session_id,
+        exiled_player=exiled_player,
+        round_number=round_number
+      )
     except Exception as e:
       print(f"[WebSocket错误] 玩家放逐通知失败: {e}")
 
@@ -1074,38 +1189,15 @@ class GameMaster:
     """发送玩家总结 WebSocket 通知"""
     try:
       from src.services.game_manager.session_manager import _notify_player_summary
-      import asyncio
-
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          loop.run_until_complete(
-            _notify_player_summary(
-              session_id=self.state.session_id,
-              player_name=player_name,
-              summary=summary,
-              round_number=round_number
-            )
-          )
-          print(f"[WebSocket] 玩家总结通知已发送: {player_name}")
-        except Exception as e:
-          print(f"[WebSocket错误] 玩家总结通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 玩家总结通知发送超时: {player_name}")
-      except Exception as e:
-        print(f"[WebSocket错误] 玩家总结通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
 
+      self._dispatch_notification(
+        _notify_player_summary,
+        f"玩家总结({player_name})",
+        session_id=self.state.session_id,
+        player_name=player_name,
+        summary=summary,
+        round_number=round_number
+      )
     except Exception as e:
       print(f"[WebSocket错误] 玩家总结通知失败: {e}")
 
@@ -1113,55 +1205,41 @@ class GameMaster:
     """发送游戏结束 WebSocket 通知"""
     try:
       from src.services.game_manager.session_manager import _notify_game_complete
-      import asyncio
 
-      def run_async():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-          # 收集所有玩家的信息（包括身份）
-          players_info = {}
-          for player_name, player in self.state.players.items():
-            players_info[player_name] = {
-              "role": player.role,
-              "alive": player_name in self.this_round.players
-            }
-          
-          loop.run_until_complete(
-            _notify_game_complete(
-              session_id=self.state.session_id,
-              winner=winner,
-              winner_name=winner_name,
-              players_info=players_info,
-              round_number=self.current_round_num
-            )
-          )
-          print(f"[WebSocket] 游戏结束通知已发送: {winner_name} 获胜")
-        except Exception as e:
-          print(f"[WebSocket错误] 游戏结束通知发送失败: {e}")
-        finally:
-          loop.close()
-
-      import concurrent.futures
-      executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-      future = executor.submit(run_async)
-      try:
-        future.result(timeout=1.0)
-      except concurrent.futures.TimeoutError:
-        print(f"[WebSocket警告] 游戏结束通知发送超时")
-      except Exception as e:
-        print(f"[WebSocket错误] 游戏结束通知异常: {e}")
-      finally:
-        executor.shutdown(wait=True)  # 等待任务完成后再关闭
+      # 收集所有玩家的信息（包括身份）
+      players_info = {}
+      for player_name, player in self.state.players.items():
+        players_info[player_name] = {
+          "role": player.role,
+          "alive": player_name in self.this_round.players
+        }
 
+      self._dispatch_notification(
+        _notify_game_complete,
+        f"游戏结束({winner_name} 获胜)",
+        session_id=self.state.session_id,
+        winner=winner,
+        winner_name=winner_name,
+        players_info=players_info,
+        round_number=self.current_round_num
+      )
     except Exception as e:
       print(f"[WebSocket错误] 游戏结束通知失败: {e}")
 
-  def run_game(self) -> str:
-    """Run the entire Werewolf game and return the winner."""
+  async def arun_game(self) -> str:
+    """Run the entire Werewolf game on the current event loop and return the winner."""
+    # 本局创建的任务和线程都会继承这个预算
+    budget_token = current_retry_budget.set(self.retry_budget)
+    try:
+      return await self._run_rounds()
+    finally:
+      self._cancel_prefetch()
+      current_retry_budget.reset(budget_token)
+
+  async def _run_rounds(self) -> str:
     while not self.state.winner and not self.should_stop:
       tqdm.tqdm.write(f"STARTING ROUND: {self.current_round_num}")
-      self.run_round()
+      await self.run_round()
 
       # 检查是否在轮次之间收到停止信号
       if self.should_stop:
@@ -1182,3 +1260,10 @@ class GameMaster:
     else:
       tqdm.tqdm.write("游戏结束！")
     return self.state.winner
+
+  def run_game(self) -> str:
+    """Run the entire Werewolf game and return the winner.
+
+    同步入口（命令行使用），在新的事件循环中运行 arun_game。
+    """
+    return asyncio.run(self.arun_game())
@@ -0,0 +1,146 @@
+"""
+回合阶段调度器
+Dependency-graph scheduler for the stages of a round
+
+每个阶段声明依赖的阶段：needs 中阶段的结果按顺序作为参数传入，after 只约束先后顺序。
+依赖都已完成的阶段立即开始（同时就绪的按声明顺序启动），互不依赖的阶段并发运行；
+每个阶段完成后调用 on_done，should_halt 返回 True（如已分出胜负）时不再启动新阶段，
+只等待正在运行的阶段完成。
+"""
+
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class Stage:
+    """回合中的一个阶段
+
+    Args:
+        name: 阶段名称（在同一调度器中唯一）
+        run: 同步函数或协程函数，参数为 needs 中各阶段的结果
+        needs: 依赖的阶段，其结果按顺序传给 run
+        after: 只需在其之后运行、不需要结果的阶段
+        message: 开始时显示的说明（None 表示不显示，也不计入回合时间统计）
+    """
+
+    def __init__(self, name: str, run: Callable[..., Any], needs: Sequence[str] = (),
+                 after: Sequence[str] = (), message: Optional[str] = None):
+        self.name = name
+        self.run = run
+        self.needs = tuple(needs)
+        self.after = tuple(after)
+        self.message = message
+
+    @property
+    def depends_on(self) -> tuple:
+        return self.needs + self.after
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, needs={self.needs}, after={self.after})"
+
+
+class RoundScheduler:
+    """按依赖关系运行一组阶段
+
+    Args:
+        stages: 阶段列表（声明顺序决定同时就绪时的启动顺序）
+        on_start: 阶段开始时调用 on_start(stage)
+        on_done: 阶段完成时调用 on_done(stage, elapsed)
+        should_halt: 每个阶段完成后检查，返回 True 时不再启动新阶段（正在运行的阶段照常完成）
+
+    Raises:
+        ValueError: 阶段名称重复、依赖不存在或存在循环依赖
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        on_start: Optional[Callable[[Stage], None]] = None,
+        on_done: Optional[Callable[[Stage, float], None]] = None,
+        should_halt: Optional[Callable[[], bool]] = None,
+    ):
+        self.stages: List[Stage] = list(stages)
+        self.on_start = on_start
+        self.on_done = on_done
+        self.should_halt = should_halt
+        self.results: Dict[str, Any] = {}
+        # 每个阶段相对调度开始的开始时间和耗时（秒）
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.halted = False
+        self._validate()
+
+    def _validate(self) -> None:
+        names = [stage.name for stage in self.stages]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate stage names: {', '.join(sorted(duplicates))}")
+        known = set(names)
+        for stage in self.stages:
+            missing = [dep for dep in stage.depends_on if dep not in known]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {', '.join(missing)}")
+
+        # 拓扑排序检查循环依赖
+        done: set = set()
+        pending = list(self.stages)
+        while pending:
+            ready = [stage for stage in pending if all(dep in done for dep in stage.depends_on)]
+            if not ready:
+                cycle = ", ".join(stage.name for stage in pending)
+                raise ValueError(f"Cyclic stage dependencies among: {cycle}")
+            done.update(stage.name for stage in ready)
+            pending = [stage for stage in pending if stage.name not in done]
+
+    async def _run_stage(self, stage: Stage) -> Any:
+        result = stage.run(*(self.results[name] for name in stage.needs))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """运行所有阶段，返回 {阶段名称: 结果}（提前停止时只包含已运行的阶段）
+
+        Raises:
+            阶段抛出的异常（其余正在运行的阶段会被取消）
+        """
+        started_at = time.monotonic()
+        waiting = list(self.stages)
+        running: Dict[asyncio.Future, Stage] = {}
+        starts: Dict[str, float] = {}
+
+        try:
+            while waiting or running:
+                ready = [stage for stage in waiting
+                         if all(dep in self.results for dep in stage.depends_on)]
+                for stage in ready:
+                    waiting.remove(stage)
+                    if self.on_start:
+                        self.on_start(stage)
+                    starts[stage.name] = time.monotonic()
+                    running[asyncio.ensure_future(self._run_stage(stage))] = stage
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                # 同时完成的阶段按声明顺序处理
+                for task in sorted(done, key=lambda task: self.stages.index(running[task])):
+                    stage = running.pop(task)
+                    self.results[stage.name] = task.result()
+                    finished = time.monotonic()
+                    elapsed = finished - starts[stage.name]
+                    self.timings[stage.name] = {
+                        "start": round(starts[stage.name] - started_at, 3),
+                        "elapsed": round(elapsed, 3),
+                    }
+                    if self.on_done:
+                        self.on_done(stage, elapsed)
+                    if waiting and self.should_halt and self.should_halt():
+                        self.halted = True
+                        waiting.clear()
+        finally:
+            # 出错或被取消时取消其余阶段
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        return self.results
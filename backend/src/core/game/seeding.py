@@ -0,0 +1,61 @@
+"""
+对局随机数源
+Seeded random streams for reproducible games
+
+配置 GAME__SEED 后，角色分配、发言顺序、选项顺序和默认行动都从按用途划分的独立随机流中取数：
+游戏主持人的每种用途一个流，每个玩家一个流（按 种子:名称 初始化）。
+同时生成的行动各自使用自己的流，结果不受LLM调用完成先后的影响，
+因此相同种子 + replay 缓存可以重跑出完全相同的提示词。
+
+未配置种子时直接使用全局 random 模块（行为与之前相同）。
+"""
+
+import random
+import weakref
+from types import ModuleType
+from typing import Dict, Optional, Union
+
+from src.config.settings import settings
+
+# random.Random 实例或全局 random 模块（两者的 shuffle / choice 用法相同）
+RandomSource = Union[random.Random, ModuleType]
+
+
+class GameRandom:
+    """一局游戏的随机数源，按用途（key）划分独立的流
+
+    Args:
+        seed: 随机种子，None 表示使用全局 random 模块
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed
+        self._streams: Dict[str, random.Random] = {}
+
+    @classmethod
+    def from_settings(cls) -> "GameRandom":
+        return cls(settings.game.seed)
+
+    def stream(self, key: str) -> RandomSource:
+        """获取某个用途的随机流"""
+        if self.seed is None:
+            return random
+        rng = self._streams.get(key)
+        if rng is None:
+            rng = self._streams[key] = random.Random(f"{self.seed}:{key}")
+        return rng
+
+
+# 每个玩家一个流；不作为 Player 的属性，避免进入序列化结果
+_player_streams: "weakref.WeakKeyDictionary[object, random.Random]" = weakref.WeakKeyDictionary()
+
+
+def player_random(player) -> RandomSource:
+    """获取玩家的随机流（未配置种子时为全局 random 模块）"""
+    seed = settings.game.seed
+    if seed is None:
+        return random
+    rng = _player_streams.get(player)
+    if rng is None:
+        rng = _player_streams[player] = random.Random(f"{seed}:player:{player.name}")
+    return rng
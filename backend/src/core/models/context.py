@@ -0,0 +1,221 @@
+"""
+玩家提示词上下文窗口
+Token-budgeted context window for player observations and debate history
+
+观察记录和辩论历史随回合数线性增长，长对局的每次行动都会重新发送全部历史。
+ContextWindow 按 token 预算裁剪送入提示词的部分：
+
+1. 未超出预算时与完整历史完全相同
+2. 超出时，最近 recent_rounds 轮之前的回合从最早开始压缩为一行摘要
+   （保留主持人公告和私有信息，截断自己的总结）
+3. 仍超出时，省略最早的回合
+4. 最后截断本轮较早的辩论发言（最近几条保持原文）
+
+每轮的原文和摘要只在该轮有新观察时重新计算，观察记录按追加顺序增量解析。
+"""
+
+import re
+import weakref
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.utils.helpers import estimate_tokens
+
+_ROUND_PATTERN = re.compile(r'第(\d+)轮')
+SUMMARY_PREFIX = "总结："
+ANNOUNCEMENT_PREFIX = "主持人公告："
+
+
+def parse_observation(obs: str) -> Optional[Tuple[int, str]]:
+    """解析一条观察记录，返回 (回合, 内容)；格式无效时打印错误并返回 None"""
+    try:
+        # 安全地解析观察记录
+        parts = obs.split("：", 1)  # 使用中文冒号分割
+        if len(parts) < 2:
+            print(f"[观察记录错误] 无效的观察记录格式: {obs}")
+            return None
+
+        prefix = parts[0]
+
+        # 支持多种前缀格式：
+        # "第0轮"
+        # "第0轮主持人公告"
+        # "Round 0"
+        round_num = None
+
+        # 尝试从 "第X轮" 格式中提取数字
+        if "第" in prefix and "轮" in prefix:
+            match = _ROUND_PATTERN.search(prefix)
+            if match:
+                round_num = int(match.group(1))
+
+        # 回退到空格分割的方式
+        if round_num is None:
+            prefix_parts = prefix.split()
+            if len(prefix_parts) >= 1:
+                # 检查第一个部分是否包含轮次信息
+                first_part = prefix_parts[0]
+                if "第" in first_part and "轮" in first_part:
+                    match = _ROUND_PATTERN.search(first_part)
+                    if match:
+                        round_num = int(match.group(1))
+                elif len(prefix_parts) >= 2:
+                    # 尝试从第二部分获取数字
+                    try:
+                        round_num = int(prefix_parts[1])
+                    except (ValueError, IndexError):
+                        pass
+
+        if round_num is None:
+            print(f"[观察记录错误] 无法解析回合数字，前缀: '{prefix}'")
+            return None
+
+        return round_num, parts[1].strip().replace('"', "")
+
+    except Exception as e:
+        print(f"[观察记录错误] 处理观察记录时发生错误 '{obs}': {e}")
+        return None
+
+
+def format_round(round_num: int, round_obs: Sequence[str], condensed: bool = False) -> str:
+    """格式化一轮的观察记录"""
+    header = f"第{round_num}轮（摘要）：\n" if condensed else f"第{round_num}轮：\n"
+    return header + "\n".join(f"   - {obs}" for obs in round_obs)
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    return text if len(text) <= max_chars else text[:max_chars] + "…"
+
+
+class _RoundView:
+    """一轮观察记录的原文和摘要（按观察条数缓存）"""
+
+    __slots__ = ("count", "verbatim", "verbatim_tokens", "condensed", "condensed_tokens")
+
+    def __init__(self, round_num: int, round_obs: List[str], summary_chars: int):
+        self.count = len(round_obs)
+        self.verbatim = format_round(round_num, round_obs)
+        self.verbatim_tokens = estimate_tokens(self.verbatim)
+        condensed = [
+            SUMMARY_PREFIX + _truncate(obs[len(SUMMARY_PREFIX):], summary_chars)
+            if obs.startswith(SUMMARY_PREFIX) else obs
+            for obs in round_obs
+        ]
+        self.condensed = format_round(round_num, condensed, condensed=True)
+        self.condensed_tokens = estimate_tokens(self.condensed)
+
+
+class ContextWindow:
+    """一个玩家的观察记录窗口
+
+    Args:
+        recent_rounds: 始终保持原文的最近回合数
+        summary_chars: 摘要中每条总结、被截断的辩论发言保留的字数
+        recent_turns: 截断辩论时保持原文的最近发言数
+    """
+
+    def __init__(self, recent_rounds: int = 2, summary_chars: int = 80, recent_turns: int = 3):
+        self.recent_rounds = recent_rounds
+        self.summary_chars = summary_chars
+        self.recent_turns = recent_turns
+        self._seen = 0
+        # 已解析列表的标识（id 和第一条记录），列表被替换时重新解析
+        self._source: Optional[Tuple[int, Optional[str]]] = None
+        self._rounds: Dict[int, List[str]] = {}
+        self._views: Dict[int, _RoundView] = {}
+
+    def _ingest(self, observations: Sequence[str]) -> None:
+        """增量解析新追加的观察记录；列表被替换、缩短或开头被修改时重新解析"""
+        source = (id(observations), observations[0] if observations else None)
+        if source != self._source or len(observations) < self._seen:
+            self._source = source
+            self._seen = 0
+            self._rounds.clear()
+            self._views.clear()
+        for obs in observations[self._seen:]:
+            parsed = parse_observation(obs)
+            if parsed is not None:
+                round_num, text = parsed
+                self._rounds.setdefault(round_num, []).append(text)
+        self._seen = len(observations)
+
+    def _view(self, round_num: int) -> _RoundView:
+        round_obs = self._rounds[round_num]
+        view = self._views.get(round_num)
+        if view is None or view.count != len(round_obs):
+            view = self._views[round_num] = _RoundView(round_num, round_obs, self.summary_chars)
+        return view
+
+    def observations(self, observations: Sequence[str], budget: Optional[int] = None) -> List[str]:
+        """
+        按预算格式化观察记录
+
+        Args:
+            observations: 玩家的全部观察记录（"第X轮：..."）
+            budget: token 预算，None 或 0 表示不限制
+
+        Returns:
+            按回合格式化的观察记录；不超出预算时与 group_and_format_observations 相同
+        """
+        self._ingest(observations)
+        rounds = sorted(self._rounds)
+        views = [self._view(round_num) for round_num in rounds]
+        texts = [view.verbatim for view in views]
+        if not budget:
+            return texts
+
+        tokens = [view.verbatim_tokens for view in views]
+        total = sum(tokens)
+        older = max(0, len(views) - self.recent_rounds)
+        # 从最早的回合开始压缩为摘要
+        for i in range(older):
+            if total <= budget:
+                return texts
+            total += views[i].condensed_tokens - tokens[i]
+            texts[i], tokens[i] = views[i].condensed, views[i].condensed_tokens
+
+        # 从最早的回合开始省略（最近的回合始终保留）
+        dropped = 0
+        while total > budget and dropped < older:
+            total -= tokens[dropped]
+            dropped += 1
+        if dropped:
+            note = f"（第{rounds[0]}-{rounds[dropped - 1]}轮的记录已省略）" if dropped > 1 \
+                else f"（第{rounds[0]}轮的记录已省略）"
+            return [note] + texts[dropped:]
+        return texts
+
+    def debate(self, debate: List[str], budget: Optional[int] = None) -> List[str]:
+        """按预算截断较早的辩论发言，最近 recent_turns 条保持原文"""
+        if not budget or sum(estimate_tokens(turn) for turn in debate) <= budget:
+            return debate
+        cut = max(0, len(debate) - self.recent_turns)
+        return [_truncate(turn, self.summary_chars) for turn in debate[:cut]] + debate[cut:]
+
+    def build(self, observations: Sequence[str], debate: List[str],
+              budget: Optional[int] = None) -> Tuple[List[str], List[str]]:
+        """
+        在同一预算内裁剪观察记录和本轮辩论
+
+        本轮辩论优先：先截断辩论使其不超过预算的一半（仅在总量超出时），
+        剩余预算给观察记录。
+        """
+        if not budget:
+            return self.observations(observations), debate
+        debate_tokens = sum(estimate_tokens(turn) for turn in debate)
+        observation_budget = budget - debate_tokens
+        if observation_budget < budget // 2:
+            debate = self.debate(debate, budget // 2)
+            observation_budget = budget - sum(estimate_tokens(turn) for turn in debate)
+        return self.observations(observations, max(1, observation_budget)), debate
+
+
+# 每个玩家一个窗口；不作为 Player 的属性，避免进入序列化结果
+_windows: "weakref.WeakKeyDictionary[object, ContextWindow]" = weakref.WeakKeyDictionary()
+
+
+def context_window(player: object, recent_rounds: int = 2) -> ContextWindow:
+    """获取玩家的上下文窗口"""
+    window = _windows.get(player)
+    if window is None or window.recent_rounds != recent_rounds:
+        window = _windows[player] = ContextWindow(recent_rounds=recent_rounds)
+    return window
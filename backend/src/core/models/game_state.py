@@ -23,6 +23,11 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 
 from src.utils.helpers import Deserializable
 
+try:  # 可选依赖：安装 orjson 后使用更快的JSON编码
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 
 # JSON serializer that works for nested classes
 class JsonEncoder(json.JSONEncoder):
@@ -34,9 +39,53 @@ class JsonEncoder(json.JSONEncoder):
         return o.__dict__
 
 
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
 def to_dict(o: Any) -> Union[Dict[str, Any], List[Any], Any]:
-    """将对象转换为字典（用于JSON序列化）"""
-    return json.loads(JsonEncoder().encode(o))
+    """将对象转换为字典（用于JSON序列化）
+
+    直接递归构造结果，不再经过“编码为JSON字符串再解析”的往返。
+    模型类优先使用各自显式的 to_dict；其余对象按 JsonEncoder 的规则处理
+    （枚举取值、集合/元组转列表、普通对象取 __dict__），输出与之前一致。
+    """
+    if isinstance(o, _PRIMITIVES):
+        return o
+    if isinstance(o, (list, tuple)):
+        return [to_dict(item) for item in o]
+    if isinstance(o, dict):
+        return {_json_key(key): to_dict(value) for key, value in o.items()}
+    if isinstance(o, enum.Enum):
+        return to_dict(o.value)
+    if isinstance(o, set):
+        return [to_dict(item) for item in o]
+    method = getattr(o, "to_dict", None)
+    if method is not None:
+        return method()
+    return {key: to_dict(value) for key, value in o.__dict__.items()}
+
+
+def _json_key(key: Any) -> str:
+    """与 json 模块一致的字典键转换"""
+    if isinstance(key, str):
+        return key
+    if key is None:
+        return "null"
+    if isinstance(key, bool):
+        return "true" if key else "false"
+    return str(key)
+
+
+def to_json(o: Any) -> str:
+    """将对象序列化为JSON字符串（已安装 orjson 时使用快速路径）
+
+    普通的 dict/list 直接编码，遇到模型对象时才回调 to_dict。
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            o, default=to_dict, option=orjson.OPT_NON_STR_KEYS
+        ).decode("utf-8")
+    return json.dumps(o, default=to_dict)
 
 
 class GameView:
@@ -79,7 +128,12 @@ class GameView:
         print(f"[调试] 成功从current_players中移除玩家: {player_to_remove}, 剩余玩家: {self.current_players}")
 
     def to_dict(self) -> Any:
-        return to_dict(self)
+        return {
+            "round_number": self.round_number,
+            "current_players": list(self.current_players),
+            "debate": [list(entry) for entry in self.debate],
+            "other_wolf": self.other_wolf,
+        }
 
     @classmethod
     def from_json(cls, data: Dict[Any, Any]):
@@ -113,7 +167,17 @@ class Round(Deserializable):
         self.success: bool = False
 
     def to_dict(self):
-        return to_dict(self)
+        return {
+            "players": list(self.players),
+            "eliminated": self.eliminated,
+            "unmasked": self.unmasked,
+            "protected": self.protected,
+            "exiled": self.exiled,
+            "debate": [list(entry) for entry in self.debate],
+            "votes": [dict(votes) for votes in self.votes],
+            "bids": [dict(bids) for bids in self.bids],
+            "success": self.success,
+        }
 
     @classmethod
     def from_json(cls, data: Dict[Any, Any]):
@@ -169,23 +233,31 @@ class State(Deserializable):
         self.winner: str = ""
 
     def to_dict(self):
-        # 先序列化整个对象
-        data = to_dict(self)
-        
         # 获取当前存活玩家列表
         # 如果有回合记录，使用最后一轮的玩家列表；否则使用所有玩家
         if self.rounds and len(self.rounds) > 0:
-            current_players = self.rounds[-1].players
+            current_players = set(self.rounds[-1].players)
         else:
-            current_players = list(self.players.keys())
-        
+            current_players = set(self.players.keys())
+
         # 为每个玩家动态添加 alive 字段
-        if 'players' in data and isinstance(data['players'], dict):
-            for player_name, player_data in data['players'].items():
-                if isinstance(player_data, dict):
-                    player_data['alive'] = player_name in current_players
-        
-        return data
+        players = {}
+        for player_name, player in self.players.items():
+            player_data = player.to_dict()
+            player_data['alive'] = player_name in current_players
+            players[player_name] = player_data
+
+        return {
+            "session_id": self.session_id,
+            "seer": self.seer.to_dict(),
+            "doctor": self.doctor.to_dict(),
+            "villagers": [v.to_dict() for v in self.villagers],
+            "werewolves": [w.to_dict() for w in self.werewolves],
+            "players": players,
+            "rounds": [r.to_dict() for r in self.rounds],
+            "error_message": self.error_message,
+            "winner": self.winner,
+        }
 
     @classmethod
     def from_json(cls, data: Dict[Any, Any]):
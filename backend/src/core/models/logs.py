@@ -25,10 +25,61 @@ from src.utils.helpers import Deserializable
 
 @dataclasses.dataclass
 class LmLog(Deserializable):
-    """LLM调用日志"""
+    """LLM调用日志
+
+    provider / model 为实际返回结果的提供商和模型（对冲或故障转移时可能不是玩家的模型），
+    hedged 表示这次调用发出过对冲请求。
+
+    prompt_tokens / completion_tokens 为这次生成所有尝试（含重试）的 token 总数，
+    提供商未返回 usage 时按文本长度估算（tokens_estimated）；ttfb 为最后一次调用的首字节时间，
+    latency 为整个生成（含重试和退避等待）的耗时，attempts 为调用次数。
+    """
     prompt: str
     raw_resp: str
     result: Any
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    hedged: bool = False
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    tokens_estimated: bool = False
+    ttfb: Optional[float] = None
+    latency: Optional[float] = None
+    attempts: Optional[int] = None
+
+    def to_dict(self):
+        from .game_state import to_dict
+        return {
+            "prompt": self.prompt,
+            "raw_resp": self.raw_resp,
+            "result": to_dict(self.result),
+            "provider": self.provider,
+            "model": self.model,
+            "hedged": self.hedged,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "ttfb": self.ttfb,
+            "latency": self.latency,
+            "attempts": self.attempts,
+        }
+
+    def record_call(self, call_meta: Dict[str, Any]) -> None:
+        """记录 LLMClient 返回的调用信息"""
+        self.provider = call_meta.get("provider")
+        self.model = call_meta.get("model")
+        self.hedged = bool(call_meta.get("hedged", False))
+
+    def record_usage(self, calls: List[Dict[str, Any]], attempts: int, latency: float) -> None:
+        """汇总一次生成所有调用（call_meta 列表）的 token 数和耗时"""
+        counted = [call for call in calls if call.get("prompt_tokens") is not None]
+        if counted:
+            self.prompt_tokens = sum(call["prompt_tokens"] for call in counted)
+            self.completion_tokens = sum(call.get("completion_tokens") or 0 for call in counted)
+            self.tokens_estimated = any(call.get("tokens_estimated") for call in counted)
+            self.ttfb = counted[-1].get("ttfb")
+        self.attempts = attempts
+        self.latency = round(latency, 3)
 
     @classmethod
     def from_json(cls, data: Dict[Any, Any]):
@@ -45,7 +96,11 @@ class VoteLog(Deserializable):
 
     def to_dict(self):
         from .game_state import to_dict
-        return to_dict(self)
+        return {
+            "player": self.player,
+            "voted_for": self.voted_for,
+            "log": to_dict(self.log),
+        }
 
     @classmethod
     def from_json(cls, data: Dict[Any, Any]):
@@ -79,7 +134,19 @@ class RoundLog(Deserializable):
 
     def to_dict(self):
         from .game_state import to_dict
-        return to_dict(self)
+
+        def entries(items):
+            return [[name, to_dict(log)] for name, log in items]
+
+        return {
+            "eliminate": to_dict(self.eliminate),
+            "investigate": to_dict(self.investigate),
+            "protect": to_dict(self.protect),
+            "bid": [entries(bids) for bids in self.bid],
+            "debate": entries(self.debate),
+            "votes": [[to_dict(vote) for vote in votes] for votes in self.votes],
+            "summaries": entries(self.summaries),
+        }
 
     @classmethod
     def from_json(cls, data: Dict[Any, Any]):
@@ -17,11 +17,12 @@
 Player Data Models
 """
 
-import random
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from src.config import MAX_DEBATE_TURNS, NUM_PLAYERS
+from src.config import MAX_DEBATE_TURNS, NUM_PLAYERS, settings
 from src.core.game.prompts import ACTION_PROMPTS_AND_SCHEMAS
+from src.core.game.seeding import player_random
+from src.core.models.context import context_window, format_round, parse_observation
 from src.core.models.game_state import GameView, to_dict
 from src.core.models.logs import LmLog
 from src.utils.helpers import Deserializable
@@ -32,6 +33,9 @@ WEREWOLF = "Werewolf"
 SEER = "Seer"
 DOCTOR = "Doctor"
 
+# 竞价选项
+BID_OPTIONS = ["0", "1", "2", "3", "4"]
+
 
 def group_and_format_observations(observations):
     """按回合分组并格式化观察记录
@@ -44,64 +48,12 @@ def group_and_format_observations(observations):
     """
     grouped = {}
     for obs in observations:
-        try:
-            # 安全地解析观察记录
-            parts = obs.split("：", 1)  # 使用中文冒号分割
-            if len(parts) < 2:
-                print(f"[观察记录错误] 无效的观察记录格式: {obs}")
-                continue
-
-            prefix = parts[0]
-
-            # 支持多种前缀格式：
-            # "第0轮"
-            # "第0轮主持人公告"
-            # "Round 0"
-            round_num = None
-
-            # 尝试从 "第X轮" 格式中提取数字
-            if "第" in prefix and "轮" in prefix:
-                import re
-                match = re.search(r'第(\d+)轮', prefix)
-                if match:
-                    round_num = int(match.group(1))
-
-            # 回退到空格分割的方式
-            if round_num is None:
-                prefix_parts = prefix.split()
-                if len(prefix_parts) >= 1:
-                    # 检查第一个部分是否包含轮次信息
-                    first_part = prefix_parts[0]
-                    if "第" in first_part and "轮" in first_part:
-                        import re
-                        match = re.search(r'第(\d+)轮', first_part)
-                        if match:
-                            round_num = int(match.group(1))
-                    elif len(prefix_parts) >= 2:
-                        # 尝试从第二部分获取数字
-                        try:
-                            round_num = int(prefix_parts[1])
-                        except (ValueError, IndexError):
-                            pass
-
-            if round_num is None:
-                print(f"[观察记录错误] 无法解析回合数字，前缀: '{prefix}'")
-                continue
-
-            obs_text = parts[1].strip().replace('"', "")
+        parsed = parse_observation(obs)
+        if parsed is not None:
+            round_num, obs_text = parsed
             grouped.setdefault(round_num, []).append(obs_text)
 
-        except Exception as e:
-            print(f"[观察记录错误] 处理观察记录时发生错误 '{obs}': {e}")
-            continue
-
-    formatted_obs = []
-    for round_num, round_obs in sorted(grouped.items()):
-        formatted_round = f"第{round_num}轮：\n"
-        formatted_round += "\n".join(f"   - {obs}" for obs in round_obs)
-        formatted_obs.append(formatted_round)
-
-    return formatted_obs
+    return [format_round(round_num, round_obs) for round_num, round_obs in sorted(grouped.items())]
 
 
 class Player(Deserializable):
@@ -143,8 +95,12 @@ class Player(Deserializable):
         """添加游戏公告到观察记录"""
         self._add_observation(f"主持人公告：{announcement}")
 
-    def _get_game_state(self) -> Dict[str, Any]:
-        """获取玩家视角的游戏状态"""
+    def _get_game_state(self, action: Optional[str] = None) -> Dict[str, Any]:
+        """获取玩家视角的游戏状态
+
+        Args:
+            action: 行动类型，用于选择上下文预算（见 GameSettings.context_budgets）
+        """
         if not self.gamestate:
             raise ValueError(
                 "GameView not initialized. Call initialize_game_view() first."
@@ -154,7 +110,7 @@ class Player(Deserializable):
             f"{player} (You)" if player == self.name else player
             for player in self.gamestate.current_players
         ]
-        random.shuffle(remaining_players)
+        player_random(self).shuffle(remaining_players)
         formatted_debate = [
             f"{author} (You): {dialogue}"
             if author == self.name
@@ -162,7 +118,12 @@ class Player(Deserializable):
             for author, dialogue in self.gamestate.debate
         ]
 
-        formatted_observations = group_and_format_observations(self.observations)
+        # 长对局按token预算裁剪观察记录和辩论历史
+        budget = settings.game.context_budgets.get(action, settings.game.context_budget)
+        window = context_window(self, settings.game.context_recent_rounds)
+        formatted_observations, formatted_debate = window.build(
+            self.observations, formatted_debate, budget
+        )
 
         return {
             "name": self.name,
@@ -172,22 +133,19 @@ class Player(Deserializable):
             "remaining_players": ", ".join(remaining_players),
             "debate": formatted_debate,
             "bidding_rationale": self.bidding_rationale,
-            "debate_turns_left": MAX_DEBATE_TURNS - len(formatted_debate),
+            "debate_turns_left": MAX_DEBATE_TURNS - len(self.gamestate.debate),
             "personality": self.personality,
             "num_players": NUM_PLAYERS,
             "num_villagers": NUM_PLAYERS - 4,
         }
 
-    def _generate_action(
+    def _prepare_action(
         self,
         action: str,
         options: Optional[List[str]] = None,
-    ) -> Tuple[Optional[Any], LmLog]:
-        """生成玩家行动（需要LLM客户端，将在后续重构中实现依赖注入）"""
-        # 这里暂时保留原有逻辑，后续会通过依赖注入重构
-        from src.services.llm.generator import generate
-
-        game_state = self._get_game_state()
+    ) -> Dict[str, Any]:
+        """构造一次行动的生成参数（同步和异步路径共用）"""
+        game_state = self._get_game_state(action=action)
         if options:
             game_state["options"] = (", ").join(options)
         prompt_template, response_schema = ACTION_PROMPTS_AND_SCHEMAS[action]
@@ -201,18 +159,40 @@ class Player(Deserializable):
         # Set temperature based on allowed_values
         temperature = 0.5 if allowed_values else 1.0
 
-        return generate(
-            prompt_template,
-            response_schema,
-            game_state,
-            model=self.model,
-            temperature=temperature,
-            allowed_values=allowed_values,
-            result_key=result_key,
-        )
+        return {
+            "prompt_template": prompt_template,
+            "response_schema": response_schema,
+            "worldstate": game_state,
+            "model": self.model,
+            "temperature": temperature,
+            "allowed_values": allowed_values,
+            "result_key": result_key,
+        }
 
-    def vote(self) -> Tuple[Optional[str], LmLog]:
-        """投票"""
+    def _generate_action(
+        self,
+        action: str,
+        options: Optional[List[str]] = None,
+    ) -> Tuple[Optional[Any], LmLog]:
+        """生成玩家行动（需要LLM客户端，将在后续重构中实现依赖注入）"""
+        # 这里暂时保留原有逻辑，后续会通过依赖注入重构
+        from src.services.llm.generator import generate
+
+        return generate(**self._prepare_action(action, options))
+
+    async def _agenerate_action(
+        self,
+        action: str,
+        options: Optional[List[str]] = None,
+        **kwargs,
+    ) -> Tuple[Optional[Any], LmLog]:
+        """异步生成玩家行动（kwargs 透传给 agenerate，如流式回调）"""
+        from src.services.llm.generator import agenerate
+
+        return await agenerate(**self._prepare_action(action, options), **kwargs)
+
+    def _vote_options(self) -> List[str]:
+        """可投票的玩家列表"""
         if not self.gamestate:
             raise ValueError(
                 "GameView not initialized. Call initialize_game_view() first."
@@ -222,17 +202,31 @@ class Player(Deserializable):
             for player in self.gamestate.current_players
             if player != self.name
         ]
-        random.shuffle(options)
-        vote, log = self._generate_action("vote", options)
+        player_random(self).shuffle(options)
+        return options
+
+    def _record_vote(self, vote: Optional[str], log: LmLog) -> Tuple[Optional[str], LmLog]:
+        """记录投票结果"""
         if vote is not None and len(self.gamestate.debate) == MAX_DEBATE_TURNS:
             self._add_observation(
                 f"辩论结束后，我投票淘汰了{vote}。"
             )
         return vote, log
 
-    def bid(self) -> Tuple[Optional[int], LmLog]:
-        """竞价发言"""
-        bid, log = self._generate_action("bid", options=["0", "1", "2", "3", "4"])
+    def vote(self) -> Tuple[Optional[str], LmLog]:
+        """投票"""
+        options = self._vote_options()
+        vote, log = self._generate_action("vote", options)
+        return self._record_vote(vote, log)
+
+    async def avote(self) -> Tuple[Optional[str], LmLog]:
+        """投票（异步）"""
+        options = self._vote_options()
+        vote, log = await self._agenerate_action("vote", options)
+        return self._record_vote(vote, log)
+
+    def _record_bid(self, bid: Optional[Any], log: LmLog) -> Tuple[int, LmLog]:
+        """校验竞价并记录竞价理由"""
         if bid is not None:
             # 验证 bid 是数字字符串
             try:
@@ -252,18 +246,46 @@ class Player(Deserializable):
             self.bidding_rationale = "AI调用失败，使用默认竞价"
         return bid, log
 
-    def debate(self) -> Tuple[Optional[str], LmLog]:
-        """参与辩论"""
-        result, log = self._generate_action("debate", [])
+    def bid(self) -> Tuple[Optional[int], LmLog]:
+        """竞价发言"""
+        bid, log = self._generate_action("bid", options=BID_OPTIONS)
+        return self._record_bid(bid, log)
+
+    async def abid(self) -> Tuple[Optional[int], LmLog]:
+        """竞价发言（异步）"""
+        bid, log = await self._agenerate_action("bid", options=BID_OPTIONS)
+        return self._record_bid(bid, log)
+
+    @staticmethod
+    def _extract_say(result: Any, log: LmLog) -> Tuple[Optional[str], LmLog]:
+        """从辩论结果中提取发言"""
         if result is not None and isinstance(result, dict):
             say = result.get("say", None)
             return say, log
         # 如果result为None或不是字典，返回None
         return None, log
 
-    def summarize(self) -> Tuple[Optional[str], LmLog]:
-        """总结游戏状态"""
-        result, log = self._generate_action("summarize", [])
+    def debate(self) -> Tuple[Optional[str], LmLog]:
+        """参与辩论"""
+        result, log = self._generate_action("debate", [])
+        return self._extract_say(result, log)
+
+    async def adebate(
+        self, on_delta: Optional[Callable[[str, int], None]] = None
+    ) -> Tuple[Optional[str], LmLog]:
+        """参与辩论（异步）
+
+        Args:
+            on_delta: 提供时流式生成，发言（"say" 字段）每解码出一段就调用 on_delta(增量, 第几次尝试)
+        """
+        if on_delta is None:
+            result, log = await self._agenerate_action("debate", [])
+        else:
+            result, log = await self._agenerate_action("debate", [], on_delta=on_delta, stream_key="say")
+        return self._extract_say(result, log)
+
+    def _record_summary(self, result: Any, log: LmLog) -> Tuple[Optional[str], LmLog]:
+        """提取总结并加入观察记录"""
         if result is not None and isinstance(result, dict):
             summary = result.get("summary", None)
             if summary is not None:
@@ -273,8 +295,28 @@ class Player(Deserializable):
         # 如果result为None或不是字典，返回None
         return None, log
 
+    def summarize(self) -> Tuple[Optional[str], LmLog]:
+        """总结游戏状态"""
+        result, log = self._generate_action("summarize", [])
+        return self._record_summary(result, log)
+
+    async def asummarize(self) -> Tuple[Optional[str], LmLog]:
+        """总结游戏状态（异步）"""
+        result, log = await self._agenerate_action("summarize", [])
+        return self._record_summary(result, log)
+
     def to_dict(self) -> Any:
-        return to_dict(self)
+        gamestate = self.gamestate
+        return {
+            "name": self.name,
+            "role": self.role,
+            "personality": self.personality,
+            "model": self.model,
+            "observations": list(self.observations),
+            "bidding_rationale": self.bidding_rationale,
+            # 从日志加载的玩家 gamestate 可能是普通字典
+            "gamestate": gamestate.to_dict() if isinstance(gamestate, GameView) else to_dict(gamestate),
+        }
 
     @classmethod
     def from_json(cls, data: Dict[Any, Any]):
@@ -331,8 +373,8 @@ class Werewolf(Player):
         state["werewolf_context"] = self._get_werewolf_context()
         return state
 
-    def eliminate(self) -> Tuple[Optional[str], LmLog]:
-        """选择淘汰目标"""
+    def _eliminate_options(self) -> List[str]:
+        """可淘汰的目标列表"""
         if not self.gamestate:
             raise ValueError(
                 "GameView not initialized. Call initialize_game_view() first."
@@ -343,43 +385,65 @@ class Werewolf(Player):
             for player in self.gamestate.current_players
             if player != self.name and player != self.gamestate.other_wolf
         ]
-        random.shuffle(options)
+        player_random(self).shuffle(options)
+        return options
+
+    def _validate_elimination(
+        self, eliminate: Optional[str], log: LmLog, options: List[str]
+    ) -> Tuple[Optional[str], LmLog]:
+        """验证淘汰目标，无效时选择默认目标"""
+        if eliminate is None:
+            print(f"Warning: {self.name} (Werewolf) did not return a valid eliminate target, using default")
+            # 选择一个默认目标
+            default_target = options[0] if options else None
+            return default_target, LmLog(
+                prompt=f"Default target selected due to empty response",
+                raw_resp="Empty response",
+                result={"remove": default_target, "reasoning": "Default selection due to AI failure"}
+            )
+
+        # 验证返回的目标是否在有效选项中
+        if eliminate not in options:
+            print(f"Warning: {self.name} (Werewolf) chose invalid target '{eliminate}', using default")
+            default_target = options[0] if options else None
+            return default_target, LmLog(
+                prompt=f"Invalid target '{eliminate}', using default {default_target}",
+                raw_resp=f"Invalid target: {eliminate}",
+                result={"remove": default_target, "reasoning": f"Corrected invalid choice '{eliminate}' to default"}
+            )
+
+        return eliminate, log
+
+    def _elimination_error(self, e: Exception, options: List[str]) -> Tuple[Optional[str], LmLog]:
+        """淘汰行动出错时返回默认目标"""
+        print(f"Error during eliminate action for {self.name}: {e}")
+        default_target = options[0] if options else None
+        return default_target, LmLog(
+            prompt=f"Error during eliminate action: {str(e)}",
+            raw_resp=f"Error: {str(e)}",
+            result={"remove": default_target, "reasoning": f"Error fallback to default target"}
+        )
+
+    def eliminate(self) -> Tuple[Optional[str], LmLog]:
+        """选择淘汰目标"""
+        options = self._eliminate_options()
 
         try:
             eliminate, log = self._generate_action("remove", options)
+            return self._validate_elimination(eliminate, log, options)
+        except Exception as e:
+            # 出现异常时返回默认目标
+            return self._elimination_error(e, options)
 
-            # 验证返回的结果
-            if eliminate is None:
-                print(f"Warning: {self.name} (Werewolf) did not return a valid eliminate target, using default")
-                # 选择一个默认目标
-                default_target = options[0] if options else None
-                return default_target, LmLog(
-                    prompt=f"Default target selected due to empty response",
-                    raw_resp="Empty response",
-                    result={"remove": default_target, "reasoning": "Default selection due to AI failure"}
-                )
-
-            # 验证返回的目标是否在有效选项中
-            if eliminate not in options:
-                print(f"Warning: {self.name} (Werewolf) chose invalid target '{eliminate}', using default")
-                default_target = options[0] if options else None
-                return default_target, LmLog(
-                    prompt=f"Invalid target '{eliminate}', using default {default_target}",
-                    raw_resp=f"Invalid target: {eliminate}",
-                    result={"remove": default_target, "reasoning": f"Corrected invalid choice '{eliminate}' to default"}
-                )
-
-            return eliminate, log
+    async def aeliminate(self) -> Tuple[Optional[str], LmLog]:
+        """选择淘汰目标（异步）"""
+        options = self._eliminate_options()
 
+        try:
+            eliminate, log = await self._agenerate_action("remove", options)
+            return self._validate_elimination(eliminate, log, options)
         except Exception as e:
-            print(f"Error during eliminate action for {self.name}: {e}")
-            # 出现异常时返回默认目标
-            default_target = options[0] if options else None
-            return default_target, LmLog(
-                prompt=f"Error during eliminate action: {str(e)}",
-                raw_resp=f"Error: {str(e)}",
-                result={"remove": default_target, "reasoning": f"Error fallback to default target"}
-            )
+            return self._elimination_error(e, options)
 
     def _get_werewolf_context(self):
         """获取狼人上下文信息"""
@@ -421,8 +485,8 @@ class Seer(Player):
         super().__init__(name=name, role=SEER, model=model, personality=personality)
         self.previously_unmasked: Dict[str, str] = {}
 
-    def unmask(self) -> Tuple[Optional[str], LmLog]:
-        """调查玩家身份"""
+    def _unmask_options(self) -> List[str]:
+        """可查验的玩家列表"""
         if not self.gamestate:
             raise ValueError(
                 "GameView not initialized. Call initialize_game_view() first."
@@ -433,8 +497,16 @@ class Seer(Player):
             for player in self.gamestate.current_players
             if player != self.name and player not in self.previously_unmasked.keys()
         ]
-        random.shuffle(options)
-        return self._generate_action("investigate", options)
+        player_random(self).shuffle(options)
+        return options
+
+    def unmask(self) -> Tuple[Optional[str], LmLog]:
+        """调查玩家身份"""
+        return self._generate_action("investigate", self._unmask_options())
+
+    async def aunmask(self) -> Tuple[Optional[str], LmLog]:
+        """调查玩家身份（异步）"""
+        return await self._agenerate_action("investigate", self._unmask_options())
 
     def reveal_and_update(self, player, role):
         """揭示并更新调查结果"""
@@ -443,6 +515,11 @@ class Seer(Player):
         )
         self.previously_unmasked[player] = role
 
+    def to_dict(self) -> Any:
+        data = super().to_dict()
+        data["previously_unmasked"] = dict(self.previously_unmasked)
+        return data
+
     @classmethod
     def from_json(cls, data: dict[Any, Any]):
         name = data["name"]
@@ -468,20 +545,33 @@ class Doctor(Player):
             name=name, role=DOCTOR, model=model, personality=personality
         )
 
-    def save(self) -> Tuple[Optional[str], LmLog]:
-        """选择保护目标"""
+    def _protect_options(self) -> List[str]:
+        """可保护的玩家列表"""
         if not self.gamestate:
             raise ValueError(
                 "GameView not initialized. Call initialize_game_view() first."
             )
 
         options = list(self.gamestate.current_players)
-        random.shuffle(options)
-        protected, log = self._generate_action("protect", options)
+        player_random(self).shuffle(options)
+        return options
+
+    def _record_protection(self, protected: Optional[str], log: LmLog) -> Tuple[Optional[str], LmLog]:
+        """记录保护目标"""
         if protected is not None:
             self._add_observation(f"夜晚阶段，我选择保护{protected}")
         return protected, log
 
+    def save(self) -> Tuple[Optional[str], LmLog]:
+        """选择保护目标"""
+        protected, log = self._generate_action("protect", self._protect_options())
+        return self._record_protection(protected, log)
+
+    async def asave(self) -> Tuple[Optional[str], LmLog]:
+        """选择保护目标（异步）"""
+        protected, log = await self._agenerate_action("protect", self._protect_options())
+        return self._record_protection(protected, log)
+
     @classmethod
     def from_json(cls, data: dict[Any, Any]):
         name = data["name"]
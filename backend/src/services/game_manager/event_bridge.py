@@ -0,0 +1,140 @@
+"""
+游戏事件桥
+Thread-safe event bridge between game engines and the FastAPI event loop
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.config.settings import settings
+
+
+class EventBridge:
+    """游戏事件桥 - 单例模式
+
+    游戏引擎（无论运行在事件循环中还是后台线程中）通过 publish() 投递通知，
+    投递只做一次计数和 call_soon_threadsafe，不创建事件循环、不等待发送结果。
+    事件进入主事件循环上的有界队列，由单个消费任务按投递顺序逐条发送。
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 队列元素：(通知协程函数, 位置参数, 关键字参数, 描述)
+        self._queue: Optional[asyncio.Queue] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self.maxsize = settings.server.event_queue_size
+        # 已投递但尚未发送完的事件数（跨线程计数，用于有界判断）
+        self._pending = 0
+        self._stats = {"published": 0, "delivered": 0, "failed": 0, "dropped": 0}
+        self._lock = threading.Lock()
+        self._initialized = True
+
+    @property
+    def is_attached(self) -> bool:
+        """是否已绑定到事件循环"""
+        return self._loop is not None and not self._loop.is_closed()
+
+    def attach(self, loop: asyncio.AbstractEventLoop, maxsize: Optional[int] = None) -> None:
+        """绑定主事件循环并启动消费任务（需在该循环中调用）"""
+        self.maxsize = maxsize if maxsize is not None else settings.server.event_queue_size
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._pending = 0
+        self._drain_task = loop.create_task(self._drain())
+        print(f"📨 Event bridge attached (queue size: {self.maxsize})")
+
+    async def aclose(self, timeout: float = 5.0) -> None:
+        """发送完队列中剩余的事件后停止消费任务"""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                print(f"[事件桥警告] 关闭时仍有 {self._queue.qsize()} 个事件未发送")
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+            try:
+                await self._drain_task
+            except asyncio.CancelledError:
+                pass
+        self._loop = None
+        self._queue = None
+        self._drain_task = None
+
+    def publish(self, notify_fn: Callable[..., Awaitable[Any]], *args, description: str = "", **kwargs) -> bool:
+        """投递一个通知（线程安全，不阻塞）
+
+        Returns:
+            事件是否进入队列；未绑定事件循环或队列已满时丢弃并返回 False
+        """
+        loop = self._loop
+        with self._lock:
+            if loop is None or loop.is_closed() or self._pending >= self.maxsize:
+                self._stats["dropped"] += 1
+                return False
+            self._pending += 1
+            self._stats["published"] += 1
+
+        event = (notify_fn, args, kwargs, description)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        try:
+            if running is loop:
+                self._queue.put_nowait(event)
+            else:
+                loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        except RuntimeError:
+            # 事件循环已关闭
+            with self._lock:
+                self._pending -= 1
+                self._stats["published"] -= 1
+                self._stats["dropped"] += 1
+            return False
+        return True
+
+    async def _drain(self) -> None:
+        """按顺序发送队列中的事件"""
+        while True:
+            notify_fn, args, kwargs, description = await self._queue.get()
+            try:
+                await notify_fn(*args, **kwargs)
+                with self._lock:
+                    self._stats["delivered"] += 1
+            except Exception as e:
+                with self._lock:
+                    self._stats["failed"] += 1
+                print(f"[WebSocket错误] {description or notify_fn.__name__}通知发送失败: {e}")
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                self._queue.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取事件桥统计信息"""
+        with self._lock:
+            return {
+                "attached": self.is_attached,
+                "queue_depth": self._pending,
+                "max_queue_size": self.maxsize,
+                **self._stats,
+            }
+
+
+# 全局实例
+event_bridge = EventBridge()
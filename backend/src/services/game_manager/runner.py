@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import random
 import traceback
 from typing import List, Tuple
 import itertools
@@ -25,6 +24,7 @@ import tqdm
 
 from src.services.logger import game_logger as logging
 from src.core.game import game_master as game
+from src.core.game.seeding import GameRandom
 from src.core.models.player import Doctor, Seer, Villager, Werewolf, SEER, WEREWOLF
 from src.core.models.game_state import State
 from src.config.settings import get_player_names, DEFAULT_THREADS
@@ -84,7 +84,7 @@ def initialize_players(
     """Assigns roles to players and initializes their game view."""
 
     player_names = get_player_names()
-    random.shuffle(player_names)
+    GameRandom.from_settings().stream("roles").shuffle(player_names)
 
     seer = Seer(
         name=player_names.pop(),
@@ -241,14 +241,12 @@ def run_game(
         session_id=session_id,
     )
 
-    def _save_progress(state: State, logs):
-        logging.save_game(state, logs, log_directory)
-
+    journal = logging.GameJournal(log_directory)
     gamemaster = game.GameMaster(
-        state, num_threads=_THREADS.value, on_progress=_save_progress
+        state, num_threads=_THREADS.value, on_progress=journal.record
     )
     # Initial save so the viewer can attach immediately
-    _save_progress(state, gamemaster.logs)
+    journal.record(state, gamemaster.logs)
     winner = None
     try:
         winner = gamemaster.run_game()
@@ -256,6 +254,7 @@ def run_game(
         state.error_message = traceback.format_exc()
         print(f"Error encountered during game: {e}")
 
+    journal.close()
     logging.save_game(state, gamemaster.logs, log_directory)
     print(f"Game logs saved to: {log_directory}")
     print(f"View in browser: http://localhost:8080/?session_id={session_id}")
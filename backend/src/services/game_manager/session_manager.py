@@ -5,15 +5,18 @@ Game Session Manager for managing running games
 
 import threading
 import asyncio
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Union
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
 
 from src.core.game.game_master import GameMaster
+from src.core.game.seeding import GameRandom
 from src.core.models.game_state import State
 from src.core.models.player import Seer, Doctor, Villager, Werewolf
-from src.services.logger.game_logger import log_directory, save_game
-from src.config.settings import get_player_names, DEFAULT_THREADS
+from src.services.game_manager.event_bridge import event_bridge
+from src.services.logger.game_logger import GameJournal, SnapshotWriter, log_directory
+from src.services.logger.usage_report import write_usage
+from src.core.models.game_state import to_dict
+from src.config.settings import get_player_names, DEFAULT_THREADS, settings
 from src.config.loader import model_registry
 from src.config.player_models import get_model_for_player
 
@@ -27,8 +30,23 @@ class GameSession:
         self.log_dir = log_dir
         self.started_at = datetime.now()
         self.thread: Optional[threading.Thread] = None
+        self.task: Optional[asyncio.Task] = None
+        self.journal: Optional[Union[GameJournal, SnapshotWriter]] = None
         self.is_running = False
 
+    def close_journal(self) -> None:
+        """游戏结束后记录最终状态（含错误信息）并写出快照"""
+        if self.journal is not None:
+            self.journal.record(self.state, self.gamemaster.logs)
+            self.journal.close()
+
+    def write_usage(self) -> None:
+        """游戏结束后把LLM用量统计写入对局目录的 usage.json"""
+        try:
+            write_usage(self.state.to_dict(), to_dict(self.gamemaster.logs), self.log_dir)
+        except Exception as e:
+            print(f"Failed to write usage for session {self.session_id}: {e}")
+
 
 class GameSessionManager:
     """单例游戏会话管理器"""
@@ -58,8 +76,6 @@ class GameSessionManager:
         max_debate_turns: int = 2
     ) -> GameSession:
         """创建新游戏会话"""
-        import random
-
         print("创建新游戏：6个玩家，每个玩家使用不同的模型")
 
         # 获取所有玩家模型名（6个不同的模型名）
@@ -71,7 +87,7 @@ class GameSessionManager:
         print(f"玩家列表：{player_names}")
 
         # 随机打乱玩家名顺序，确保每次游戏角色分配不同
-        random.shuffle(player_names)
+        GameRandom.from_settings().stream("roles").shuffle(player_names)
 
         # 分配角色：1个预言家，1个医生，1个狼人，3个村民
         seer_name = player_names[0]
@@ -121,27 +137,23 @@ class GameSessionManager:
             session_id=session_id,
         )
 
-        # 创建进度保存回调
-        def _save_progress(state: State, logs):
-            save_game(state, logs, log_dir)
-            # 发送WebSocket通知 - 使用线程池执行器避免事件循环冲突
-            try:
-                import concurrent.futures
-
-                def run_async_in_thread():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        loop.run_until_complete(_notify_game_update(session_id, state))
-                    finally:
-                        loop.close()
-
-                executor = ThreadPoolExecutor(max_workers=1)
-                executor.submit(run_async_in_thread)
-                executor.shutdown(wait=False)
+        # 创建进度保存回调：写文件都在后台写线程中进行，不阻塞事件循环
+        if settings.game.persistence_mode == "journal":
+            journal = GameJournal(
+                log_dir,
+                debounce=settings.game.persistence_debounce,
+                snapshot_interval=settings.game.snapshot_interval,
+            )
+        else:
+            # full：在游戏所在线程生成快照，由写线程全量重写
+            journal = SnapshotWriter(log_dir)
 
-            except Exception as e:
-                print(f"WebSocket notification error: {e}")
+        def _save_progress(state: State, logs):
+            journal.record(state, logs)
+            # 发送WebSocket通知（通过事件桥投递到主事件循环）
+            event_bridge.publish(
+                _notify_game_update, session_id, state, description="游戏状态更新"
+            )
 
         # 创建游戏主控
         gamemaster = GameMaster(
@@ -155,6 +167,7 @@ class GameSessionManager:
 
         # 创建会话
         session = GameSession(session_id, state, gamemaster, log_dir)
+        session.journal = journal
 
         with self._lock:
             self._sessions[session_id] = session
@@ -162,7 +175,11 @@ class GameSessionManager:
         return session
 
     def start_game(self, session_id: str) -> bool:
-        """启动游戏（后台线程运行）"""
+        """启动游戏
+
+        在事件循环中调用时（FastAPI 路由），游戏作为任务运行在同一个循环上；
+        否则退回到后台线程运行。
+        """
         with self._lock:
             session = self._sessions.get(session_id)
             if not session:
@@ -171,6 +188,16 @@ class GameSessionManager:
             if session.is_running:
                 return False
 
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+
+            if loop is not None:
+                session.is_running = True
+                session.task = loop.create_task(self._run_session(session))
+                return True
+
             def run_game_thread():
                 try:
                     session.is_running = True
@@ -179,12 +206,26 @@ class GameSessionManager:
                     session.state.error_message = str(e)
                     print(f"Game error in session {session_id}: {e}")
                 finally:
+                    session.close_journal()
+                    session.write_usage()
                     session.is_running = False
 
             session.thread = threading.Thread(target=run_game_thread, daemon=True)
             session.thread.start()
             return True
 
+    async def _run_session(self, session: GameSession) -> None:
+        """在事件循环中运行游戏"""
+        try:
+            await session.gamemaster.arun_game()
+        except Exception as e:
+            session.state.error_message = str(e)
+            print(f"Game error in session {session.session_id}: {e}")
+        finally:
+            await asyncio.to_thread(session.close_journal)
+            await asyncio.to_thread(session.write_usage)
+            session.is_running = False
+
     def stop_game(self, session_id: str) -> bool:
         """停止游戏"""
         with self._lock:
@@ -221,6 +262,7 @@ class GameSessionManager:
             "error_message": session.state.error_message,
             "started_at": session.started_at.isoformat(),
             "log_directory": session.log_dir,
+            "retry_budget": session.gamemaster.retry_budget.get_stats(),
         }
 
 
@@ -231,8 +273,10 @@ async def _notify_game_update(session_id: str, state: State):
         # 延迟导入避免循环依赖
         from src.api.v1.routes.websocket import notify_game_update
 
+        # 每次广播只序列化一次状态
+        game_state = state.to_dict()
         game_data = {
-            "game_state": state.to_dict(),
+            "game_state": game_state,
             "status": "running" if not state.winner else "completed"
         }
 
@@ -240,9 +284,9 @@ async def _notify_game_update(session_id: str, state: State):
 
         # 如果游戏结束，发送游戏完成通知
         if state.winner and state.rounds:
-            final_round = state.rounds[-1].to_dict() if state.rounds else None
+            final_round = game_state["rounds"][-1] if game_state["rounds"] else None
             from src.api.v1.routes.websocket import notify_game_complete
-            await notify_game_complete(session_id, state.winner, final_round, state.to_dict())
+            await notify_game_complete(session_id, state.winner, final_round, game_state)
 
     except Exception as e:
         print(f"Failed to send WebSocket notification: {e}")
@@ -272,6 +316,14 @@ async def _notify_debate_turn(session_id: str, player_name: str, dialogue: str,
     except Exception as e:
         print(f"Failed to send debate turn notification: {e}")
 
+async def _notify_debate_delta(session_id: str, player_name: str, delta: str, turn_number: int, round_number: int, attempt: int):
+    """发送发言增量通知"""
+    try:
+        from src.api.v1.routes.websocket import notify_debate_delta
+        await notify_debate_delta(session_id, player_name, delta, turn_number, round_number, attempt)
+    except Exception as e:
+        print(f"Failed to send debate delta notification: {e}")
+
 async def _notify_vote_cast(session_id: str, voter: str, target: str, voter_role: str):
     """发送投票通知"""
     try:
@@ -0,0 +1,60 @@
+"""
+版本化游戏状态流
+Versioned game state snapshots and deltas for WebSocket broadcasts
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.utils.json_patch import Patch, make_patch
+
+
+class StateStream:
+    """单个会话的版本化状态
+
+    每次 update() 与上一次广播的快照做差异比较：有变化时版本号加一，
+    并保留最近 history_size 个补丁，供断线重连的客户端补齐。
+    """
+
+    def __init__(self, history_size: int = 200):
+        self.version = 0
+        self.snapshot: Optional[Dict[str, Any]] = None
+        # 最近一次广播的游戏状态（running / completed / stopped）
+        self.status: Optional[str] = None
+        self._history: Deque[Tuple[int, Patch]] = deque(maxlen=history_size)
+
+    def update(self, state: Dict[str, Any]) -> Optional[Patch]:
+        """记录新状态
+
+        Returns:
+            相对上一版本的补丁；状态没有变化时返回 None
+        """
+        if self.snapshot is None:
+            self.snapshot = state
+            self.version = 1
+            return None
+
+        patch = make_patch(self.snapshot, state)
+        if not patch:
+            return None
+
+        self.snapshot = state
+        self.version += 1
+        self._history.append((self.version, patch))
+        return patch
+
+    def deltas_since(self, version: int) -> Optional[List[Tuple[int, Patch]]]:
+        """获取某版本之后的所有补丁
+
+        Returns:
+            [(版本号, 补丁), ...]；该版本已超出保留范围（或无效）时返回 None，
+            客户端需要重新获取完整快照
+        """
+        if self.snapshot is None or version > self.version or version < 1:
+            return None
+        if version == self.version:
+            return []
+        deltas = [(v, patch) for v, patch in self._history if v > version]
+        if not deltas or deltas[0][0] != version + 1:
+            return None
+        return deltas
@@ -6,7 +6,8 @@ LLM Service Module
 from .base import LLMProvider
 from .factory import LLMFactory
 from .client import LLMClient
-from .generator import generate, format_prompt, set_global_llm_client, get_global_llm_client
+from .transport import HTTPClientPool, http_pool
+from .generator import generate, agenerate, format_prompt, set_global_llm_client, get_global_llm_client
 from .providers import OpenAIProvider, GLMProvider, OpenRouterProvider
 
 __all__ = [
@@ -15,8 +16,12 @@ __all__ = [
     # 工厂和客户端
     "LLMFactory",
     "LLMClient",
+    # 共享HTTP连接池
+    "HTTPClientPool",
+    "http_pool",
     # 生成器
     "generate",
+    "agenerate",
     "format_prompt",
     "set_global_llm_client",
     "get_global_llm_client",
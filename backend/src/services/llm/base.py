@@ -3,8 +3,9 @@ LLM提供商抽象基类
 LLM Provider Abstract Base Class
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
 
 
 class LLMProvider(ABC):
@@ -50,6 +51,66 @@ class LLMProvider(ABC):
         """
         pass
 
+    async def agenerate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> str:
+        """
+        异步生成文本
+
+        默认实现把同步的 generate 放到线程中执行；有原生异步客户端的
+        提供商应覆盖此方法，避免每个调用占用一个线程。
+
+        Args:
+            与 generate 相同
+
+        Returns:
+            生成的文本
+        """
+        return await asyncio.to_thread(
+            self.generate,
+            model=model,
+            prompt=prompt,
+            temperature=temperature,
+            json_mode=json_mode,
+            response_schema=response_schema,
+            **kwargs
+        )
+
+    async def astream(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        流式生成文本，逐段返回增量
+
+        默认实现等待完整响应后一次性返回；支持流式输出的提供商应覆盖此方法。
+
+        Args:
+            与 generate 相同
+
+        Yields:
+            文本增量，拼接后与 agenerate 的结果相同
+        """
+        yield await self.agenerate(
+            model=model,
+            prompt=prompt,
+            temperature=temperature,
+            json_mode=json_mode,
+            response_schema=response_schema,
+            **kwargs
+        )
+
     @abstractmethod
     def health_check(self) -> bool:
         """
@@ -0,0 +1,214 @@
+"""
+LLM熔断器
+Per-provider / per-model circuit breakers driven by observed errors and latency
+
+每个提供商、每个模型各有一个熔断器，按最近 N 次调用的失败率（传输错误、5xx、认证失败，
+以及超过 slow_call_seconds 的慢调用）切换状态：
+
+- closed: 正常调用
+- open: 直接抛出 CircuitOpenError，不再等待超时和重试；配置了对冲时转到等价模型
+- half_open: open 持续 open_seconds 后放行少量探测调用，成功则恢复 closed，失败则重新 open
+
+状态见 /api/v1/status/info 的 llm_circuits 字段和 /api/v1/models/providers。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器处于 open 状态，调用未发出"""
+
+    def __init__(self, key: str, retry_in: float):
+        super().__init__(f"Circuit open for {key} (retry in {retry_in:.1f}s)")
+        self.key = key
+        self.retry_in = retry_in
+
+
+def counts_as_failure(error: BaseException) -> bool:
+    """限流由准入控制处理、响应无效与提供商健康无关，其余错误都计入失败率"""
+    from src.services.llm.retry import ErrorKind, classify_error
+
+    return classify_error(error) in (ErrorKind.TRANSIENT, ErrorKind.FATAL)
+
+
+class CircuitBreaker:
+    """单个提供商或模型的熔断器（线程安全）
+
+    Args:
+        key: 名称（用于错误信息和统计）
+        failure_rate: 失败率达到该值时打开
+        window: 统计最近多少次调用
+        min_calls: 窗口内至少有多少次调用才会打开
+        slow_call_seconds: 超过该耗时的成功调用也算失败（0 表示不统计慢调用）
+        open_seconds: 打开后多久进入 half_open
+        half_open_calls: half_open 状态下同时放行的探测调用数
+    """
+
+    def __init__(self, key: str, failure_rate: float = 0.5, window: int = 20, min_calls: int = 5,
+                 slow_call_seconds: float = 120.0, open_seconds: float = 30.0, half_open_calls: int = 1):
+        self.key = key
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def _retry_in(self, now: float) -> float:
+        return max(0.0, self.open_seconds - (now - self._opened_at))
+
+    def check(self) -> None:
+        """调用前检查，不允许调用时抛出 CircuitOpenError"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and self._retry_in(now) <= 0:
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.key, self._retry_in(now))
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def record(self, seconds: Optional[float], error: Optional[BaseException] = None) -> None:
+        """记录一次调用结果：seconds 为耗时，error 为失败时的异常"""
+        failed = error is not None or (self.slow_call_seconds > 0 and seconds is not None
+                                       and seconds > self.slow_call_seconds)
+        with self._lock:
+            if error is not None:
+                self.last_error = f"{type(error).__name__}: {error}"[:200]
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(failed)
+            if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def release(self) -> None:
+        """调用被取消（没有结果）时归还 half_open 的探测名额"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == OPEN and self._retry_in(time.monotonic()) > 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "failure_rate": round(sum(self._outcomes) / calls, 3) if calls else 0.0,
+                "window_calls": calls,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "retry_in_seconds": round(self._retry_in(time.monotonic()), 1) if self.state == OPEN else None,
+                "last_error": self.last_error,
+            }
+
+
+class BreakerRegistry:
+    """按提供商和模型管理熔断器
+
+    Args:
+        **config: 传给每个 CircuitBreaker 的参数
+    """
+
+    def __init__(self, **config):
+        self.config = config
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional["BreakerRegistry"]:
+        """按 settings.llm 创建；关闭熔断时返回 None"""
+        if not settings.llm.breaker_enabled:
+            return None
+        return cls(
+            failure_rate=settings.llm.breaker_failure_rate,
+            window=settings.llm.breaker_window,
+            min_calls=settings.llm.breaker_min_calls,
+            slow_call_seconds=settings.llm.breaker_slow_call_seconds,
+            open_seconds=settings.llm.breaker_open_seconds,
+            half_open_calls=settings.llm.breaker_half_open_calls,
+        )
+
+    def _get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(key, **self.config)
+            return breaker
+
+    def _for(self, provider: str, model: str) -> List[CircuitBreaker]:
+        return [self._get(f"provider:{provider}"), self._get(f"model:{model}")]
+
+    def check(self, provider: str, model: str) -> None:
+        """提供商或模型的熔断器打开时抛出 CircuitOpenError"""
+        admitted: List[CircuitBreaker] = []
+        try:
+            for breaker in self._for(provider, model):
+                breaker.check()
+                admitted.append(breaker)
+        except CircuitOpenError:
+            for breaker in admitted:
+                breaker.release()
+            raise
+
+    def record(self, provider: str, model: str, seconds: Optional[float],
+               error: Optional[BaseException] = None) -> None:
+        if error is not None and not counts_as_failure(error):
+            # 与提供商健康无关的错误：只归还探测名额
+            self.release(provider, model)
+            return
+        for breaker in self._for(provider, model):
+            breaker.record(seconds, error)
+
+    def release(self, provider: str, model: str) -> None:
+        for breaker in self._for(provider, model):
+            breaker.release()
+
+    def is_available(self, provider: str) -> bool:
+        """提供商的熔断器是否允许调用"""
+        with self._lock:
+            breaker = self._breakers.get(f"provider:{provider}")
+        return breaker is None or not breaker.is_open
+
+    def get_stats(self) -> Dict[str, Any]:
+        """每个提供商/模型的熔断状态"""
+        with self._lock:
+            items = list(self._breakers.items())
+        stats: Dict[str, Dict[str, Any]] = {"providers": {}, "models": {}}
+        for key, breaker in items:
+            kind, name = key.split(":", 1)
+            stats[f"{kind}s"][name] = breaker.get_stats()
+        return stats
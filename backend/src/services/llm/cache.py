@@ -0,0 +1,239 @@
+"""
+LLM响应缓存
+Persistent, content-addressed LLM response cache (SQLite)
+
+缓存键由 (模型ID, 温度, 系统消息, 提示词, 响应schema) 的哈希组成，存放在本地SQLite中，
+超过条目上限时按最近使用时间淘汰。三种模式（LLM__CACHE_MODE）：
+
+- off: 不使用缓存（默认）
+- read_through: 命中直接返回，未命中调用模型并写入缓存
+- replay: 只从缓存读取，未命中抛出 CacheMissError，不会产生任何API调用
+
+从已保存的对局导入响应后，可以用 replay 模式按CPU速度重跑整局游戏（原对局和重跑都需要设置相同的
+GAME__SEED，否则提示词会偏离，只有完全相同的提示词能命中）:
+    python -m src.services.llm.cache import logs/session_xxx [更多目录 ...]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+CACHE_MODES = ("off", "read_through", "replay")
+
+
+class CacheMissError(RuntimeError):
+    """replay 模式下缓存中没有对应的响应"""
+
+
+def make_key(
+    model: str,
+    prompt: str,
+    temperature: float,
+    system_message: Optional[str] = None,
+    response_schema: Optional[Dict[str, Any]] = None,
+) -> str:
+    """完整缓存键"""
+    payload = json.dumps(
+        [model, round(float(temperature), 3), system_message or "", prompt, response_schema or {}],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def prompt_hash(prompt: str) -> str:
+    """只按提示词计算的哈希（对局日志中没有记录模型和温度，replay 时用于回退匹配）"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite响应缓存（线程安全）
+
+    Args:
+        path: 数据库文件路径
+        mode: off / read_through / replay
+        max_entries: 条目上限，超过后淘汰最久未使用的条目
+    """
+
+    def __init__(self, path: str, mode: str = "read_through", max_entries: int = 50000):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}. Expected one of {CACHE_MODES}")
+        self.path = str(path)
+        self.mode = mode
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "prompt_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                prompt_hash TEXT NOT NULL,
+                model TEXT,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_prompt_hash ON responses (prompt_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON responses (last_used)")
+        # 条目数在打开时统计一次，之后随写入和淘汰更新，写入时不再 COUNT(*)
+        self._count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional["ResponseCache"]:
+        """按配置创建；mode 为 off 时返回 None"""
+        if settings.llm.cache_mode == "off":
+            return None
+        path = settings.llm.cache_path or str(settings.paths.logs_dir.parent / "cache" / "llm_responses.sqlite")
+        return cls(path, mode=settings.llm.cache_mode, max_entries=settings.llm.cache_max_entries)
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "replay"
+
+    def get(self, key: str, prompt: str) -> Optional[str]:
+        """
+        读取缓存的响应
+
+        replay 模式下完整键未命中时，回退到只按提示词匹配（导入的对局日志）；
+        仍未命中则抛出 CacheMissError。
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            hit_key = key
+            if row is None and self.replay:
+                found = self._conn.execute(
+                    "SELECT key, response FROM responses WHERE prompt_hash = ? ORDER BY last_used DESC LIMIT 1",
+                    (prompt_hash(prompt),),
+                ).fetchone()
+                if found is not None:
+                    hit_key, row = found[0], (found[1],)
+                    self._stats["prompt_hits"] += 1
+            if row is None:
+                self._stats["misses"] += 1
+                if self.replay:
+                    raise CacheMissError(f"No cached response for prompt {prompt_hash(prompt)[:12]}")
+                return None
+            self._stats["hits"] += 1
+            self._conn.execute(
+                "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, hit_key)
+            )
+            return row[0]
+
+    def put(self, key: str, prompt: str, model: Optional[str], response: str) -> None:
+        """写入（或覆盖）一条响应，必要时淘汰最久未使用的条目"""
+        if response is None:
+            return
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, prompt_hash, model, response, created, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, prompt_hash(prompt), model, response, now, now),
+            )
+            if exists is None:
+                self._count += 1
+            self._stats["stores"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        excess = self._count - self.max_entries
+        if excess <= 0:
+            return
+        # 多淘汰一些（上限的1%），避免之后每次写入都触发淘汰
+        excess += self.max_entries // 100
+        deleted = self._conn.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        ).rowcount
+        self._count -= deleted
+        self._stats["evictions"] += deleted
+
+    def import_pairs(self, pairs: List[Tuple[str, str]]) -> int:
+        """导入 (提示词, 响应) 对；导入的条目只能在 replay 模式下按提示词匹配"""
+        now = time.time()
+        rows = [("prompt:" + prompt_hash(prompt), prompt_hash(prompt), None, response, now, now)
+                for prompt, response in pairs if prompt and response]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO responses (key, prompt_hash, model, response, created, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                rows,
+            )
+            # 批量导入可能覆盖已有条目，重新统计一次
+            self._count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._evict()
+        return len(rows)
+
+    def import_game_logs(self, directory: str) -> int:
+        """导入一局对局（game_logs.json 快照 + 增量日志）中所有成功的LLM响应"""
+        from src.services.logger.game_logger import read_logs
+
+        return self.import_pairs(list(_iter_lm_logs(read_logs(directory))))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "path": self.path,
+                "entries": self._count,
+                "max_entries": self.max_entries,
+                **self._stats,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _iter_lm_logs(node: Any) -> Iterator[Tuple[str, str]]:
+    """遍历日志中的 LmLog（含 prompt 和 raw_resp 且解析成功的记录）"""
+    if isinstance(node, dict):
+        if "prompt" in node and "raw_resp" in node:
+            if node.get("result") is not None:
+                yield node["prompt"], node["raw_resp"]
+            return
+        for value in node.values():
+            yield from _iter_lm_logs(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _iter_lm_logs(item)
+
+
+def main() -> None:
+    from src.config.settings import settings
+
+    parser = argparse.ArgumentParser(description="LLM响应缓存工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="从对局目录导入响应")
+    import_parser.add_argument("directories", nargs="+")
+    subparsers.add_parser("stats", help="显示缓存统计")
+    args = parser.parse_args()
+
+    path = settings.llm.cache_path or str(settings.paths.logs_dir.parent / "cache" / "llm_responses.sqlite")
+    cache = ResponseCache(path, mode="read_through", max_entries=settings.llm.cache_max_entries)
+    if args.command == "import":
+        for directory in args.directories:
+            if not os.path.isdir(directory):
+                print(f"跳过不存在的目录: {directory}")
+                continue
+            print(f"{directory}: 导入 {cache.import_game_logs(directory)} 条响应")
+    print(json.dumps(cache.get_stats(), ensure_ascii=False, indent=2))
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,26 +3,53 @@ LLM统一客户端
 Unified LLM Client
 """
 
-from typing import Dict, Optional, Any
+import asyncio
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 
 from .base import LLMProvider
 from .factory import LLMFactory
+from .limiter import LLMLimiter
+from .cache import ResponseCache, make_key
+from .hedging import HedgePolicy
+from .breaker import BreakerRegistry
+from .pool import PoolMember, ProviderPool, split_list
+from .routing import RoutingTable
+from .usage import CallUsage, capture_usage
 
 
 class LLMClient:
     """LLM统一客户端
 
-    管理多个LLM提供商，根据模型名称自动路由到对应的提供商
+    管理多个LLM提供商，按路由表（models.yaml 编译）把模型名称路由到对应的提供商
     """
 
-    def __init__(self, providers: Dict[str, LLMProvider]):
+    def __init__(
+        self,
+        providers: Dict[str, LLMProvider],
+        limiter: Optional[LLMLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        hedging: Optional[HedgePolicy] = None,
+        breakers: Optional[BreakerRegistry] = None,
+        routing: Optional[RoutingTable] = None,
+    ):
         """
         初始化LLM客户端
 
         Args:
             providers: 提供商字典 {provider_name: provider_instance}
+            limiter: 准入控制（并发和速率限制），不提供时不限制
+            cache: 响应缓存，不提供时每次都调用模型
+            hedging: 对冲和故障转移策略，不提供时每次只调用一个模型
+            breakers: 提供商/模型熔断器，不提供时不熔断
+            routing: 模型路由表，不提供时按 models.yaml 编译
         """
         self.providers = providers
+        self.limiter = limiter or LLMLimiter()
+        self.cache = cache
+        self.hedging = hedging
+        self.breakers = breakers
+        self.routing = routing or RoutingTable.from_registry(providers)
 
     def call(
         self,
@@ -31,126 +58,315 @@ class LLMClient:
         temperature: float = 0.7,
         json_mode: bool = True,
         response_schema: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
+        call_meta: Optional[Dict[str, Any]] = None,
         **kwargs
     ) -> str:
         """
         调用LLM生成文本
 
+        同步调用不做对冲和故障转移（LLM__HEDGE_ENABLED 只对 acall 生效）。
+
         Args:
             model: 模型ID，格式如 "glm/GLM-Z1-Flash" 或 "gpt-4o"
             prompt: 提示词
             temperature: 温度参数
             json_mode: 是否使用JSON模式
             response_schema: 响应schema
+            use_cache: 是否读取缓存（重试时传 False 以获取新的响应；replay 模式下忽略）
+            call_meta: 提供时写入本次调用的实际提供商、模型和是否对冲
             **kwargs: 其他参数
 
         Returns:
             生成的文本
 
         Raises:
-            ValueError: 找不到对应的提供商
+            ProviderNotFoundError: 找不到对应的提供商
         """
-        provider = self._get_provider_for_model(model)
-
-        # 如果model包含提供商前缀（如 glm/），去掉前缀
-        if "/" in model:
-            model = model.split("/", 1)[1]
-
-        return provider.generate(
-            model=model,
-            prompt=prompt,
-            temperature=temperature,
-            json_mode=json_mode,
-            response_schema=response_schema,
-            **kwargs
-        )
-
-    def _get_provider_for_model(self, model: str) -> LLMProvider:
+        cache_key, cached = self._cache_lookup(model, prompt, temperature, response_schema, use_cache, kwargs)
+        if cached is not None:
+            self._fill_meta(call_meta, "cache", model, False)
+            return cached
+
+        provider_name, provider, model_name = self._route(model)
+
+        # 熔断中直接失败；超过提供商/模型的并发或速率限制时排队等待
+        with self._tracked(provider_name, model) as usage, \
+                self.limiter.limit(provider_name, model, prompt) as ticket:
+            usage.restart()
+            with capture_usage(usage):
+                text = provider.generate(
+                    model=model_name,
+                    prompt=prompt,
+                    temperature=temperature,
+                    json_mode=json_mode,
+                    response_schema=response_schema,
+                    **kwargs
+                )
+            usage.finish(prompt, text)
+            ticket.record_response(text)
+        self._cache_store(cache_key, model, prompt, text)
+        self._fill_meta(call_meta, provider_name, model, False, usage)
+        return text
+
+    async def acall(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
+        call_meta: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> str:
         """
-        根据模型名称获取对应的提供商
+        异步调用LLM生成文本
+
+        路由规则与 call 相同，但通过提供商的 agenerate 执行，
+        同一个事件循环即可并发驱动大量玩家调用。
+        配置了对冲策略且该模型有等价模型时，慢调用会向等价模型发出对冲请求。
 
         Args:
-            model: 模型ID
+            与 call 相同
 
         Returns:
-            LLM提供商实例
+            生成的文本
 
         Raises:
-            ValueError: 找不到对应的提供商
-        """
-        # 检查是否有显式的提供商前缀
-        if model.startswith("siliconflow/"):
-            return self._get_provider("siliconflow")
-        elif model.startswith("glm/"):
-            return self._get_provider("glm")
-        elif model.startswith("openrouter/"):
-            return self._get_provider("openrouter")
-        elif model.startswith("minimax/"):
-            return self._get_provider("minimax")
-        elif "gpt" in model.lower():
-            return self._get_provider("openai")
-        elif "claude" in model.lower():
-            # Claude模型可能通过OpenRouter访问
-            if "openrouter" in self.providers:
-                return self._get_provider("openrouter")
-            raise ValueError(
-                f"No provider available for model: {model}. "
-                "Claude models require OpenRouter provider."
-            )
-        elif "minimax" in model.lower() or "M2" in model:
-            # MiniMax模型
-            if "minimax" in self.providers:
-                return self._get_provider("minimax")
-            raise ValueError(
-                f"No provider available for model: {model}. "
-                "MiniMax provider not configured."
-            )
-        elif any(keyword in model.lower() for keyword in ["deepseek", "qwen", "glm", "kimi", "hunyuan", "moonshot"]):
-            # 硅基流动支持的模型
-            if "siliconflow" in self.providers:
-                return self._get_provider("siliconflow")
-            raise ValueError(
-                f"No provider available for model: {model}. "
-                "SiliconFlow provider not configured."
-            )
+            ProviderNotFoundError: 找不到对应的提供商
+        """
+        cache_key, cached = await self._acache_lookup(model, prompt, temperature, response_schema, use_cache, kwargs)
+        if cached is not None:
+            self._fill_meta(call_meta, "cache", model, False)
+            return cached
+
+        request = dict(prompt=prompt, temperature=temperature, json_mode=json_mode,
+                       response_schema=response_schema, **kwargs)
+        candidates = self.hedging.candidates(model) if self.hedging else [model]
+        if len(candidates) == 1:
+            text, usage = await self._acall_model(model, request)
+            winner, hedged = model, False
         else:
-            # 默认尝试硅基流动
-            if "siliconflow" in self.providers:
-                return self._get_provider("siliconflow")
-            elif "glm" in self.providers:
-                return self._get_provider("glm")
-            raise ValueError(f"No provider available for model: {model}")
+            text, usage, winner, hedged = await self._acall_hedged(model, candidates, request)
+
+        await self._acache_store(cache_key, model, prompt, text)
+        self._fill_meta(call_meta, self._route(winner)[0], winner, hedged, usage)
+        return text
+
+    async def _acall_model(self, model: str, request: Dict[str, Any]) -> Tuple[str, CallUsage]:
+        """异步调用单个模型（经过熔断检查和准入控制，并记录结果）"""
+        provider_name, provider, model_name = self._route(model)
+
+        with self._tracked(provider_name, model) as usage:
+            async with self.limiter.alimit(provider_name, model, request["prompt"]) as ticket:
+                usage.restart()
+                with capture_usage(usage):
+                    text = await provider.agenerate(model=model_name, **request)
+                usage.finish(request["prompt"], text)
+                ticket.record_response(text)
+        return text, usage
+
+    async def _acall_hedged(
+        self, primary: str, candidates: List[str], request: Dict[str, Any]
+    ) -> Tuple[str, CallUsage, str, bool]:
+        """
+        先调用 candidates[0]，超过其p95延迟时启动下一个候选（对冲），失败时立即转移到下一个候选，
+        取第一个成功的非空响应并取消其余调用
+
+        Returns:
+            (文本, 胜出调用的用量, 胜出的模型, 是否发出了对冲请求)；
+            只因前一个候选失败而转移的调用不算对冲
+        """
+        pending: Dict[asyncio.Task, str] = {}
+        remaining = list(candidates)
+        errors: List[BaseException] = []
+        hedged = False
+
+        def launch() -> None:
+            model = remaining.pop(0)
+            pending[asyncio.ensure_future(self._acall_model(model, request))] = model
+
+        launch()
+        try:
+            while pending:
+                timeout = self.hedging.delay(candidates[0]) if remaining else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 超过p95仍未返回：发出对冲请求
+                    hedged = True
+                    launch()
+                    continue
+                for task in done:
+                    model = pending.pop(task)
+                    error = task.exception()
+                    if error is None and task.result()[0]:
+                        self.hedging.record_call(primary, model, hedged)
+                        text, usage = task.result()
+                        return text, usage, model, hedged
+                    errors.append(error or ValueError(f"Empty response from {model}"))
+                if not pending and remaining:
+                    # 全部失败但还有候选：立即转移
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise errors[0]
+
+    @contextmanager
+    def _tracked(self, provider_name: str, model: str):
+        """
+        熔断检查，并把调用结果记录到熔断器和对冲策略
+
+        Raises:
+            CircuitOpenError: 提供商或模型处于熔断状态
+        """
+        if self.breakers is not None:
+            self.breakers.check(provider_name, model)
+        usage = CallUsage()
+        try:
+            yield usage
+        except Exception as e:
+            self._record_outcome(provider_name, model, None, e)
+            raise
+        except BaseException:
+            # 被取消（对冲的另一方胜出、游戏停止）：没有结果可记录
+            if self.breakers is not None:
+                self.breakers.release(provider_name, model)
+            raise
+        self._record_outcome(provider_name, model, usage.elapsed(), None)
+
+    def _record_outcome(self, provider_name: str, model: str, seconds: Optional[float],
+                        error: Optional[BaseException]) -> None:
+        """记录一次调用的结果（error 不为 None 表示失败）"""
+        if self.breakers is not None:
+            self.breakers.record(provider_name, model, seconds, error)
+        if self.hedging is not None:
+            if error is None:
+                self.hedging.record_success(model, seconds)
+            else:
+                self.hedging.record_failure(model)
+
+    @staticmethod
+    def _fill_meta(call_meta: Optional[Dict[str, Any]], provider: str, model: str, hedged: bool,
+                   usage: Optional[CallUsage] = None) -> None:
+        """写入实际的提供商、模型、是否对冲，以及 token 数和耗时（缓存命中时没有用量）"""
+        if call_meta is not None:
+            call_meta.update(provider=provider, model=model, hedged=hedged)
+            if usage is not None:
+                call_meta.update(usage.to_meta())
+
+    async def astream(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
+        call_meta: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        流式调用LLM，逐段返回文本增量
+
+        路由、准入控制和缓存与 acall 相同；准入名额在整个流结束后才释放。
+        缓存命中时一次性返回完整响应。流式调用不做对冲（两路输出无法合并推送）。
+
+        Args:
+            与 call 相同
 
-    def _get_provider(self, provider_name: str) -> LLMProvider:
+        Yields:
+            文本增量
+
+        Raises:
+            ProviderNotFoundError: 找不到对应的提供商
         """
-        获取指定的提供商
+        cache_key, cached = await self._acache_lookup(model, prompt, temperature, response_schema, use_cache, kwargs)
+        if cached is not None:
+            self._fill_meta(call_meta, "cache", model, False)
+            yield cached
+            return
+
+        provider_name, provider, model_name = self._route(model)
+
+        parts = []
+        with self._tracked(provider_name, model) as usage:
+            async with self.limiter.alimit(provider_name, model, prompt) as ticket:
+                usage.restart()
+                async for delta in provider.astream(
+                    model=model_name,
+                    prompt=prompt,
+                    temperature=temperature,
+                    json_mode=json_mode,
+                    response_schema=response_schema,
+                    **kwargs
+                ):
+                    usage.first_byte()
+                    parts.append(delta)
+                    yield delta
+                text = "".join(parts)
+                # 流式响应不带 usage，按文本长度估算
+                usage.finish(prompt, text)
+                ticket.record_response(text)
+        await self._acache_store(cache_key, model, prompt, text)
+        self._fill_meta(call_meta, provider_name, model, False, usage)
+
+    def _cache_lookup(self, model, prompt, temperature, response_schema, use_cache, kwargs):
+        """返回 (缓存键, 缓存的响应)；未启用缓存时为 (None, None)"""
+        if self.cache is None:
+            return None, None
+        key = make_key(model, prompt, temperature, kwargs.get("system_message"), response_schema)
+        if not use_cache and not self.cache.replay:
+            return key, None
+        return key, self.cache.get(key, prompt)
+
+    def _cache_store(self, key: Optional[str], model: str, prompt: str, text: Optional[str]) -> None:
+        if key is not None and text is not None:
+            self.cache.put(key, prompt, model, text)
+
+    async def _acache_lookup(self, model, prompt, temperature, response_schema, use_cache, kwargs):
+        """异步路径的 _cache_lookup：SQLite读写放到线程中执行，不阻塞事件循环"""
+        if self.cache is None:
+            return None, None
+        return await asyncio.to_thread(
+            self._cache_lookup, model, prompt, temperature, response_schema, use_cache, kwargs)
+
+    async def _acache_store(self, key: Optional[str], model: str, prompt: str, text: Optional[str]) -> None:
+        if key is not None and text is not None:
+            await asyncio.to_thread(self.cache.put, key, prompt, model, text)
+
+    def _resolve(self, model: str) -> Tuple[LLMProvider, str]:
+        """
+        解析模型ID，返回提供商和发送给提供商的模型名
 
         Args:
-            provider_name: 提供商名称
+            model: 模型ID
 
         Returns:
-            LLM提供商实例
+            (provider, model_name) 元组
+        """
+        _, provider, model = self._route(model)
+        return provider, model
+
+    def _route(self, model: str) -> Tuple[str, LLMProvider, str]:
+        """
+        解析模型ID，返回 (提供商名称, 提供商, 发送给提供商的模型名)
 
         Raises:
-            ValueError: 提供商未配置
+            ProviderNotFoundError: 找不到对应的提供商
         """
-        provider = self.providers.get(provider_name)
-        if not provider:
-            raise ValueError(
-                f"Provider '{provider_name}' not configured. "
-                f"Available providers: {', '.join(self.providers.keys())}"
-            )
-        return provider
+        return self.routing.resolve(model)
 
     def health_check(self) -> Dict[str, bool]:
         """
-        检查所有提供商的健康状态
+        检查所有提供商的健康状态（配置检查 + 熔断器未打开）
 
         Returns:
             {provider_name: is_healthy}
         """
         return {
-            name: provider.health_check()
+            name: provider.health_check() and (self.breakers is None or self.breakers.is_available(name))
             for name, provider in self.providers.items()
         }
 
@@ -169,21 +385,21 @@ class LLMClient:
 
         # 配置GLM
         if settings.llm.glm_api_key:
-            providers["glm"] = LLMFactory.create("glm", {
+            providers["glm"] = cls._create_provider(settings, "glm", {
                 "api_key": settings.llm.glm_api_key,
                 "base_url": settings.llm.glm_base_url,
             })
 
         # 配置OpenAI
         if settings.llm.openai_api_key:
-            providers["openai"] = LLMFactory.create("openai", {
+            providers["openai"] = cls._create_provider(settings, "openai", {
                 "api_key": settings.llm.openai_api_key,
                 "base_url": settings.llm.openai_base_url,
             })
 
         # 配置OpenRouter
         if settings.llm.openrouter_api_key:
-            providers["openrouter"] = LLMFactory.create("openrouter", {
+            providers["openrouter"] = cls._create_provider(settings, "openrouter", {
                 "api_key": settings.llm.openrouter_api_key,
                 "base_url": settings.llm.openrouter_base_url,
                 "referrer": settings.llm.openrouter_referrer,
@@ -192,21 +408,83 @@ class LLMClient:
 
         # 配置MiniMax
         if settings.llm.minimax_api_key:
-            providers["minimax"] = LLMFactory.create("minimax", {
+            providers["minimax"] = cls._create_provider(settings, "minimax", {
                 "api_key": settings.llm.minimax_api_key,
                 "base_url": settings.llm.minimax_base_url,
             })
 
         # 配置SiliconFlow
         if settings.llm.siliconflow_api_key:
-            providers["siliconflow"] = LLMFactory.create("siliconflow", {
+            providers["siliconflow"] = cls._create_provider(settings, "siliconflow", {
                 "api_key": settings.llm.siliconflow_api_key,
+                "base_url": settings.llm.siliconflow_base_url,
             })
 
-        if not providers:
+        cache = ResponseCache.from_settings(settings)
+
+        # replay 模式只读缓存，不需要任何API密钥
+        if not providers and not (cache and cache.replay):
             raise RuntimeError(
                 "No LLM providers configured. "
                 "Please set at least one API key in configuration."
             )
 
-        return cls(providers)
+        from src.config.loader import model_registry
+
+        limiter = LLMLimiter.from_config(model_registry.rate_limits, settings)
+        hedging = HedgePolicy.from_config(model_registry.hedging, settings)
+        breakers = BreakerRegistry.from_settings(settings)
+        routing = RoutingTable.from_registry(providers, model_registry)
+        return cls(providers, limiter=limiter, cache=cache, hedging=hedging, breakers=breakers, routing=routing)
+
+    @staticmethod
+    def _create_provider(settings, name: str, config: Dict[str, Any]) -> LLMProvider:
+        """
+        创建提供商；api_key 或 base_url 用逗号分隔多个值时创建密钥池
+
+        多个密钥和多个地址按顺序一一对应；只有一个时所有成员共用。
+        权重、每个密钥的 rpm/tpm 和选择策略见 models.yaml 的 key_pools 段。
+        """
+        keys = split_list(config.get("api_key"))
+        urls = split_list(config.get("base_url")) or [None]
+        if len(keys) <= 1 and len(urls) <= 1:
+            return LLMFactory.create(name, config)
+
+        if len(keys) == 1:
+            keys = keys * len(urls)
+        elif len(urls) == 1:
+            urls = urls * len(keys)
+        elif len(keys) != len(urls):
+            raise ValueError(
+                f"Provider '{name}': {len(keys)} API keys but {len(urls)} base URLs; "
+                "counts must match or one of them must be a single value"
+            )
+
+        from src.config.loader import model_registry
+
+        pool_config = (model_registry.key_pools.get("providers") or {}).get(name) or {}
+        weights = pool_config.get("weights") or []
+        members = [
+            PoolMember(
+                LLMFactory.create(name, {**config, "api_key": key, "base_url": url}),
+                weight=weights[index] if index < len(weights) else 1,
+                rpm=pool_config.get("rpm"),
+                tpm=pool_config.get("tpm"),
+            )
+            for index, (key, url) in enumerate(zip(keys, urls))
+        ]
+        return ProviderPool(
+            name,
+            members,
+            strategy=pool_config.get("strategy") or settings.llm.key_pool_strategy,
+            cooldown=settings.llm.key_pool_cooldown,
+            completion_tokens=settings.llm.rate_limit_completion_tokens,
+        )
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """使用密钥池的提供商各成员的用量"""
+        return {
+            name: provider.get_stats()
+            for name, provider in self.providers.items()
+            if isinstance(provider, ProviderPool)
+        }
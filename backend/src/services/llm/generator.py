@@ -17,13 +17,20 @@ LLM生成器
 LLM Generator - 处理提示词模板和LLM调用
 """
 
-from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import functools
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import jinja2
 
-from src.config import RETRIES
 from src.core.models.logs import LmLog
-from src.utils.helpers import parse_json
+from src.services.llm.retry import ErrorKind, RetryPolicy, classify_error, default_retry_policy
+from src.utils.helpers import JsonFieldStream, parse_json
+from src.utils.log import Preview, get_logger
+
+logger = get_logger("llm")
 
 
 # 全局LLM客户端（将通过依赖注入设置）
@@ -46,6 +53,21 @@ def get_global_llm_client():
     return _global_llm_client
 
 
+# 共享的Jinja2环境，配置与 jinja2.Template(...) 的默认环境一致，渲染结果不变
+_jinja_env = jinja2.Environment()
+
+
+@functools.lru_cache(maxsize=64)
+def get_template(prompt_template: str) -> jinja2.Template:
+    """
+    获取编译后的模板（按模板字符串缓存）
+
+    ACTION_PROMPTS_AND_SCHEMAS 中每个行动对应一个固定的模板字符串，
+    因此每个行动的模板只在第一次使用时解析和编译一次。
+    """
+    return _jinja_env.from_string(prompt_template)
+
+
 def format_prompt(prompt_template: str, worldstate: Dict[str, Any]) -> str:
     """
     使用Jinja2渲染提示词模板
@@ -57,7 +79,136 @@ def format_prompt(prompt_template: str, worldstate: Dict[str, Any]) -> str:
     Returns:
         渲染后的提示词
     """
-    return jinja2.Template(prompt_template).render(worldstate)
+    return get_template(prompt_template).render(worldstate)
+
+
+# 强制中文的系统消息
+SYSTEM_MESSAGE = "你必须使用纯中文回答所有问题。你是狼人杀游戏的AI玩家，所有发言、推理和互动都必须使用中文。返回的JSON格式响应中，所有字段值都必须是中文内容，不允许使用任何英文单词。请确保你的回答完全是中文格式，包括JSON中的所有字符串值。"
+
+
+def _handle_response(
+    raw_resp: str,
+    prompt: str,
+    allowed_values: Optional[List[Any]],
+    result_key: Optional[str],
+) -> Tuple[bool, Any, LmLog]:
+    """
+    解析并验证一次LLM响应
+
+    Returns:
+        (accepted, result, log) 元组，accepted 为 False 时需要重试
+    """
+    if raw_resp:
+        # 完整的原始响应只在 debug 级别输出
+        logger.debug("response", length=len(raw_resp), raw=Preview(raw_resp, 4000))
+    else:
+        logger.warning("empty_response")
+
+    # 解析JSON响应
+    result = parse_json(raw_resp)
+
+    # 某些模型可能返回数组，转换为字典
+    if isinstance(result, list):
+        first_dict = next((it for it in result if isinstance(it, dict)), None)
+        result = first_dict if first_dict is not None else {"value": result}
+
+    # 创建日志
+    log = LmLog(prompt=prompt, raw_resp=raw_resp, result=result)
+
+    # 提取特定键
+    if result_key:
+        if isinstance(result, dict):
+            result = result.get(result_key)
+        else:
+            # 非字典结果无法提取键，触发重试
+            logger.warning("result_not_dict", key=result_key, result_type=type(result).__name__)
+            result = None
+
+    # 验证结果
+    if allowed_values is None or result in allowed_values:
+        logger.debug("result_accepted", result=Preview(result, 200))
+        return True, result, log
+
+    # 先在本地修复（大小写、多余标点、在句子中提到选项等），避免再调用一次LLM
+    repaired = repair_result(raw_resp, result, result_key, allowed_values)
+    if repaired is not None:
+        logger.info("result_repaired", result=Preview(result), repaired=repaired)
+        return True, repaired, log
+
+    # 结果不在允许值中，记录并重试
+    logger.warning("result_rejected", result=Preview(result), allowed=allowed_values)
+    return False, result, log
+
+
+def repair_result(
+    raw_resp: Optional[str],
+    result: Any,
+    result_key: Optional[str],
+    allowed_values: List[Any],
+) -> Optional[Any]:
+    """
+    尝试把不符合要求的结果修复为某个允许值
+
+    只做格式上的修复：去掉首尾空白、引号和标点，忽略大小写，把 "4" / 4.0 转换为允许值 4；
+    修复后必须与某个允许值完全相同（"44"、"-1" 不会被当作 4、1）。
+
+    Returns:
+        修复后的允许值；无法确定时返回 None
+    """
+    candidate = result
+    if candidate is None and result_key and raw_resp:
+        # JSON解析失败或缺少键：直接在原文中找 "key": "value"
+        match = re.search(
+            rf'["\']?{re.escape(result_key)}["\']?\s*[:：]\s*["\']?([^"\'\n,，}}]+)', raw_resp
+        )
+        if match:
+            candidate = match.group(1)
+    if candidate is None or isinstance(candidate, (dict, list)):
+        return None
+
+    text = str(candidate).strip().strip("\"'“”‘’。.,，!！ ")
+    by_text = {str(value): value for value in allowed_values}
+    if text in by_text:
+        return by_text[text]
+    lowered = {key.lower(): value for key, value in by_text.items()}
+    if text.lower() in lowered:
+        return lowered[text.lower()]
+    # 数值选项（如出价）：4.0 -> 4
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    if number.is_integer():
+        return by_text.get(str(int(number)))
+    return None
+
+
+def _report_attempt_error(attempt: int, kind: ErrorKind, e: Exception, raw_resp: Optional[str]):
+    """输出一次失败尝试的调试信息"""
+    logger.warning(
+        "attempt_failed",
+        attempt=attempt + 1,
+        kind=kind.value,
+        error_type=type(e).__name__,
+        error=e,
+        response=Preview(raw_resp, 200) if raw_resp else None,
+    )
+    if raw_resp:
+        logger.debug("failed_response", raw=Preview(raw_resp, 4000))
+
+
+def _failed_result(
+    prompt: str, raw_responses: List[str], attempts: int, calls: List[Dict[str, Any]], started: float
+) -> Tuple[None, LmLog]:
+    """所有重试都失败时的返回值（仍记录已消耗的 token）"""
+    logger.error("all_attempts_failed", attempts=attempts)
+    log = LmLog(
+        prompt=prompt,
+        raw_resp="-------".join(raw_responses),
+        result=None
+    )
+    log.record_usage(calls, attempts, time.monotonic() - started)
+    return None, log
 
 
 def generate(
@@ -69,6 +220,7 @@ def generate(
     allowed_values: Optional[List[Any]] = None,
     result_key: Optional[str] = None,
     llm_client=None,
+    retry_policy: Optional[RetryPolicy] = None,
 ) -> Tuple[Any, LmLog]:
     """
     使用LLM生成文本并解析结果
@@ -82,6 +234,7 @@ def generate(
         allowed_values: 允许的值列表（用于验证）
         result_key: 从结果中提取的键
         llm_client: LLM客户端（可选，不提供则使用全局客户端）
+        retry_policy: 重试策略（可选，默认按配置创建）
 
     Returns:
         (result, log) 元组
@@ -93,81 +246,43 @@ def generate(
     # 渲染提示词
     prompt = format_prompt(prompt_template, worldstate)
     raw_responses = []
+    calls: List[Dict[str, Any]] = []  # 每次调用的 call_meta（token 数和耗时）
+    started = time.monotonic()
 
-    # 重试逻辑
-    for attempt in range(RETRIES):
+    # 重试逻辑：按错误类型决定是否重试和等待多久
+    retry = (retry_policy or default_retry_policy).begin()
+    while True:
         raw_resp = None
+        error = None
         try:
-            # 添加强制中文系统消息
-            system_message = "你必须使用纯中文回答所有问题。你是狼人杀游戏的AI玩家，所有发言、推理和互动都必须使用中文。返回的JSON格式响应中，所有字段值都必须是中文内容，不允许使用任何英文单词。请确保你的回答完全是中文格式，包括JSON中的所有字符串值。"
-
-            # 详细的调试日志
-            print(f"[LLM调用] 第{attempt + 1}/{RETRIES}次尝试 | 模型: {model} | 温度: {temperature:.2f}")
+            logger.debug("attempt", attempt=retry.attempts + 1, model=model, temperature=temperature)
 
             # 调用LLM
+            call_meta = {}
+            calls.append(call_meta)
             raw_resp = llm_client.call(
                 model=model,
                 prompt=prompt,
                 temperature=temperature,
                 json_mode=True,
                 response_schema=response_schema,
-                system_message=system_message,
+                system_message=SYSTEM_MESSAGE,
+                # 重试时需要新的响应，不读取缓存
+                use_cache=retry.attempts == 0,
+                call_meta=call_meta,
             )
 
-            print(f"[LLM响应] 成功获取响应，长度: {len(raw_resp) if raw_resp else 0} 字符")
-
-            # 完整输出LLM原始响应用于调试
-            if raw_resp:
-                print(f"[LLM原始响应开始]")
-                print(raw_resp)
-                print(f"[LLM原始响应结束]")
-            else:
-                print(f"[LLM警告] 原始响应为空")
-
-            print(f"[JSON解析] 开始解析响应...")
-            # 解析JSON响应
-            result = parse_json(raw_resp)
-            print(f"[JSON解析] 解析完成，结果类型: {type(result)}, 内容: {result}")
-
-            # 某些模型可能返回数组，转换为字典
-            if isinstance(result, list):
-                first_dict = next((it for it in result if isinstance(it, dict)), None)
-                result = first_dict if first_dict is not None else {"value": result}
-
-            # 创建日志
-            log = LmLog(prompt=prompt, raw_resp=raw_resp, result=result)
-
-            # 提取特定键
-            if result_key:
-                if isinstance(result, dict):
-                    result = result.get(result_key)
-                    print(f"[LLM结果] 提取键 '{result_key}': {result}")
-                else:
-                    # 非字典结果无法提取键，触发重试
-                    print(f"[LLM警告] 结果不是字典类型，无法提取键 '{result_key}'，将重试")
-                    result = None
-
-            # 验证结果
-            if allowed_values is None or result in allowed_values:
-                print(f"[LLM成功] 返回有效结果: {result}")
+            accepted, result, log = _handle_response(raw_resp, prompt, allowed_values, result_key)
+            log.record_call(call_meta)
+            if accepted:
+                log.record_usage(calls, retry.attempts + 1, time.monotonic() - started)
                 return result, log
-
-            # 结果不在允许值中，记录并重试
-            print(f"[LLM警告] 结果 '{result}' 不在允许值 {allowed_values} 中，将重试...")
+            kind = ErrorKind.INVALID
 
         except Exception as e:
-            print(f"[LLM调用错误] 第{attempt + 1}/{RETRIES}次失败: {type(e).__name__}: {e}")
-            print(f"[错误详情] 这是一个LLM调用异常，不是JSON解析异常")
-
-            if raw_resp:
-                print(f"[LLM错误时的完整响应开始]")
-                print(raw_resp)
-                print(f"[LLM错误时的完整响应结束]")
-                # 截取响应的前200个字符用于调试
-                resp_snippet = str(raw_resp)[:200].replace('\n', ' ')
-                print(f"[LLM响应片段] {resp_snippet}")
-            else:
-                print(f"[LLM错误] 没有获取到任何响应内容")
+            error = e
+            kind = classify_error(e)
+            _report_attempt_error(retry.attempts, kind, e, raw_resp)
 
             # 增加温度以获得更多样化的输出
             temperature = min(1.0, temperature + 0.2)
@@ -175,10 +290,108 @@ def generate(
             # 保存响应以备后用
             raw_responses.append(raw_resp if isinstance(raw_resp, str) else "")
 
+        delay = retry.next_delay(kind, error)
+        if delay is None:
+            break
+        if delay > 0:
+            time.sleep(delay)
+
     # 所有重试都失败
-    print(f"[LLM失败] 所有{RETRIES}次重试均失败，返回None")
-    return None, LmLog(
-        prompt=prompt,
-        raw_resp="-------".join(raw_responses),
-        result=None
-    )
+    return _failed_result(prompt, raw_responses, retry.attempts, calls, started)
+
+
+async def _astream_call(
+    llm_client,
+    on_delta: Callable[[str, int], None],
+    stream_key: Optional[str],
+    attempt: int,
+    **call_kwargs,
+) -> str:
+    """流式调用一次LLM，把增量（或 stream_key 字段的增量）交给 on_delta，返回完整响应"""
+    extractor = JsonFieldStream(stream_key) if stream_key else None
+    parts = []
+    async for chunk in llm_client.astream(**call_kwargs):
+        parts.append(chunk)
+        delta = extractor.feed(chunk) if extractor else chunk
+        if delta:
+            on_delta(delta, attempt)
+    return "".join(parts)
+
+
+async def agenerate(
+    prompt_template: str,
+    response_schema: Dict[str, Any],
+    worldstate: Dict[str, Any],
+    model: str,
+    temperature: float = 1.0,
+    allowed_values: Optional[List[Any]] = None,
+    result_key: Optional[str] = None,
+    llm_client=None,
+    retry_policy: Optional[RetryPolicy] = None,
+    on_delta: Optional[Callable[[str, int], None]] = None,
+    stream_key: Optional[str] = None,
+) -> Tuple[Any, LmLog]:
+    """
+    generate 的异步版本，通过 LLMClient.acall 调用，不占用线程
+
+    其余参数和返回值与 generate 相同。
+
+    Args:
+        on_delta: 提供时改为流式调用，每收到一段文本调用 on_delta(增量, 第几次尝试)；
+            重试时尝试序号增加，之前推送的增量作废
+        stream_key: 只推送响应JSON中该字符串字段的内容（如发言的 "say"）
+    """
+    if llm_client is None:
+        llm_client = get_global_llm_client()
+
+    prompt = format_prompt(prompt_template, worldstate)
+    raw_responses = []
+    calls: List[Dict[str, Any]] = []
+    started = time.monotonic()
+
+    retry = (retry_policy or default_retry_policy).begin()
+    while True:
+        raw_resp = None
+        error = None
+        try:
+            logger.debug("attempt", attempt=retry.attempts + 1, model=model, temperature=temperature)
+
+            call_meta = {}
+            calls.append(call_meta)
+            call_kwargs = dict(
+                model=model,
+                prompt=prompt,
+                temperature=temperature,
+                json_mode=True,
+                response_schema=response_schema,
+                system_message=SYSTEM_MESSAGE,
+                # 重试时需要新的响应，不读取缓存
+                use_cache=retry.attempts == 0,
+                call_meta=call_meta,
+            )
+            if on_delta is None:
+                raw_resp = await llm_client.acall(**call_kwargs)
+            else:
+                raw_resp = await _astream_call(llm_client, on_delta, stream_key, retry.attempts, **call_kwargs)
+
+            accepted, result, log = _handle_response(raw_resp, prompt, allowed_values, result_key)
+            log.record_call(call_meta)
+            if accepted:
+                log.record_usage(calls, retry.attempts + 1, time.monotonic() - started)
+                return result, log
+            kind = ErrorKind.INVALID
+
+        except Exception as e:
+            error = e
+            kind = classify_error(e)
+            _report_attempt_error(retry.attempts, kind, e, raw_resp)
+            temperature = min(1.0, temperature + 0.2)
+            raw_responses.append(raw_resp if isinstance(raw_resp, str) else "")
+
+        delay = retry.next_delay(kind, error)
+        if delay is None:
+            break
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    return _failed_result(prompt, raw_responses, retry.attempts, calls, started)
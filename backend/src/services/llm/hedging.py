@@ -0,0 +1,170 @@
+"""
+LLM对冲请求与故障转移
+Hedged requests and failover between equivalent models
+
+默认关闭（LLM__HEDGE_ENABLED=true 开启），等价模型在 models.yaml 的 hedging 段配置：
+
+- 对冲：一次调用超过该模型最近观测到的p95延迟仍未返回时，向第一个等价模型再发一份
+  请求，取先成功返回的结果，另一份被取消
+- 故障转移：一个模型连续失败 LLM__HEDGE_FAILOVER_THRESHOLD 次后，在冷却时间内
+  直接先调用等价模型（原模型作为对冲备选）
+
+两者都只用于异步的 LLMClient.acall；同步 call 和流式 astream 总是只调用请求的模型。
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+
+class LatencyTracker:
+    """单个模型最近若干次成功调用的延迟"""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))
+        return ordered[index]
+
+
+class _ModelHealth:
+    __slots__ = ("latency", "consecutive_failures", "last_failure", "calls", "failures")
+
+    def __init__(self, window: int):
+        self.latency = LatencyTracker(window)
+        self.consecutive_failures = 0
+        self.last_failure = 0.0
+        self.calls = 0
+        self.failures = 0
+
+
+class HedgePolicy:
+    """对冲和故障转移策略（线程安全）
+
+    Args:
+        equivalents: {"provider/model": ["provider/model", ...]}，可互相替代的模型
+        percentile: 超过该分位的延迟时发出对冲请求
+        min_samples: 样本数不足时使用 initial_delay
+        initial_delay: 没有足够延迟样本时的对冲等待秒数
+        min_delay: 对冲等待的下限
+        failover_threshold: 连续失败多少次后优先使用等价模型
+        failover_cooldown: 故障转移持续的秒数，之后重新先试原模型
+        window: 每个模型保留的延迟样本数
+    """
+
+    def __init__(self, equivalents: Dict[str, List[str]], percentile: float = 0.95,
+                 min_samples: int = 20, initial_delay: float = 10.0, min_delay: float = 1.0,
+                 failover_threshold: int = 3, failover_cooldown: float = 60.0, window: int = 200):
+        self.equivalents = {model: list(alternatives) for model, alternatives in (equivalents or {}).items()
+                            if alternatives}
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.failover_threshold = failover_threshold
+        self.failover_cooldown = failover_cooldown
+        self.window = window
+        self._models: Dict[str, _ModelHealth] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0}
+        self._winners: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, hedging: Dict[str, Any], settings) -> Optional["HedgePolicy"]:
+        """从 models.yaml 的 hedging 段和 settings.llm 创建；未开启时返回 None"""
+        if not settings.llm.hedge_enabled:
+            return None
+        return cls(
+            equivalents=hedging.get("equivalents") or {},
+            percentile=settings.llm.hedge_percentile,
+            min_samples=settings.llm.hedge_min_samples,
+            initial_delay=settings.llm.hedge_initial_delay,
+            min_delay=settings.llm.hedge_min_delay,
+            failover_threshold=settings.llm.hedge_failover_threshold,
+            failover_cooldown=settings.llm.hedge_failover_cooldown,
+        )
+
+    def _health(self, model: str) -> _ModelHealth:
+        health = self._models.get(model)
+        if health is None:
+            health = self._models[model] = _ModelHealth(self.window)
+        return health
+
+    def _failed_over(self, health: _ModelHealth) -> bool:
+        return (health.consecutive_failures >= self.failover_threshold
+                and time.monotonic() - health.last_failure < self.failover_cooldown)
+
+    def candidates(self, model: str) -> List[str]:
+        """按调用顺序返回模型列表（第一个为主调用，其余为对冲备选）"""
+        alternatives = self.equivalents.get(model)
+        if not alternatives:
+            return [model]
+        with self._lock:
+            if self._failed_over(self._health(model)):
+                self._stats["failovers"] += 1
+                return alternatives + [model]
+        return [model] + alternatives
+
+    def delay(self, model: str) -> float:
+        """主调用等待多久后发出对冲请求"""
+        with self._lock:
+            latency = self._health(model).latency
+            if len(latency.samples) < self.min_samples:
+                return self.initial_delay
+            return max(self.min_delay, latency.percentile(self.percentile))
+
+    def record_success(self, model: str, seconds: float) -> None:
+        with self._lock:
+            health = self._health(model)
+            health.calls += 1
+            health.consecutive_failures = 0
+            health.latency.add(seconds)
+
+    def record_failure(self, model: str) -> None:
+        with self._lock:
+            health = self._health(model)
+            health.calls += 1
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_failure = time.monotonic()
+
+    def record_call(self, primary: str, winner: str, hedged: bool) -> None:
+        with self._lock:
+            self._stats["calls"] += 1
+            if hedged:
+                self._stats["hedged"] += 1
+                if winner != primary:
+                    self._stats["hedge_wins"] += 1
+            self._winners[winner] = self._winners.get(winner, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """对冲率、各模型胜出次数和延迟分位"""
+        with self._lock:
+            calls = self._stats["calls"]
+            models = {}
+            for model, health in self._models.items():
+                p50 = health.latency.percentile(0.5)
+                p95 = health.latency.percentile(self.percentile)
+                models[model] = {
+                    "calls": health.calls,
+                    "failures": health.failures,
+                    "consecutive_failures": health.consecutive_failures,
+                    "failed_over": self._failed_over(health),
+                    "p50_seconds": round(p50, 3) if p50 is not None else None,
+                    "p95_seconds": round(p95, 3) if p95 is not None else None,
+                }
+            return {
+                **self._stats,
+                "hedge_rate": round(self._stats["hedged"] / calls, 3) if calls else 0.0,
+                "winners": dict(self._winners),
+                "models": models,
+            }
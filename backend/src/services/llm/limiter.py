@@ -0,0 +1,365 @@
+"""
+LLM调用准入控制
+Per-provider / per-model concurrency and rate limiting for LLMClient
+
+每个提供商、每个模型可以分别配置：
+- max_concurrency: 同时进行中的请求数上限
+- rpm: 每分钟请求数
+- tpm: 每分钟token数（按提示词和响应长度估算）
+
+超过限制的调用按到达顺序排队等待，而不是直接失败；同步调用（线程）和
+异步调用（事件循环）共用同一个公平队列。配置见 models.yaml 的 rate_limits 段。
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from src.utils.helpers import estimate_tokens
+
+
+class _Waiter:
+    __slots__ = ("event", "future", "loop", "granted")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._set_result)
+
+    def _set_result(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class FairSemaphore:
+    """先到先得的信号量，线程和协程都可以等待
+
+    释放时直接把名额交给队首的等待者，后来者不能插队。
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._available = limit
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def in_use(self) -> int:
+        return self.limit - self._available
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _try_acquire(self, waiter: _Waiter) -> bool:
+        with self._lock:
+            if self._available > 0 and not self._waiters:
+                self._available -= 1
+                return True
+            self._waiters.append(waiter)
+            return False
+
+    def acquire(self) -> None:
+        waiter = _Waiter()
+        if not self._try_acquire(waiter):
+            waiter.event.wait()
+
+    async def aacquire(self) -> None:
+        waiter = _Waiter(asyncio.get_running_loop())
+        if self._try_acquire(waiter):
+            return
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                # 名额已经交给了这个等待者，转交给下一个
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+            else:
+                self._available += 1
+                return
+        waiter.wake()
+
+
+class TokenBucket:
+    """预约式令牌桶：按到达顺序预约令牌，返回需要等待的秒数"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """预约 amount 个令牌（允许透支），返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # 单次请求超过桶容量时按容量计，避免永远等不到
+            self._tokens -= min(amount, self.capacity)
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def wait_time(self, amount: float) -> float:
+        """预约 amount 个令牌需要等待的秒数（只查询，不预约）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            deficit = min(amount, self.capacity) - self._tokens
+            return max(0.0, deficit / self.rate)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def adjust(self, amount: float) -> None:
+        """请求完成后按实际用量修正（amount 为多用的令牌数，可为负）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+class RateLimit:
+    """单个提供商或模型的限制和统计"""
+
+    def __init__(self, key: str, max_concurrency: Optional[int] = None,
+                 rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.key = key
+        self.semaphore = FairSemaphore(max_concurrency) if max_concurrency else None
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waited_calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.in_flight = 0
+
+    def reserve(self, tokens: int) -> float:
+        delay = 0.0
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return delay
+
+    def record(self, wait: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait > 0.001:
+                self.waited_calls += 1
+
+    def done(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": self.semaphore.limit if self.semaphore else None,
+                "rpm": round(self.requests.rate * 60) if self.requests else None,
+                "tpm": round(self.tokens.rate * 60) if self.tokens else None,
+                "in_flight": self.in_flight,
+                "queued": self.semaphore.queued if self.semaphore else 0,
+                "calls": self.calls,
+                "waited_calls": self.waited_calls,
+                "total_wait_seconds": round(self.total_wait, 3),
+                "avg_wait_seconds": round(self.total_wait / self.calls, 3) if self.calls else 0.0,
+                "max_wait_seconds": round(self.max_wait, 3),
+            }
+
+
+class Ticket:
+    """一次已获准的调用，完成后用实际响应修正token预估；没有响应时退还未用的预约"""
+
+    def __init__(self, limits: List[RateLimit], estimated_tokens: int, completion_tokens: int):
+        self.limits = limits
+        self.estimated_tokens = estimated_tokens
+        self.prompt_tokens = estimated_tokens - completion_tokens
+        self.settled = False
+
+    def record_response(self, text: Optional[str]) -> None:
+        self.settled = True
+        extra = self.prompt_tokens + estimate_tokens(text) - self.estimated_tokens
+        for limit in self.limits:
+            if limit.tokens:
+                limit.tokens.adjust(extra)
+
+    def refund(self, sent: bool) -> None:
+        """
+        调用被取消或失败、没有记录响应时退还预约
+
+        Args:
+            sent: 请求是否已发出（已发出时只退还为响应预留的token，否则全部退还）
+        """
+        if self.settled:
+            return
+        self.settled = True
+        unused = self.estimated_tokens - (self.prompt_tokens if sent else 0)
+        for limit in self.limits:
+            if limit.tokens:
+                limit.tokens.adjust(-unused)
+            if limit.requests and not sent:
+                limit.requests.adjust(-1)
+
+
+class LLMLimiter:
+    """按提供商和模型进行准入控制
+
+    Args:
+        providers: {provider_name: {"max_concurrency": n, "rpm": n, "tpm": n}}
+        models: {"provider/model": {...}}，同样的字段
+        default: 未单独配置的提供商使用的限制
+        completion_tokens: 预约TPM时为响应预留的token数
+    """
+
+    def __init__(self, providers: Optional[Dict[str, Dict[str, Any]]] = None,
+                 models: Optional[Dict[str, Dict[str, Any]]] = None,
+                 default: Optional[Dict[str, Any]] = None,
+                 completion_tokens: int = 512):
+        self.completion_tokens = completion_tokens
+        self._default = {k: v for k, v in (default or {}).items() if v}
+        self._limits: Dict[str, RateLimit] = {}
+        self._lock = threading.Lock()
+        for name, config in (providers or {}).items():
+            self._limits[f"provider:{name}"] = RateLimit(name, **config)
+        for name, config in (models or {}).items():
+            self._limits[f"model:{name}"] = RateLimit(name, **config)
+
+    @classmethod
+    def from_config(cls, rate_limits: Dict[str, Any], settings) -> "LLMLimiter":
+        """从 models.yaml 的 rate_limits 段和 settings.llm 的默认值创建"""
+        return cls(
+            providers=rate_limits.get("providers"),
+            models=rate_limits.get("models"),
+            default={
+                "max_concurrency": settings.llm.default_max_concurrency,
+                "rpm": settings.llm.default_rpm,
+                "tpm": settings.llm.default_tpm,
+            },
+            completion_tokens=settings.llm.rate_limit_completion_tokens,
+        )
+
+    def _limits_for(self, provider: str, model: str) -> List[RateLimit]:
+        """模型级限制在前、提供商级限制在后（固定顺序获取，避免死锁）"""
+        with self._lock:
+            limits = []
+            model_limit = self._limits.get(f"model:{model}")
+            if model_limit:
+                limits.append(model_limit)
+            provider_limit = self._limits.get(f"provider:{provider}")
+            if provider_limit is None:
+                provider_limit = self._limits[f"provider:{provider}"] = RateLimit(provider, **self._default)
+            limits.append(provider_limit)
+            return limits
+
+    def _ticket(self, limits: List[RateLimit], prompt: str) -> Ticket:
+        return Ticket(limits, estimate_tokens(prompt) + self.completion_tokens, self.completion_tokens)
+
+    @contextmanager
+    def limit(self, provider: str, model: str, prompt: str) -> Iterator[Ticket]:
+        """同步调用的准入（阻塞当前线程直到获准）"""
+        limits = self._limits_for(provider, model)
+        ticket = self._ticket(limits, prompt)
+        start = time.monotonic()
+        acquired: List[RateLimit] = []
+        reserved = sent = False
+        try:
+            for limit in limits:
+                if limit.semaphore:
+                    limit.semaphore.acquire()
+                acquired.append(limit)
+            delay = max(limit.reserve(ticket.estimated_tokens) for limit in limits)
+            reserved = True
+            if delay > 0:
+                time.sleep(delay)
+            wait = time.monotonic() - start
+            for limit in limits:
+                limit.record(wait)
+            sent = True
+            try:
+                yield ticket
+            finally:
+                for limit in limits:
+                    limit.done()
+        finally:
+            # 等待中被取消、或调用没有返回响应时，退还未用的令牌
+            if reserved:
+                ticket.refund(sent)
+            for limit in acquired:
+                if limit.semaphore:
+                    limit.semaphore.release()
+
+    @asynccontextmanager
+    async def alimit(self, provider: str, model: str, prompt: str):
+        """异步调用的准入（在事件循环中排队，不占用线程）"""
+        limits = self._limits_for(provider, model)
+        ticket = self._ticket(limits, prompt)
+        start = time.monotonic()
+        acquired: List[RateLimit] = []
+        reserved = sent = False
+        try:
+            for limit in limits:
+                if limit.semaphore:
+                    await limit.semaphore.aacquire()
+                acquired.append(limit)
+            delay = max(limit.reserve(ticket.estimated_tokens) for limit in limits)
+            reserved = True
+            if delay > 0:
+                await asyncio.sleep(delay)
+            wait = time.monotonic() - start
+            for limit in limits:
+                limit.record(wait)
+            sent = True
+            try:
+                yield ticket
+            finally:
+                for limit in limits:
+                    limit.done()
+        finally:
+            # 等待中被取消、或调用没有返回响应时，退还未用的令牌
+            if reserved:
+                ticket.refund(sent)
+            for limit in acquired:
+                if limit.semaphore:
+                    limit.semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """每个提供商/模型的限制、排队情况和等待时间"""
+        with self._lock:
+            items = list(self._limits.items())
+        stats: Dict[str, Dict[str, Any]] = {"providers": {}, "models": {}}
+        for key, limit in items:
+            kind, name = key.split(":", 1)
+            stats[f"{kind}s"][name] = limit.get_stats()
+        return stats
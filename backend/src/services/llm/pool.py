@@ -0,0 +1,259 @@
+"""
+LLM多密钥/多端点负载均衡
+Pool of API keys / endpoints behind a single provider
+
+LLM__<PROVIDER>_API_KEY 可以用逗号分隔多个密钥（LLM__<PROVIDER>_BASE_URL 也可以用逗号分隔，
+与密钥一一对应），此时该提供商由 ProviderPool 代理，每次调用选择一个成员：
+
+- least_outstanding（默认）：进行中请求数 / 权重 最小的成员
+- weighted_round_robin：平滑加权轮询
+
+每个成员可以单独配置 rpm / tpm 限额（models.yaml 的 key_pools 段），选择时跳过限额已用完
+或正在冷却（429、认证失败）的成员；全部不可用时等待最早恢复的成员。
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.helpers import estimate_tokens
+
+from .base import LLMProvider
+from .limiter import TokenBucket
+from .retry import ErrorKind, classify_error, retry_after
+
+STRATEGIES = ("least_outstanding", "weighted_round_robin")
+
+
+def split_list(value: Optional[str]) -> List[str]:
+    """拆分逗号分隔的配置值"""
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+class PoolMember:
+    """池中的一个密钥/端点及其用量"""
+
+    def __init__(self, provider: LLMProvider, weight: int = 1,
+                 rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.provider = provider
+        self.weight = max(1, int(weight))
+        self.requests_bucket = TokenBucket(rpm) if rpm else None
+        self.tokens_bucket = TokenBucket(tpm) if tpm else None
+        self.current_weight = 0  # 平滑加权轮询的当前权重
+        self.in_flight = 0
+        self.requests = 0
+        self.tokens = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.cooldown_until = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """日志和统计中显示的名称（只保留密钥末尾4位）"""
+        key = self.provider.api_key or ""
+        return f"...{key[-4:]}" if len(key) > 4 else "***"
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        """按限额和冷却状态，调用前需要等待的秒数"""
+        wait = max(0.0, self.cooldown_until - now)
+        if self.requests_bucket:
+            wait = max(wait, self.requests_bucket.wait_time(1))
+        if self.tokens_bucket:
+            wait = max(wait, self.tokens_bucket.wait_time(tokens))
+        return wait
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "key": self.label,
+            "base_url": self.provider.base_url,
+            "weight": self.weight,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "tokens": self.tokens,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "cooldown_seconds": round(max(0.0, self.cooldown_until - now), 1),
+            "rpm_remaining": int(self.requests_bucket.available) if self.requests_bucket else None,
+            "tpm_remaining": int(self.tokens_bucket.available) if self.tokens_bucket else None,
+            "last_error": self.last_error,
+        }
+
+
+class ProviderPool(LLMProvider):
+    """把多个同类提供商实例（不同密钥或端点）作为一个提供商使用（线程安全）
+
+    Args:
+        name: 提供商名称
+        members: 池成员
+        strategy: least_outstanding 或 weighted_round_robin
+        cooldown: 成员被限流（无 Retry-After）或认证失败后暂停使用的秒数
+        completion_tokens: 预约TPM时为响应预留的token数
+    """
+
+    def __init__(self, name: str, members: Sequence[PoolMember], strategy: str = "least_outstanding",
+                 cooldown: float = 10.0, completion_tokens: int = 512):
+        if not members:
+            raise ValueError(f"Key pool for provider '{name}' has no members")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown key pool strategy: {strategy}. Available: {', '.join(STRATEGIES)}")
+        first = members[0].provider
+        super().__init__({"api_key": first.api_key, "base_url": first.base_url})
+        self.name = name
+        self.members = list(members)
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.completion_tokens = completion_tokens
+        self._lock = threading.Lock()
+
+    def _select(self, prompt: str) -> Tuple[PoolMember, float]:
+        """选择一个成员并占用其限额，返回 (成员, 调用前需要等待的秒数)"""
+        reserved = estimate_tokens(prompt) + self.completion_tokens
+        with self._lock:
+            now = time.monotonic()
+            waits = [(member.wait_time(reserved, now), member) for member in self.members]
+            ready = [member for wait, member in waits if wait <= 0]
+            if ready:
+                delay = 0.0
+                member = self._pick(ready)
+            else:
+                delay, member = min(waits, key=lambda item: item[0])
+            if member.requests_bucket:
+                member.requests_bucket.reserve(1)
+            if member.tokens_bucket:
+                member.tokens_bucket.reserve(reserved)
+            member.in_flight += 1
+            member.requests += 1
+            member.tokens += estimate_tokens(prompt)
+        return member, delay
+
+    def _pick(self, ready: List[PoolMember]) -> PoolMember:
+        if self.strategy == "least_outstanding":
+            return min(ready, key=lambda member: (member.in_flight / member.weight, member.requests))
+        # 平滑加权轮询：每个成员加上自己的权重，选当前权重最大的，再减去总权重
+        total = 0
+        for member in ready:
+            member.current_weight += member.weight
+            total += member.weight
+        member = max(ready, key=lambda member: member.current_weight)
+        member.current_weight -= total
+        return member
+
+    def _record_response(self, member: PoolMember, text: Optional[str]) -> None:
+        tokens = estimate_tokens(text)
+        with self._lock:
+            member.tokens += tokens
+        if member.tokens_bucket:
+            member.tokens_bucket.adjust(tokens - self.completion_tokens)
+
+    @contextmanager
+    def _using(self, member: PoolMember):
+        """调用期间计入成员的进行中请求；失败时按错误类型冷却该成员"""
+        try:
+            yield
+        except Exception as e:
+            with self._lock:
+                member.errors += 1
+                member.last_error = f"{type(e).__name__}: {e}"[:200]
+                kind = classify_error(e)
+                if kind is ErrorKind.RATE_LIMIT or getattr(e, "status_code", None) in (401, 403):
+                    if kind is ErrorKind.RATE_LIMIT:
+                        member.rate_limited += 1
+                    wait = retry_after(e) if kind is ErrorKind.RATE_LIMIT else None
+                    member.cooldown_until = time.monotonic() + (wait if wait is not None else self.cooldown)
+            raise
+        finally:
+            with self._lock:
+                member.in_flight -= 1
+
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> str:
+        member, delay = self._select(prompt)
+        with self._using(member):
+            if delay > 0:
+                time.sleep(delay)
+            text = member.provider.generate(
+                model=model,
+                prompt=prompt,
+                temperature=temperature,
+                json_mode=json_mode,
+                response_schema=response_schema,
+                **kwargs
+            )
+            self._record_response(member, text)
+        return text
+
+    async def agenerate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> str:
+        member, delay = self._select(prompt)
+        with self._using(member):
+            if delay > 0:
+                await asyncio.sleep(delay)
+            text = await member.provider.agenerate(
+                model=model,
+                prompt=prompt,
+                temperature=temperature,
+                json_mode=json_mode,
+                response_schema=response_schema,
+                **kwargs
+            )
+            self._record_response(member, text)
+        return text
+
+    async def astream(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        member, delay = self._select(prompt)
+        parts = []
+        with self._using(member):
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async for delta in member.provider.astream(
+                model=model,
+                prompt=prompt,
+                temperature=temperature,
+                json_mode=json_mode,
+                response_schema=response_schema,
+                **kwargs
+            ):
+                parts.append(delta)
+                yield delta
+            self._record_response(member, "".join(parts))
+
+    def health_check(self) -> bool:
+        """任一成员健康即可用"""
+        return any(member.provider.health_check() for member in self.members)
+
+    def validate_config(self) -> bool:
+        return any(member.provider.validate_config() for member in self.members)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """每个成员的用量、限额余量和冷却状态"""
+        with self._lock:
+            return {
+                "strategy": self.strategy,
+                "members": [member.get_stats() for member in self.members],
+            }
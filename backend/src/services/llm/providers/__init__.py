@@ -3,6 +3,7 @@ LLM提供商模块
 LLM Providers Module
 """
 
+from .openai_compatible import OpenAICompatibleProvider
 from .openai import OpenAIProvider
 from .glm import GLMProvider
 from .openrouter import OpenRouterProvider
@@ -10,6 +11,7 @@ from .minimax import MiniMaxProvider
 from .siliconflow import SiliconFlowProvider
 
 __all__ = [
+    "OpenAICompatibleProvider",
     "OpenAIProvider",
     "GLMProvider",
     "OpenRouterProvider",
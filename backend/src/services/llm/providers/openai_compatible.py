@@ -0,0 +1,149 @@
+"""
+OpenAI兼容接口提供商基类
+Base class for OpenAI-compatible LLM Providers
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Dict, Any, AsyncIterator, List, Optional
+
+from openai import OpenAI, AsyncOpenAI
+
+from ..base import LLMProvider
+from ..transport import http_pool
+from ..usage import record_usage
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """OpenAI兼容接口提供商基类
+
+    GLM、MiniMax、OpenRouter、硅基流动等都提供OpenAI兼容的接口，
+    请求构造、同步/异步调用逻辑统一放在这里，子类只需声明默认地址和健康检查。
+    """
+
+    # 子类覆盖：未配置base_url时使用的默认地址
+    default_base_url: Optional[str] = None
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.base_url = self.base_url or self.default_base_url
+        self.default_headers = self._build_default_headers()
+        # 同一base_url的所有提供商共用连接池
+        self.client = OpenAI(**self._client_kwargs(), http_client=http_pool.get_client(self.base_url))
+        # AsyncOpenAI 的连接池绑定在创建它的事件循环上，因此每个循环各自缓存一个
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._async_lock = threading.Lock()
+
+    def _build_default_headers(self) -> Dict[str, str]:
+        """额外的请求头（子类按需覆盖）"""
+        return {}
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        """构造OpenAI客户端参数"""
+        return {
+            "api_key": self.api_key,
+            "base_url": self.base_url,
+            "default_headers": self.default_headers or None,
+            # 重试由生成器的重试策略统一处理，避免SDK内部重试叠加
+            "max_retries": 0,
+        }
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        """获取当前事件循环对应的异步客户端"""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = AsyncOpenAI(
+                    **self._client_kwargs(), http_client=http_pool.get_async_client(self.base_url)
+                )
+                self._async_clients[loop] = client
+            return client
+
+    @staticmethod
+    def _build_messages(prompt: str, system_message: Optional[str]) -> List[Dict[str, str]]:
+        """构建消息数组"""
+        messages = []
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    @staticmethod
+    def _response_format(json_mode: bool) -> Dict[str, str]:
+        """设置响应格式"""
+        return {"type": "json_object"} if json_mode else {"type": "text"}
+
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """同步生成文本"""
+        response = self.client.chat.completions.create(
+            messages=self._build_messages(prompt, system_message),
+            response_format=self._response_format(json_mode),
+            model=model,
+            temperature=temperature,
+            **kwargs
+        )
+
+        record_usage(response)
+        return response.choices[0].message.content
+
+    async def agenerate(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """使用AsyncOpenAI异步生成文本，不占用线程"""
+        response = await self._get_async_client().chat.completions.create(
+            messages=self._build_messages(prompt, system_message),
+            response_format=self._response_format(json_mode),
+            model=model,
+            temperature=temperature,
+            **kwargs
+        )
+
+        record_usage(response)
+        return response.choices[0].message.content
+
+    async def astream(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float = 0.7,
+        json_mode: bool = True,
+        response_schema: Optional[Dict[str, Any]] = None,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """使用 stream=True 逐段返回生成的文本"""
+        stream = await self._get_async_client().chat.completions.create(
+            messages=self._build_messages(prompt, system_message),
+            response_format=self._response_format(json_mode),
+            model=model,
+            temperature=temperature,
+            stream=True,
+            **kwargs
+        )
+
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
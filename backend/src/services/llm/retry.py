@@ -0,0 +1,195 @@
+"""
+LLM调用重试策略
+Retry policy with error classification, backoff and per-session budgets
+
+- 限流（429）和传输错误（超时、连接失败、5xx）：指数退避 + 随机抖动，
+  服务器返回 Retry-After 时按其等待
+- 永久错误（认证失败、请求无效、找不到提供商等）：不重试
+- 响应无效（解析失败、结果不在允许值中）：生成器先在本地修复，修复失败才重新调用；
+  无法识别的错误（空响应、提供商返回格式异常等）同样按响应无效处理
+- 每局游戏一个重试预算，出问题的提供商不会让整体请求量成倍放大
+"""
+
+import contextvars
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, Optional
+
+import httpx
+import openai
+
+from src.config.settings import settings
+from src.services.llm.breaker import CircuitOpenError
+from src.services.llm.cache import CacheMissError
+from src.services.llm.routing import ProviderNotFoundError
+
+
+class ErrorKind(Enum):
+    RATE_LIMIT = "rate_limit"  # 429
+    TRANSIENT = "transient"    # 超时、连接错误、5xx
+    FATAL = "fatal"            # 认证失败、请求无效等，重试无意义
+    INVALID = "invalid"        # 响应无法解析或不符合要求
+
+
+def classify_error(error: BaseException) -> ErrorKind:
+    """判断一次失败属于哪一类"""
+    if isinstance(error, (CacheMissError, ProviderNotFoundError)):
+        # replay 模式下没有对应的响应、找不到提供商：重试也不会有结果
+        return ErrorKind.FATAL
+    if isinstance(error, CircuitOpenError):
+        # 熔断中：快速失败，不在同一次生成里等待恢复
+        return ErrorKind.FATAL
+    if isinstance(error, openai.RateLimitError):
+        return ErrorKind.RATE_LIMIT
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError,
+                          httpx.TimeoutException, httpx.TransportError,
+                          TimeoutError, ConnectionError)):
+        return ErrorKind.TRANSIENT
+    if isinstance(error, openai.APIStatusError):
+        status = error.status_code
+        if status == 429:
+            return ErrorKind.RATE_LIMIT
+        if status >= 500 or status in (408, 409):
+            return ErrorKind.TRANSIENT
+        return ErrorKind.FATAL
+    # 无法识别的错误（空响应、缺少 choices 等）：重新生成，次数受 max_attempts 限制
+    return ErrorKind.INVALID
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """从错误响应的 Retry-After / retry-after-ms 头读取建议等待秒数"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """一局游戏的重试预算（线程安全）"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.spent = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.spent >= self.limit:
+                self.denied += 1
+                return False
+            self.spent += 1
+            return True
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"limit": self.limit, "spent": self.spent, "denied": self.denied}
+
+
+# 当前游戏的重试预算；GameMaster 运行时设置，asyncio 任务和 to_thread 会自动继承
+current_retry_budget: contextvars.ContextVar[Optional[RetryBudget]] = contextvars.ContextVar(
+    "current_retry_budget", default=None
+)
+
+
+class RetryState:
+    """一次 generate 调用的重试状态"""
+
+    def __init__(self, policy: "RetryPolicy", budget: Optional[RetryBudget]):
+        self.policy = policy
+        self.budget = budget
+        self.attempts = 0
+        self.transport_retries = 0
+
+    def next_delay(self, kind: ErrorKind, error: Optional[BaseException] = None) -> Optional[float]:
+        """
+        记录一次失败并决定是否重试
+
+        Returns:
+            重试前需要等待的秒数；不再重试时返回 None
+        """
+        self.attempts += 1
+        if kind is ErrorKind.FATAL:
+            return None
+
+        if kind is ErrorKind.INVALID:
+            # 响应无效：重新生成的次数受 max_attempts 限制，不需要等待
+            if self.attempts >= self.policy.max_attempts:
+                return None
+            delay = 0.0
+        else:
+            if self.transport_retries >= self.policy.max_transport_retries:
+                return None
+            delay = self.policy.backoff(self.transport_retries, kind, error)
+            self.transport_retries += 1
+
+        if self.budget is not None and not self.budget.try_spend():
+            return None
+        return delay
+
+
+class RetryPolicy:
+    """
+    Args:
+        max_attempts: 响应无效时最多调用几次（含第一次）
+        max_transport_retries: 限流/传输错误最多重试几次
+        base_delay: 指数退避的基础秒数
+        max_delay: 单次退避的上限
+        max_retry_after: 服务器 Retry-After 的最长接受时间
+    """
+
+    def __init__(self, max_attempts: int = 2, max_transport_retries: int = 3,
+                 base_delay: float = 1.0, max_delay: float = 20.0, max_retry_after: float = 60.0):
+        self.max_attempts = max(1, max_attempts)
+        self.max_transport_retries = max_transport_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    @classmethod
+    def from_settings(cls, settings) -> "RetryPolicy":
+        return cls(
+            max_attempts=settings.game.retries,
+            max_transport_retries=settings.llm.retry_max_transport_retries,
+            base_delay=settings.llm.retry_base_delay,
+            max_delay=settings.llm.retry_max_delay,
+            max_retry_after=settings.llm.retry_max_retry_after,
+        )
+
+    def backoff(self, retry: int, kind: ErrorKind, error: Optional[BaseException] = None) -> float:
+        """第 retry 次重试前的等待时间（full jitter；限流时基础时间加倍）"""
+        if error is not None:
+            suggested = retry_after(error)
+            if suggested is not None:
+                return min(suggested, self.max_retry_after)
+        base = self.base_delay * (2 if kind is ErrorKind.RATE_LIMIT else 1)
+        return random.uniform(0, min(self.max_delay, base * (2 ** retry)))
+
+    def begin(self) -> RetryState:
+        return RetryState(self, current_retry_budget.get())
+
+
+default_retry_policy = RetryPolicy.from_settings(settings)
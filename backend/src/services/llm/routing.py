@@ -0,0 +1,155 @@
+"""
+LLM模型路由表
+Model routing table compiled from ModelRegistry / models.yaml
+
+模型ID到提供商的映射在创建客户端时编译一次，按以下顺序匹配：
+
+1. models.yaml 的 models / aliases 中的ID（如 glm4 -> glm/GLM-4）
+2. "提供商/" 前缀（如 siliconflow/Qwen/Qwen3-32B）
+3. routing.keywords 中的关键字规则（按顺序，如包含 gpt 的模型走 openai）
+4. routing.fallback 中第一个已配置的提供商
+
+每个模型ID第一次调用时匹配一次，之后直接查表。
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .base import LLMProvider
+
+# models.yaml 未配置 routing 段时使用的规则
+DEFAULT_KEYWORDS: List[Dict[str, Any]] = [
+    {"provider": "openai", "contains": ["gpt"]},
+    # Claude模型通过OpenRouter访问
+    {"provider": "openrouter", "contains": ["claude"]},
+    {"provider": "minimax", "contains": ["minimax"], "contains_case": ["M2"]},
+    # 硅基流动支持的模型
+    {"provider": "siliconflow", "contains": ["deepseek", "qwen", "glm", "kimi", "hunyuan", "moonshot"]},
+]
+DEFAULT_FALLBACK: List[str] = ["siliconflow", "glm"]
+
+
+class ProviderNotFoundError(ValueError):
+    """没有提供商可以处理该模型ID（未配置或无法匹配）"""
+
+
+class Route(NamedTuple):
+    """一个模型ID的路由结果"""
+    provider_name: str
+    provider: LLMProvider
+    model_name: str  # 发送给提供商的模型名
+
+
+class _KeywordRule(NamedTuple):
+    provider: str
+    contains: Tuple[str, ...]       # 不区分大小写
+    contains_case: Tuple[str, ...]  # 区分大小写
+
+    def matches(self, model: str) -> bool:
+        lowered = model.lower()
+        return (any(keyword in lowered for keyword in self.contains)
+                or any(keyword in model for keyword in self.contains_case))
+
+
+class RoutingTable:
+    """模型ID -> (提供商名称, 提供商, 模型名) 的查找表
+
+    Args:
+        providers: 已配置的提供商 {provider_name: provider_instance}
+        models: 注册表中的模型 {模型ID或别名: "provider/model_name"}
+        prefixes: 可作为 "提供商/" 前缀识别的提供商名称（默认为已配置的提供商）
+        keywords: 关键字规则 [{"provider": ..., "contains": [...], "contains_case": [...]}]
+        fallback: 都不匹配时依次尝试的提供商
+        max_entries: 查表缓存的模型ID数上限
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, LLMProvider],
+        models: Optional[Dict[str, str]] = None,
+        prefixes: Optional[Iterable[str]] = None,
+        keywords: Optional[List[Dict[str, Any]]] = None,
+        fallback: Optional[List[str]] = None,
+        max_entries: int = 4096,
+    ):
+        self.providers = providers
+        self.models = dict(models or {})
+        self.prefixes = set(prefixes if prefixes is not None else providers)
+        self.keywords = [
+            _KeywordRule(
+                rule["provider"],
+                tuple(keyword.lower() for keyword in rule.get("contains") or ()),
+                tuple(rule.get("contains_case") or ()),
+            )
+            for rule in (DEFAULT_KEYWORDS if keywords is None else keywords)
+        ]
+        self.fallback = list(DEFAULT_FALLBACK if fallback is None else fallback)
+        self.max_entries = max_entries
+        self._table: Dict[str, Route] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_registry(cls, providers: Dict[str, LLMProvider], registry=None) -> "RoutingTable":
+        """从模型注册表（models.yaml 的 models、aliases 和 routing 段）编译"""
+        if registry is None:
+            from src.config.loader import model_registry as registry
+        from .factory import LLMFactory
+
+        models = {model_id: model.to_full_id() for model_id, model in registry.models.items()}
+        for alias, target in registry.aliases.items():
+            if target in models:
+                models[alias] = models[target]
+        routing = registry.routing
+        return cls(
+            providers,
+            models=models,
+            prefixes=set(providers) | set(LLMFactory.list_providers()),
+            keywords=routing.get("keywords"),
+            fallback=routing.get("fallback"),
+        )
+
+    def resolve(self, model: str) -> Route:
+        """
+        查找模型ID对应的路由
+
+        Raises:
+            ProviderNotFoundError: 找不到对应的提供商
+        """
+        route = self._table.get(model)
+        if route is None:
+            route = self._compile(model)
+            with self._lock:
+                if len(self._table) < self.max_entries:
+                    self._table[model] = route
+        return route
+
+    def _compile(self, model: str) -> Route:
+        target = self.models.get(model, model)
+        prefix, _, rest = target.partition("/")
+        if rest and prefix in self.prefixes:
+            return self._route(prefix, target, model)
+
+        for rule in self.keywords:
+            if rule.matches(target):
+                return self._route(rule.provider, target, model)
+
+        for name in self.fallback:
+            if name in self.providers:
+                return self._route(name, target, model)
+        raise ProviderNotFoundError(f"No provider available for model: {model}")
+
+    def _route(self, provider_name: str, target: str, model: str) -> Route:
+        provider = self.providers.get(provider_name)
+        if provider is None:
+            raise ProviderNotFoundError(
+                f"No provider available for model: {model}. "
+                f"Provider '{provider_name}' not configured. "
+                f"Available providers: {', '.join(self.providers.keys())}"
+            )
+        # 如果model包含前缀（如 glm/），去掉前缀
+        return Route(provider_name, provider, target.split("/", 1)[1] if "/" in target else target)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """已编译的模型ID和对应的提供商"""
+        with self._lock:
+            return {model: route.provider_name for model, route in self._table.items()}
@@ -0,0 +1,219 @@
+"""
+共享HTTP连接池
+Shared, pooled HTTP transport for LLM providers
+
+同一个 base_url 的所有提供商实例共用一个 httpx 客户端（异步客户端按事件循环各一个），
+连接复用、keep-alive，TLS握手只在建连时发生一次。连接池上限、超时和HTTP/2
+从 settings.llm 读取：
+
+    LLM__HTTP_MAX_CONNECTIONS=100          # 每个base_url的最大连接数
+    LLM__HTTP_MAX_KEEPALIVE_CONNECTIONS=20 # 保持空闲的连接数
+    LLM__HTTP_KEEPALIVE_EXPIRY=30          # 空闲连接保留秒数
+    LLM__HTTP_CONNECT_TIMEOUT=10
+    LLM__HTTP_READ_TIMEOUT=600
+    LLM__HTTP_POOL_TIMEOUT=30              # 等待空闲连接的最长时间
+    LLM__HTTP2=false                       # 需要安装 h2
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+
+from src.config.settings import settings
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+class TransportStats:
+    """单个base_url的请求计数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finished(self, failed: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if failed:
+                self.errors += 1
+
+    def to_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+            }
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    """统计请求数的同步传输层"""
+
+    def __init__(self, stats: TransportStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats.started()
+        failed = True
+        try:
+            response = super().handle_request(request)
+            failed = False
+            return response
+        finally:
+            self.stats.finished(failed)
+
+
+class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    """统计请求数的异步传输层"""
+
+    def __init__(self, stats: TransportStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats.started()
+        failed = True
+        try:
+            response = await super().handle_async_request(request)
+            failed = False
+            return response
+        finally:
+            self.stats.finished(failed)
+
+
+def _pool_connections(transport: httpx.BaseTransport) -> Dict[str, int]:
+    """读取 httpcore 连接池中的连接状态"""
+    connections = getattr(getattr(transport, "_pool", None), "connections", None) or []
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {"connections": len(connections), "idle_connections": idle, "active_connections": len(connections) - idle}
+
+
+class HTTPClientPool:
+    """按 base_url 共享 httpx 客户端 - 全局唯一实例 http_pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, httpx.Client] = {}
+        # 异步客户端的连接绑定在创建它的事件循环上：{loop: {base_url: AsyncClient}}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats: Dict[str, TransportStats] = {}
+        self._http2: Optional[bool] = None
+
+    @staticmethod
+    def _key(base_url: Optional[str]) -> str:
+        return (base_url or DEFAULT_BASE_URL).rstrip("/")
+
+    @staticmethod
+    def limits() -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.llm.http_max_connections,
+            max_keepalive_connections=settings.llm.http_max_keepalive_connections,
+            keepalive_expiry=settings.llm.http_keepalive_expiry,
+        )
+
+    @staticmethod
+    def timeout() -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=settings.llm.http_connect_timeout,
+            read=settings.llm.http_read_timeout,
+            write=settings.llm.http_write_timeout,
+            pool=settings.llm.http_pool_timeout,
+        )
+
+    def _use_http2(self) -> bool:
+        if self._http2 is None:
+            self._http2 = settings.llm.http2
+            if self._http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    print("⚠️  LLM__HTTP2 已启用但未安装 h2，回退到 HTTP/1.1")
+                    self._http2 = False
+        return self._http2
+
+    def _stats_for(self, key: str) -> TransportStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = TransportStats()
+        return stats
+
+    def get_client(self, base_url: Optional[str]) -> httpx.Client:
+        """获取该 base_url 共享的同步客户端"""
+        key = self._key(base_url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None or client.is_closed:
+                transport = _CountingTransport(
+                    self._stats_for(key), limits=self.limits(), http2=self._use_http2()
+                )
+                client = httpx.Client(transport=transport, timeout=self.timeout(), follow_redirects=True)
+                self._clients[key] = client
+            return client
+
+    def get_async_client(self, base_url: Optional[str]) -> httpx.AsyncClient:
+        """获取当前事件循环中该 base_url 共享的异步客户端"""
+        key = self._key(base_url)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None or client.is_closed:
+                transport = _AsyncCountingTransport(
+                    self._stats_for(key), limits=self.limits(), http2=self._use_http2()
+                )
+                client = httpx.AsyncClient(transport=transport, timeout=self.timeout(), follow_redirects=True)
+                clients[key] = client
+            return client
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环的异步客户端和所有同步客户端"""
+        with self._lock:
+            async_clients = list(self._async_clients.pop(asyncio.get_running_loop(), {}).values())
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in async_clients:
+            await client.aclose()
+        for client in clients:
+            client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """每个 base_url 的请求计数和连接池占用"""
+        with self._lock:
+            stats = {}
+            for key, counter in self._stats.items():
+                pools = []
+                if key in self._clients:
+                    pools.append(_pool_connections(self._clients[key]._transport))
+                for clients in self._async_clients.values():
+                    if key in clients:
+                        pools.append(_pool_connections(clients[key]._transport))
+                entry = counter.to_dict()
+                for field in ("connections", "idle_connections", "active_connections"):
+                    entry[field] = sum(pool[field] for pool in pools)
+                stats[key] = entry
+            return {
+                "max_connections": settings.llm.http_max_connections,
+                "max_keepalive_connections": settings.llm.http_max_keepalive_connections,
+                "http2": bool(self._http2),
+                "hosts": stats,
+            }
+
+
+# 全局实例
+http_pool = HTTPClientPool()
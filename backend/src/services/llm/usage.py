@@ -0,0 +1,88 @@
+"""
+LLM调用用量记录
+Token and latency accounting for a single provider call
+
+LLMClient 每次调用提供商时创建一个 CallUsage 并通过上下文变量公开，提供商拿到响应后调用
+record_usage 写入 usage 字段中的 token 数；提供商没有返回 usage（如流式响应）时按文本长度估算。
+结果通过 call_meta 交给生成器，最终写入 LmLog。
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from src.utils.helpers import estimate_tokens
+
+
+class CallUsage:
+    """一次提供商调用的 token 数和耗时（从通过准入控制开始计时）"""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.estimated = False
+        self.ttfb: Optional[float] = None
+        self.latency: Optional[float] = None
+
+    def restart(self) -> None:
+        self.start = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
+
+    def first_byte(self) -> None:
+        """收到第一段响应（流式调用）"""
+        if self.ttfb is None:
+            self.ttfb = self.elapsed()
+
+    def finish(self, prompt: str, text: Optional[str]) -> None:
+        """调用完成：记录总耗时，提供商未返回 usage 时估算 token 数"""
+        self.latency = self.elapsed()
+        if self.ttfb is None:
+            # 非流式响应一次性返回，首字节时间即总耗时
+            self.ttfb = self.latency
+        if self.prompt_tokens is None:
+            self.prompt_tokens = estimate_tokens(prompt)
+            self.completion_tokens = estimate_tokens(text)
+            self.estimated = True
+
+    def to_meta(self) -> Dict[str, Any]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.estimated,
+            "ttfb": round(self.ttfb, 3) if self.ttfb is not None else None,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+        }
+
+
+# 当前正在进行的提供商调用；asyncio 任务和 to_thread 会自动继承
+current_call_usage: contextvars.ContextVar[Optional[CallUsage]] = contextvars.ContextVar(
+    "current_call_usage", default=None
+)
+
+
+@contextmanager
+def capture_usage(usage: CallUsage) -> Iterator[CallUsage]:
+    """在调用提供商期间公开 usage，供 record_usage 写入"""
+    token = current_call_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        current_call_usage.reset(token)
+
+
+def record_usage(response: Any) -> None:
+    """提供商调用：从响应的 usage 字段记录 token 数（没有 usage 时忽略）"""
+    usage = current_call_usage.get()
+    reported = getattr(response, "usage", None)
+    if usage is None or reported is None:
+        return
+    prompt_tokens = getattr(reported, "prompt_tokens", None)
+    completion_tokens = getattr(reported, "completion_tokens", None)
+    if prompt_tokens is None or completion_tokens is None:
+        return
+    usage.prompt_tokens = prompt_tokens
+    usage.completion_tokens = completion_tokens
@@ -15,11 +15,18 @@
 import datetime
 import json
 import os
-from typing import List, Tuple
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.core.models.game_state import State, to_dict
 from src.core.models.logs import RoundLog
 
+JOURNAL_FILE = "game_journal.jsonl"
+# RoundLog fields that are only ever appended to, and the ones that are set once.
+_LOG_LIST_FIELDS = ("bid", "debate", "votes", "summaries")
+_LOG_SCALAR_FIELDS = ("eliminate", "investigate", "protect")
+_ROLE_FIELDS = ("seer", "doctor", "villagers", "werewolves")
+
 
 def log_directory() -> str:
     pacific_timezone = datetime.timezone(datetime.timedelta(hours=-8))
@@ -32,6 +39,9 @@ def log_directory() -> str:
 def load_game(directory: str) -> Tuple[State, List[RoundLog]]:
     """Load a game from a file and convert its data to game objects.
 
+    The last snapshot is read first, then any journal entries written since
+    that snapshot are replayed on top of it.
+
     Args:
       directory: where the game log is stored
 
@@ -39,6 +49,16 @@ def load_game(directory: str) -> Tuple[State, List[RoundLog]]:
       State: An instance of the State class populated with the game data.
     """
 
+    partial_game_data, logs = read_game_data(directory)
+
+    state = State.from_json(partial_game_data)
+    logs = [RoundLog.from_json(log) for log in logs]
+
+    return (state, logs)
+
+
+def read_game_data(directory: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Read the raw state dict and round logs (snapshot plus journal)."""
     partial_game_state_file = f"{directory}/game_partial.json"
     complete_game_state_file = f"{directory}/game_complete.json"
     log_file = f"{directory}/game_logs.json"
@@ -48,16 +68,121 @@ def load_game(directory: str) -> Tuple[State, List[RoundLog]]:
         game_state_file = complete_game_state_file
 
     with open(game_state_file, "r") as file:
-        partial_game_data = json.load(file)
-
-    state = State.from_json(partial_game_data)
+        state_data = json.load(file)
 
     with open(log_file, "r") as file:
         logs = json.load(file)
 
-    logs = [RoundLog.from_json(log) for log in logs]
+    for op in read_journal(directory):
+        apply_journal_op(state_data, logs, op)
 
-    return (state, logs)
+    return state_data, logs
+
+
+def read_logs(directory: str) -> List[Dict[str, Any]]:
+    """Read the round logs (snapshot plus journal) as plain dicts."""
+    log_file = f"{directory}/game_logs.json"
+    if not os.path.exists(log_file):
+        return []
+
+    with open(log_file, "r", encoding="utf-8") as file:
+        content = file.read().strip()
+    logs = json.loads(content) if content else []
+    if not isinstance(logs, list):
+        return []
+
+    for op in read_journal(directory):
+        if op.get("op") in ("log_set", "log_extend"):
+            apply_journal_op({}, logs, op)
+    return logs
+
+
+def read_journal(directory: str) -> List[Dict[str, Any]]:
+    """Read journal entries, skipping a partially written trailing line."""
+    journal_file = f"{directory}/{JOURNAL_FILE}"
+    if not os.path.exists(journal_file):
+        return []
+
+    ops = []
+    with open(journal_file, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ops.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return ops
+
+
+def _ensure_index(items: List[Any], index: int, factory) -> None:
+    while len(items) <= index:
+        items.append(factory())
+
+
+def apply_journal_op(
+    state_data: Dict[str, Any], logs: List[Dict[str, Any]], op: Dict[str, Any]
+) -> None:
+    """Apply a single journal entry to a serialized game.
+
+    Every entry carries absolute positions, so replaying entries that are
+    already contained in the snapshot leaves the result unchanged.
+    """
+    kind = op.get("op")
+    if kind == "round":
+        rounds = state_data.setdefault("rounds", [])
+        _ensure_index(rounds, op["index"], dict)
+        rounds[op["index"]] = op["data"]
+    elif kind == "log_set":
+        _ensure_index(logs, op["index"], lambda: RoundLog().to_dict())
+        logs[op["index"]][op["field"]] = op["data"]
+    elif kind == "log_extend":
+        _ensure_index(logs, op["index"], lambda: RoundLog().to_dict())
+        items = logs[op["index"]].setdefault(op["field"], [])
+        del items[op["start"]:]
+        items.extend(op["items"])
+    elif kind == "player":
+        for player_data in _player_entries(state_data, op["name"]):
+            alive = player_data.get("alive")
+            observations = player_data.get("observations", [])
+            player_data.clear()
+            player_data.update(op["data"])
+            del observations[op["observations_start"]:]
+            observations.extend(op["observations"])
+            player_data["observations"] = observations
+            if alive is not None:
+                player_data["alive"] = alive
+    elif kind == "meta":
+        state_data.update(op["data"])
+
+    _update_alive(state_data)
+
+
+def _player_entries(state_data: Dict[str, Any], name: str) -> List[Dict[str, Any]]:
+    """All serialized copies of a player (players map and role fields)."""
+    entries = []
+    player = state_data.get("players", {}).get(name)
+    if player is not None:
+        entries.append(player)
+    for field in _ROLE_FIELDS:
+        value = state_data.get(field)
+        for candidate in value if isinstance(value, list) else [value]:
+            if isinstance(candidate, dict) and candidate.get("name") == name:
+                entries.append(candidate)
+    return entries
+
+
+def _update_alive(state_data: Dict[str, Any]) -> None:
+    """Recompute the ``alive`` flag that State.to_dict adds to each player."""
+    players = state_data.get("players")
+    if not isinstance(players, dict):
+        return
+    rounds = state_data.get("rounds")
+    current_players = rounds[-1].get("players", []) if rounds else list(players)
+    for name, player_data in players.items():
+        if isinstance(player_data, dict):
+            player_data["alive"] = name in current_players
 
 
 def save_game(state: State, logs: List[RoundLog], directory: str):
@@ -72,10 +197,21 @@ def save_game(state: State, logs: List[RoundLog], directory: str):
       logs: Logs of the  game.
       directory: where to save the game.
     """
+    write_snapshot(state.to_dict(), to_dict(logs), directory)
+
+
+def write_snapshot(
+    state_data: Dict[str, Any], logs: List[Dict[str, Any]], directory: str
+):
+    """Write a serialized game to the snapshot files.
+
+    Files are written to a temporary path and renamed so readers never see a
+    half-written snapshot.
+    """
     os.makedirs(directory, exist_ok=True)
 
     partial_game_state_file = f"{directory}/game_partial.json"
-    if state.error_message:
+    if state_data.get("error_message"):
         game_file = partial_game_state_file
     else:
         game_file = f"{directory}/game_complete.json"
@@ -85,8 +221,319 @@ def save_game(state: State, logs: List[RoundLog], directory: str):
 
     log_file = f"{directory}/game_logs.json"
 
-    with open(game_file, "w") as file:
-        json.dump(state.to_dict(), file, indent=4)
+    _write_json_atomic(game_file, state_data)
+    _write_json_atomic(log_file, logs)
+
+
+def _write_json_atomic(path: str, data: Any):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(data, file, indent=4)
+    os.replace(tmp_path, path)
+
+
+class GameJournal:
+    """Incremental, debounced persistence for a running game.
+
+    `record` has the same signature as the `on_progress` callback. Instead of
+    re-serializing the whole game, it diffs the live objects against what was
+    already journaled and queues only the changes (the current round, newly
+    appended log entries and observations, changed player fields). A writer
+    thread coalesces queued changes, appends them to ``game_journal.jsonl``
+    and keeps an in-memory copy of the serialized game; every
+    ``snapshot_interval`` entries, and when the game ends, that copy is
+    written out as a regular snapshot and the journal is truncated.
+
+    `load_game` replays the journal on top of the latest snapshot.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        debounce: float = 0.5,
+        snapshot_interval: int = 200,
+    ):
+        self.directory = directory
+        self.journal_file = f"{directory}/{JOURNAL_FILE}"
+        self.debounce = debounce
+        self.snapshot_interval = snapshot_interval
+
+        # Diff cursors, only touched on the recording thread.
+        self._started = False
+        self._round_cache: Dict[int, str] = {}
+        self._logs_seen = 0
+        self._log_scalars: Dict[Tuple[int, str], int] = {}
+        self._log_lengths: Dict[Tuple[int, str], int] = {}
+        self._player_cache: Dict[str, str] = {}
+        self._observation_lengths: Dict[str, int] = {}
+        self._meta: Dict[str, Any] = {}
+
+        # Shared with the writer thread.
+        self._cond = threading.Condition()
+        self._pending: List[Dict[str, Any]] = []
+        self._baseline: Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]] = None
+        self._force_snapshot = False
+        self._closed = False
+        self._busy = False
+        self._stats = {"records": 0, "entries": 0, "writes": 0, "snapshots": 0}
+
+        self._state_data: Dict[str, Any] = {}
+        self._logs: List[Dict[str, Any]] = []
+        self._entries_since_snapshot = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record(self, state: State, logs: List[RoundLog]) -> None:
+        """Queue the changes since the previous call (on_progress callback)."""
+        if not self._started:
+            self._start(state, logs)
+            return
+
+        ops = self._diff(state, logs)
+        finished = bool(state.winner or state.error_message)
+        with self._cond:
+            self._stats["records"] += 1
+            if ops:
+                self._pending.extend(ops)
+            if finished:
+                self._force_snapshot = True
+            if ops or finished:
+                self._cond.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every queued change has been written."""
+        with self._cond:
+            self._cond.notify()
+            self._cond.wait_for(
+                lambda: not self._pending
+                and self._baseline is None
+                and not self._force_snapshot
+                and not self._busy,
+                timeout=timeout,
+            )
+
+    def close(self) -> None:
+        """Write everything out as a final snapshot and stop the writer."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._force_snapshot = self._started
+            self._cond.notify()
+        self._thread.join()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._cond:
+            return dict(self._stats)
+
+    # -- recording thread -------------------------------------------------
+
+    def _start(self, state: State, logs: List[RoundLog]) -> None:
+        state_data = state.to_dict()
+        logs_data = to_dict(logs)
+        # Prime the diff cursors from the baseline.
+        self._diff(state, logs)
+        self._started = True
+        with self._cond:
+            self._stats["records"] += 1
+            self._baseline = (state_data, logs_data)
+            self._cond.notify()
+
+    def _diff(self, state: State, logs: List[RoundLog]) -> List[Dict[str, Any]]:
+        ops: List[Dict[str, Any]] = []
+
+        # Rounds before the last one are final; only re-check the tail.
+        first_round = max(len(self._round_cache) - 1, 0)
+        for index in range(first_round, len(state.rounds)):
+            data = state.rounds[index].to_dict()
+            encoded = json.dumps(data, sort_keys=True)
+            if self._round_cache.get(index) != encoded:
+                self._round_cache[index] = encoded
+                ops.append({"op": "round", "index": index, "data": data})
+
+        for index in range(max(self._logs_seen - 1, 0), len(logs)):
+            round_log = logs[index]
+            for field in _LOG_SCALAR_FIELDS:
+                value = getattr(round_log, field)
+                if value is not None and self._log_scalars.get((index, field)) != id(value):
+                    self._log_scalars[(index, field)] = id(value)
+                    ops.append({
+                        "op": "log_set", "index": index, "field": field,
+                        "data": to_dict(value),
+                    })
+            for field in _LOG_LIST_FIELDS:
+                items = getattr(round_log, field)
+                start = self._log_lengths.get((index, field), 0)
+                if len(items) < start:
+                    start = 0
+                self._log_lengths[(index, field)] = len(items)
+                if len(items) > start:
+                    ops.append({
+                        "op": "log_extend", "index": index, "field": field,
+                        "start": start, "items": to_dict(items[start:]),
+                    })
+        self._logs_seen = len(logs)
+
+        for name, player in state.players.items():
+            fields = {k: v for k, v in vars(player).items() if k != "observations"}
+            data = to_dict(fields)
+            encoded = json.dumps(data, sort_keys=True)
+            start = self._observation_lengths.get(name, 0)
+            if len(player.observations) < start:
+                start = 0
+            if (
+                self._player_cache.get(name) != encoded
+                or len(player.observations) > start
+            ):
+                self._player_cache[name] = encoded
+                self._observation_lengths[name] = len(player.observations)
+                ops.append({
+                    "op": "player", "name": name, "data": data,
+                    "observations_start": start,
+                    "observations": list(player.observations[start:]),
+                })
+
+        meta = {"winner": state.winner, "error_message": state.error_message}
+        if meta != self._meta:
+            self._meta = meta
+            ops.append({"op": "meta", "data": meta})
+
+        return ops
+
+    # -- writer thread ----------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._pending
+                    or self._baseline is not None
+                    or self._force_snapshot
+                    or self._closed
+                )
+                if not self._closed and self._baseline is None and not self._force_snapshot:
+                    # Debounce: let more changes accumulate before writing.
+                    self._cond.wait(timeout=self.debounce)
+                ops, self._pending = self._pending, []
+                baseline, self._baseline = self._baseline, None
+                force_snapshot, self._force_snapshot = self._force_snapshot, False
+                closed = self._closed
+                self._busy = True
+
+            try:
+                self._write(ops, baseline, force_snapshot)
+            except Exception as e:
+                print(f"[Journal error] Failed to persist game to {self.directory}: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+            if closed:
+                with self._cond:
+                    if not self._pending and self._baseline is None and not self._force_snapshot:
+                        return
+
+    def _write(self, ops, baseline, force_snapshot) -> None:
+        if baseline is not None:
+            self._state_data, self._logs = baseline
+            self._snapshot()
+
+        if ops:
+            for op in ops:
+                apply_journal_op(self._state_data, self._logs, op)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.journal_file, "a", encoding="utf-8") as file:
+                file.write("".join(
+                    json.dumps(op, ensure_ascii=False) + "\n" for op in ops
+                ))
+            self._entries_since_snapshot += len(ops)
+            with self._cond:
+                self._stats["entries"] += len(ops)
+                self._stats["writes"] += 1
+
+        if force_snapshot or self._entries_since_snapshot >= self.snapshot_interval:
+            self._snapshot()
+
+    def _snapshot(self) -> None:
+        """Compact: write the in-memory copy as a snapshot, then drop the journal."""
+        write_snapshot(self._state_data, self._logs, self.directory)
+        # Entries are idempotent, so a crash between these two steps is harmless.
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self._entries_since_snapshot = 0
+        with self._cond:
+            self._stats["snapshots"] += 1
+
+
+class SnapshotWriter:
+    """Full-snapshot persistence off the game's thread (persistence_mode="full").
+
+    `record` has the same signature as the `on_progress` callback. It
+    serializes the state and logs on the calling thread, i.e. the thread that
+    mutates the game, so each snapshot is consistent, and hands the result to a
+    writer thread. The writer only keeps the most recent snapshot; older ones
+    that were not written yet are superseded, never written out of order.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._cond = threading.Condition()
+        self._latest: Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]] = None
+        self._closed = False
+        self._busy = False
+        self._stats = {"records": 0, "writes": 0}
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record(self, state: State, logs: List[RoundLog]) -> None:
+        """Snapshot the game now and queue it for writing (on_progress callback)."""
+        snapshot = (state.to_dict(), to_dict(logs))
+        with self._cond:
+            self._stats["records"] += 1
+            self._latest = snapshot
+            self._cond.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until the most recent snapshot has been written."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._latest is None and not self._busy, timeout=timeout
+            )
+
+    def close(self) -> None:
+        """Write the pending snapshot and stop the writer."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._cond:
+            return dict(self._stats)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._latest is not None or self._closed)
+                snapshot, self._latest = self._latest, None
+                closed = self._closed
+                self._busy = snapshot is not None
+
+            if snapshot is not None:
+                try:
+                    write_snapshot(*snapshot, self.directory)
+                except Exception as e:
+                    print(f"[Snapshot error] Failed to persist game to {self.directory}: {e}")
+                finally:
+                    with self._cond:
+                        self._busy = False
+                        self._stats["writes"] += 1
+                        self._cond.notify_all()
 
-    with open(log_file, "w") as file:
-        json.dump(to_dict(logs), file, indent=4)
+            if closed:
+                with self._cond:
+                    if self._latest is None:
+                        return
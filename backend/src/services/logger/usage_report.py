@@ -0,0 +1,165 @@
+"""
+LLM用量统计
+Token and latency accounting per player, role, action, model and session
+
+从序列化的回合日志（game_logs.json 或运行中游戏的 to_dict(logs)）中汇总每次LLM生成的
+token 数、耗时和重试次数，用于找出开销大的提示词和慢模型。
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+USAGE_FILE = "usage.json"
+
+# RoundLog 字段 -> 行动类型
+_SCALAR_ACTIONS = {"eliminate": "eliminate", "investigate": "investigate", "protect": "protect"}
+_NAMED_ACTIONS = {"debate": "debate", "summaries": "summary"}
+
+
+class _Bucket:
+    """一组LLM生成的累计用量"""
+
+    def __init__(self):
+        self.calls = 0
+        self.attempts = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.ttfb = 0.0
+        self.ttfb_calls = 0
+        self.cache_hits = 0
+        self.hedged = 0
+        self.failed = 0
+
+    def add(self, log: Dict[str, Any]) -> None:
+        self.calls += 1
+        self.attempts += log.get("attempts") or 1
+        self.prompt_tokens += log.get("prompt_tokens") or 0
+        self.completion_tokens += log.get("completion_tokens") or 0
+        self.estimated += bool(log.get("tokens_estimated"))
+        latency = log.get("latency") or 0.0
+        self.latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if log.get("ttfb") is not None:
+            self.ttfb += log["ttfb"]
+            self.ttfb_calls += 1
+        self.cache_hits += log.get("provider") == "cache"
+        self.hedged += bool(log.get("hedged"))
+        self.failed += log.get("result") is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.attempts - self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "estimated_calls": self.estimated,
+            "total_latency_seconds": round(self.latency, 3),
+            "avg_latency_seconds": round(self.latency / self.calls, 3) if self.calls else 0.0,
+            "max_latency_seconds": round(self.max_latency, 3),
+            "avg_ttfb_seconds": round(self.ttfb / self.ttfb_calls, 3) if self.ttfb_calls else None,
+            "cache_hits": self.cache_hits,
+            "hedged": self.hedged,
+            "failed": self.failed,
+        }
+
+
+def _roles(state_data: Dict[str, Any]) -> Tuple[Dict[str, str], Optional[str], Optional[str], List[str]]:
+    """返回 ({玩家: 角色}, 预言家, 医生, 狼人列表)"""
+    roles = {
+        name: player.get("role", "Unknown")
+        for name, player in (state_data.get("players") or {}).items()
+        if isinstance(player, dict)
+    }
+    seer = (state_data.get("seer") or {}).get("name")
+    doctor = (state_data.get("doctor") or {}).get("name")
+    werewolves = [w.get("name") for w in state_data.get("werewolves") or [] if isinstance(w, dict)]
+    return roles, seer, doctor, werewolves
+
+
+def iter_calls(state_data: Dict[str, Any], logs: List[Dict[str, Any]]) -> Iterator[Tuple[int, str, str, Dict[str, Any]]]:
+    """遍历回合日志中的每次LLM生成：(回合, 行动类型, 玩家, LmLog字典)"""
+    _, seer, doctor, werewolves = _roles(state_data)
+    # 狼人击杀日志只记录一条，多个狼人时无法区分是谁
+    actors = {
+        "eliminate": werewolves[0] if len(werewolves) == 1 else "Werewolves",
+        "investigate": seer,
+        "protect": doctor,
+    }
+
+    for round_number, round_log in enumerate(logs):
+        for field, action in _SCALAR_ACTIONS.items():
+            log = round_log.get(field)
+            if isinstance(log, dict):
+                yield round_number, action, actors[field] or "Unknown", log
+        for bids in round_log.get("bid") or []:
+            for name, log in bids:
+                if isinstance(log, dict):
+                    yield round_number, "bid", name, log
+        for field, action in _NAMED_ACTIONS.items():
+            for name, log in round_log.get(field) or []:
+                if isinstance(log, dict):
+                    yield round_number, action, name, log
+        for votes in round_log.get("votes") or []:
+            for vote in votes:
+                log = vote.get("log") if isinstance(vote, dict) else None
+                if isinstance(log, dict):
+                    yield round_number, "vote", vote.get("player"), log
+
+
+def summarize_usage(state_data: Dict[str, Any], logs: List[Dict[str, Any]], top: int = 10) -> Dict[str, Any]:
+    """
+    按玩家、角色、行动类型、模型和整局汇总LLM用量
+
+    Args:
+        state_data: 序列化的游戏状态（State.to_dict() 或 game_complete.json）
+        logs: 序列化的回合日志
+        top: 返回 token 最多和最慢的生成各多少条
+
+    Returns:
+        {"session": {...}, "players": {...}, "roles": {...}, "actions": {...}, "models": {...},
+         "most_tokens": [...], "slowest": [...]}
+    """
+    roles, _, _, _ = _roles(state_data)
+    session = _Bucket()
+    groups: Dict[str, Dict[str, _Bucket]] = {"players": {}, "roles": {}, "actions": {}, "models": {}}
+    entries = []
+
+    for round_number, action, player, log in iter_calls(state_data, logs):
+        role = roles.get(player, "Werewolf" if action == "eliminate" else "Unknown")
+        model = log.get("model") or "unknown"
+        session.add(log)
+        for group, key in (("players", player), ("roles", role), ("actions", action), ("models", model)):
+            groups[group].setdefault(key, _Bucket()).add(log)
+        entries.append({
+            "round": round_number,
+            "action": action,
+            "player": player,
+            "model": model,
+            "total_tokens": (log.get("prompt_tokens") or 0) + (log.get("completion_tokens") or 0),
+            "latency_seconds": log.get("latency"),
+            "attempts": log.get("attempts"),
+        })
+
+    result: Dict[str, Any] = {"session": session.to_dict()}
+    for group, buckets in groups.items():
+        result[group] = {key: bucket.to_dict() for key, bucket in buckets.items()}
+    result["most_tokens"] = sorted(entries, key=lambda e: e["total_tokens"], reverse=True)[:top]
+    result["slowest"] = sorted(entries, key=lambda e: e["latency_seconds"] or 0.0, reverse=True)[:top]
+    return result
+
+
+def write_usage(state_data: Dict[str, Any], logs: List[Dict[str, Any]], directory: str) -> Dict[str, Any]:
+    """把用量统计写入对局目录的 usage.json"""
+    usage = summarize_usage(state_data, logs)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{directory}/{USAGE_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(usage, file, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, f"{directory}/{USAGE_FILE}")
+    return usage
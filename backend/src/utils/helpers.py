@@ -14,13 +14,20 @@
 
 """utility functions."""
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
+import json
+import threading
 import yaml
 from abc import ABC
 from abc import abstractmethod
 import marko
 import re
 
+from src.utils.log import Preview, get_logger
+
+
+logger = get_logger("json")
+
 
 def clean_mixed_language_response(text: str) -> str:
     """
@@ -32,8 +39,6 @@ def clean_mixed_language_response(text: str) -> str:
     Returns:
         清理后的文本
     """
-    print(f"[语言清理] 开始清理混合语言响应...")
-
     if not text:
         return text
 
@@ -44,7 +49,7 @@ def clean_mixed_language_response(text: str) -> str:
     match = re.search(json_pattern, text, re.DOTALL | re.IGNORECASE)
     if match:
         json_content = match.group(1).strip()
-        print(f"[语言清理] 策略1成功：提取到JSON代码块内容")
+        logger.debug("clean_response", strategy="code_block")
         return json_content
 
     # 策略2: 查找第一个完整的JSON对象（从{到最后一个}）
@@ -61,7 +66,7 @@ def clean_mixed_language_response(text: str) -> str:
                 json_content = text[start_idx:i+1].strip()
                 # 验证是否看起来像有效的JSON
                 if json_content.count('{') == json_content.count('}'):
-                    print(f"[语言清理] 策略2成功：提取到完整JSON对象")
+                    logger.debug("clean_response", strategy="brace_object")
                     return json_content
 
     # 策略3: 如果没有找到JSON，返回原文本但清理明显的非JSON前缀/后缀
@@ -82,150 +87,275 @@ def clean_mixed_language_response(text: str) -> str:
 
     if json_lines:
         cleaned = '\n'.join(json_lines)
-        print(f"[语言清理] 策略3：提取到可能的JSON内容")
+        logger.debug("clean_response", strategy="json_lines")
         return cleaned
 
-    print(f"[语言清理] 所有清理策略都失败，返回原文本")
+    logger.debug("clean_response", strategy="none")
     return text
 
 
-def parse_json(text: str) -> Optional[Any]:
-    print(f"[JSON解析] 开始解析，输入文本长度: {len(text)} 字符")
-    print(f"[JSON解析] 输入文本预览: {text[:100]}..." if len(text) > 100 else f"[JSON解析] 输入文本: {text}")
+# 中日韩字符和全角标点大约各占一个token，其余字符约4个一个token
+_WIDE_CHARS = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """估算文本的token数（区分中文和英文；提示词预算、准入控制和用量估算共用）"""
+    if not text:
+        return 0
+    wide = len(_WIDE_CHARS.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+# 各解析层级的命中次数
+PARSE_TIERS = ("json", "extract", "fallback", "failed")
+_parse_stats: Dict[str, int] = {tier: 0 for tier in PARSE_TIERS}
+_parse_stats_lock = threading.Lock()
+
+_FENCED_BLOCK = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL | re.IGNORECASE)
+
+
+def _count_tier(tier: str) -> None:
+    with _parse_stats_lock:
+        _parse_stats[tier] += 1
+
+
+def get_parse_stats() -> Dict[str, int]:
+    """获取 parse_json 各层级的命中次数"""
+    with _parse_stats_lock:
+        return dict(_parse_stats)
+
+
+def reset_parse_stats() -> None:
+    with _parse_stats_lock:
+        for tier in PARSE_TIERS:
+            _parse_stats[tier] = 0
+
+
+def _iter_json_objects(text: str) -> Iterator[str]:
+    """按出现顺序产出文本中括号配平的 {...} 片段（忽略字符串内的括号）"""
+    start = text.find('{')
+    while start != -1:
+        depth = 0
+        in_string = escaped = False
+        end = None
+        for i in range(start, len(text)):
+            char = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    end = i
+                    break
+        if end is None:
+            return
+        yield text[start:end + 1]
+        start = text.find('{', end + 1)
+
+
+def extract_json(text: str) -> Optional[Any]:
+    """
+    快速提取：依次尝试代码块内容和文本中嵌入的JSON对象，只用 json.loads
+
+    Returns:
+        第一个能被 json.loads 解析为字典的片段；都失败时返回 None
+    """
+    candidates = [match.group(1).strip() for match in _FENCED_BLOCK.finditer(text)]
+    for candidate in candidates + list(_iter_json_objects(text)):
+        try:
+            result = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(result, dict):
+            return result
+    return None
+
+
+def parse_json(text: Optional[str]) -> Optional[Any]:
+    """
+    解析LLM响应中的JSON，按代价从低到高分层尝试：
+
+    1. json: 对去除首尾空白的完整文本直接 json.loads
+    2. extract: 从代码块或嵌入文本中的 {...} 片段提取并 json.loads
+    3. fallback: 清理混合语言后用 marko 解析Markdown，再用 yaml.safe_load
+       （可以处理缺少引号的字段名等不规范输出）
+    """
+    if not text:
+        # 空响应（None 或空字符串）没有可解析的内容
+        _count_tier("failed")
+        return None
+
+    logger.debug("parse_start", length=len(text), text=Preview(text))
+
+    try:
+        result_json = json.loads(text.strip())
+        _count_tier("json")
+        return result_json
+    except ValueError:
+        pass
+
+    result_json = extract_json(text)
+    if result_json is not None:
+        _count_tier("extract")
+        return result_json
 
     # 预处理：清理混合中英文内容，尝试提取纯JSON部分
     cleaned_text = clean_mixed_language_response(text)
     if cleaned_text != text:
-        print(f"[JSON解析] 检测到混合语言内容，已清理")
-        print(f"[JSON解析] 清理后文本预览: {cleaned_text[:100]}..." if len(cleaned_text) > 100 else f"[JSON解析] 清理后文本: {cleaned_text}")
+        logger.debug("parse_cleaned", text=Preview(cleaned_text))
 
     # 首先尝试解析markdown中的JSON
-    print(f"[JSON解析] 尝试从markdown中解析JSON...")
     result_json = parse_json_markdown(cleaned_text)
-    print(f"[JSON解析] markdown解析结果: {result_json}")
 
     if not result_json:
-        print(f"[JSON解析] markdown解析失败，尝试直接解析JSON字符串...")
         result_json = parse_json_str(cleaned_text)
-        print(f"[JSON解析] 直接解析结果: {result_json}")
 
-    print(f"[JSON解析] 最终结果: {result_json}")
+    _count_tier("fallback" if result_json is not None else "failed")
+    logger.debug("parse_done", tier="fallback", result=Preview(result_json, 200))
     return result_json
 
 
 def parse_json_markdown(text: str) -> Optional[Any]:
-    print(f"[Markdown解析] 开始解析markdown文本...")
-
     try:
         ast = marko.parse(text)
-        print(f"[Markdown解析] AST解析成功，子元素数量: {len(ast.children) if ast.children else 0}")
     except Exception as e:
-        print(f"[Markdown解析] AST解析失败: {e}")
+        logger.debug("markdown_parse_failed", error=e)
         return None
 
     # 检查AST结构
     if not ast.children:
-        print(f"[Markdown解析] AST没有子元素")
         return None
 
-    print(f"[Markdown解析] 开始遍历AST子元素...")
-    for i, c in enumerate(ast.children):
-        print(f"[Markdown解析] 处理第{i}个子元素，类型: {type(c)}")
-
-        # 检查是否是代码块
-        if hasattr(c, "lang"):
-            print(f"[Markdown解析] 找到代码块，语言: {c.lang}")
-            if c.lang.lower() == "json":
-                print(f"[Markdown解析] 找到JSON代码块")
-
-                # 详细调试c.children的状态
-                print(f"[Markdown调试] c.children 类型: {type(c.children)}")
-                print(f"[Markdown调试] c.children 值: {c.children}")
-
-                # 安全检查c.children
-                try:
-                    children_list = list(c.children) if c.children is not None else []
-                    print(f"[Markdown调试] 转换为列表成功，长度: {len(children_list)}")
-                except Exception as e:
-                    print(f"[Markdown调试] 转换c.children为列表失败: {e}")
-                    print(f"[Markdown调试] c.children详细属性: {dir(c)}")
-                    continue
-
-                # Check if c.children exists and has at least one element
-                if children_list and len(children_list) > 0:
-                    print(f"[Markdown解析] JSON代码块有 {len(children_list)} 个子元素")
-
-                    # 安全访问第一个子元素
-                    try:
-                        first_child = children_list[0]
-                        print(f"[Markdown解析] 第一个子元素类型: {type(first_child)}")
-                        print(f"[Markdown调试] 第一个子元素: {first_child}")
-                    except Exception as e:
-                        print(f"[Markdown错误] 访问第一个子元素失败: {e}")
-                        continue
-
-                    if hasattr(first_child, "children") and first_child.children:
-                        try:
-                            json_str = first_child.children
-                            print(f"[Markdown解析] 提取到JSON字符串: {json_str}")
-                            result = parse_json_str(json_str)
-                            print(f"[Markdown解析] JSON字符串解析结果: {result}")
-                            return result
-                        except Exception as e:
-                            print(f"[Markdown错误] 处理first_child.children失败: {e}")
-                    else:
-                        print(f"[Markdown解析] 第一个子元素没有children属性或children为空")
-                        # 尝试直接使用子元素作为字符串
-                        if hasattr(first_child, '__str__'):
-                            try:
-                                json_str = str(first_child)
-                                print(f"[Markdown解析] 尝试将第一个子元素转换为字符串: {json_str}")
-                                result = parse_json_str(json_str)
-                                print(f"[Markdown解析] 转换后JSON解析结果: {result}")
-                                return result
-                            except Exception as e:
-                                print(f"[Markdown错误] 转换first_child为字符串失败: {e}")
-                        else:
-                            print(f"[Markdown错误] 第一个子元素没有__str__方法")
-                else:
-                    print(f"[Markdown解析] JSON代码块没有子元素")
-            else:
-                print(f"[Markdown解析] 代码块语言不是JSON: {c.lang}")
+    for c in ast.children:
+        # 只处理JSON代码块
+        if not hasattr(c, "lang") or c.lang.lower() != "json":
+            continue
+
+        # 安全检查c.children
+        try:
+            children_list = list(c.children) if c.children is not None else []
+        except Exception as e:
+            logger.debug("markdown_children_failed", error=e)
+            continue
+
+        # Check if c.children exists and has at least one element
+        if not children_list:
+            logger.debug("markdown_empty_code_block")
+            continue
+
+        first_child = children_list[0]
+        if hasattr(first_child, "children") and first_child.children:
+            try:
+                return parse_json_str(first_child.children)
+            except Exception as e:
+                logger.debug("markdown_code_block_failed", error=e)
         else:
-            print(f"[Markdown解析] 子元素不是代码块，类型: {type(c)}")
-            print(f"[Markdown调试] 子元素属性: {dir(c)}")
+            # 尝试直接使用子元素作为字符串
+            try:
+                return parse_json_str(str(first_child))
+            except Exception as e:
+                logger.debug("markdown_code_block_failed", error=e)
 
-    print(f"[Markdown解析] 没有找到有效的JSON代码块")
+    logger.debug("markdown_no_json_block")
     return None
 
 
 def parse_json_str(text: str) -> Optional[Any]:
-    print(f"[JSON字符串解析] 开始解析，输入文本: '{text}'")
-    print(f"[JSON字符串解析] 文本长度: {len(text)} 字符")
-
     if not text:
-        print(f"[JSON字符串解析] 输入文本为空")
         return None
 
     try:
-        print(f"[JSON字符串解析] 使用yaml.safe_load解析...")
         # use yaml.safe_load which handles missing quotes around field names.
         result_json = yaml.safe_load(text)
-        print(f"[JSON字符串解析] yaml.safe_load成功，结果类型: {type(result_json)}, 内容: {result_json}")
     except yaml.parser.ParserError as e:
-        print(f"[JSON字符串解析] YAML解析器错误: {e}")
-        print(f"[JSON字符串解析] 详细错误位置信息 - 这通常是因为JSON格式不正确")
+        logger.debug("yaml_parse_error", error=Preview(e, 200))
         return None
     except Exception as e:
         # Log any other parsing errors
-        print(f"[JSON字符串解析] 其他解析错误: {type(e).__name__}: {e}")
-        print(f"[JSON字符串解析] 错误详情，这可能是由于JSON格式问题或内容不符合预期")
+        logger.debug("yaml_parse_error", error_type=type(e).__name__, error=Preview(e, 200))
         return None
 
-    print(f"[JSON字符串解析] 解析完成，返回: {result_json}")
     return result_json
 
 
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JsonFieldStream:
+    """
+    从流式输出的（不完整的）JSON中增量提取某个字符串字段
+
+    每次 feed 一段新的模型输出，返回该字段新解码出的文本；字段值结束（遇到未转义的引号）后
+    不再返回内容。用于在完整响应到达之前推送发言的 "say" 字段。
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self._key = re.compile(rf'(?<!\\)"{re.escape(field)}"\s*:\s*"')
+        self._buffer = ""
+        self._pos = 0
+        self._in_value = False
+        self.done = False
+        self.value = ""
+
+    def feed(self, chunk: str) -> str:
+        if self.done or not chunk:
+            return ""
+        self._buffer += chunk
+        if not self._in_value:
+            match = self._key.search(self._buffer)
+            if match is None:
+                return ""
+            self._in_value = True
+            self._pos = match.end()
+
+        out = []
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                self.done = True
+                pos += 1
+                break
+            if char != "\\":
+                out.append(char)
+                pos += 1
+                continue
+            # 转义序列不完整时等下一段
+            if pos + 1 >= len(buffer):
+                break
+            escape = buffer[pos + 1]
+            if escape != "u":
+                out.append(_ESCAPES.get(escape, escape))
+                pos += 2
+                continue
+            length = 6
+            if "\\ud800" <= buffer[pos:pos + 6].lower() <= "\\udbff":
+                length = 12  # 代理对，与低位一起解码
+            if pos + length > len(buffer):
+                break
+            try:
+                out.append(json.loads(f'"{buffer[pos:pos + length]}"'))
+            except ValueError:
+                pass
+            pos += length
+
+        # 已消费的部分不再保留
+        self._buffer, self._pos = buffer[pos:], 0
+        text = "".join(out)
+        self.value += text
+        return text
+
+
 class Deserializable(ABC):
     @classmethod
     @abstractmethod
@@ -0,0 +1,101 @@
+"""
+JSON Patch 工具
+Minimal RFC 6902 JSON Patch generation and application
+"""
+
+import copy
+from typing import Any, Dict, List
+
+Patch = List[Dict[str, Any]]
+
+
+def escape_pointer(token: Any) -> str:
+    """转义 JSON Pointer 路径片段（玩家名中可能包含 "/"）"""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def unescape_pointer(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> Patch:
+    """生成把 old 变为 new 的补丁
+
+    只使用 add / remove / replace 三种操作。列表按下标比较，尾部追加的元素
+    生成 add 操作，因此游戏中常见的“只追加”数据（发言、观察记录）补丁大小
+    与新增内容成正比。
+    """
+    ops: Patch = []
+    _diff(old, new, path, ops)
+    return ops
+
+
+def _diff(old: Any, new: Any, path: str, ops: Patch) -> None:
+    if old is new:
+        return
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{escape_pointer(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{escape_pointer(key)}"
+            if key in old:
+                _diff(old[key], value, child, ops)
+            else:
+                ops.append({"op": "add", "path": child, "value": value})
+        return
+
+    if isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        for index in range(common):
+            _diff(old[index], new[index], f"{path}/{index}", ops)
+        for index in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/{index}", "value": new[index]})
+        # 从尾部开始删除，保证下标有效
+        for index in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{index}"})
+        return
+
+    if type(old) is not type(new) or old != new:
+        ops.append({"op": "replace", "path": path, "value": new})
+
+
+def apply_patch(doc: Any, patch: Patch, in_place: bool = False) -> Any:
+    """把补丁应用到文档上，返回新文档（in_place=True 时直接修改 doc）"""
+    if not in_place:
+        doc = copy.deepcopy(doc)
+
+    for op in patch:
+        path = op["path"]
+        value = copy.deepcopy(op.get("value"))
+        if path == "":
+            if op["op"] == "remove":
+                doc = None
+            else:
+                doc = value
+            continue
+
+        tokens = [unescape_pointer(token) for token in path.split("/")[1:]]
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+
+        if isinstance(parent, list):
+            if op["op"] == "add":
+                if last == "-":
+                    parent.append(value)
+                else:
+                    parent.insert(int(last), value)
+            elif op["op"] == "remove":
+                del parent[int(last)]
+            else:
+                parent[int(last)] = value
+        else:
+            if op["op"] == "remove":
+                del parent[last]
+            else:
+                parent[last] = value
+
+    return doc
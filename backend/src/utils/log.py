@@ -0,0 +1,122 @@
+"""
+结构化日志
+Structured, leveled logging with sampling and lazy formatting (structlog)
+
+热路径（JSON解析、LLM响应处理）使用这里的日志器代替 print：
+- 基于 structlog 的按级别过滤日志器，低于配置级别的调用直接返回，不经过任何处理器
+- 字段在真正输出时才格式化；长文本用 Preview 包装，输出时才截断
+- debug/info 记录可以按比例采样，warning 及以上始终输出
+
+配置（环境变量）:
+    SERVER__LOG_LEVEL=debug            # 日志级别，默认 info
+    SERVER__LOG_FORMAT=json            # text（默认）或 json（每行一个JSON对象）
+    SERVER__LOG_SAMPLE_RATE=0.1        # debug/info 记录的采样比例，默认 1.0
+"""
+
+import json
+import logging
+import random
+import sys
+import threading
+from typing import Any, Dict, Optional, TextIO
+
+import structlog
+
+ROOT_LOGGER_NAME = "werewolf"
+
+_configure_lock = threading.Lock()
+_configured = False
+
+# 始终输出、不参与采样的级别
+_UNSAMPLED = ("warning", "warn", "error", "critical", "exception")
+
+
+class Preview:
+    """长文本的延迟截断：只有在日志真正输出时才切片"""
+
+    __slots__ = ("text", "limit")
+
+    def __init__(self, text: Any, limit: int = 100):
+        self.text = text
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = "" if self.text is None else str(self.text)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}...（共{len(text)}字符）"
+
+    __repr__ = __str__
+
+
+class SampleProcessor:
+    """按比例采样 warning 以下的记录（structlog 处理器，丢弃时抛出 DropEvent）"""
+
+    def __init__(self, rate: float = 1.0):
+        self.rate = rate
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        if self.rate >= 1.0 or method_name in _UNSAMPLED or random.random() < self.rate:
+            return event_dict
+        raise structlog.DropEvent
+
+
+def _stringify_fields(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON输出前把非基本类型的字段（Preview、异常等）转为字符串，日志器名称输出为 logger"""
+    fields = {
+        key: value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        for key, value in event_dict.items()
+    }
+    if "logger_name" in fields:
+        fields["logger"] = fields.pop("logger_name")
+    return fields
+
+
+def render_text(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> str:
+    """一行文本：[日志器] 级别 事件 key=value ..."""
+    fields = dict(event_dict)
+    name = fields.pop("logger_name", ROOT_LOGGER_NAME)
+    level = fields.pop("level", method_name)
+    event = fields.pop("event", "")
+    parts = [f"[{name}] {level} {event}"]
+    parts.extend(f"{key}={value}" for key, value in fields.items())
+    return " ".join(parts)
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      sample_rate: Optional[float] = None, stream: Optional[TextIO] = None) -> None:
+    """配置结构化日志（未传入的参数从 settings.server 读取，stream 默认为标准输出）"""
+    global _configured
+    from src.config.settings import settings
+
+    level = (level or settings.server.log_level).upper()
+    fmt = fmt or settings.server.log_format
+    sample_rate = settings.server.log_sample_rate if sample_rate is None else sample_rate
+
+    processors = [SampleProcessor(sample_rate), structlog.processors.add_log_level]
+    if fmt == "json":
+        processors += [
+            structlog.processors.TimeStamper(fmt="iso", key="ts"),
+            _stringify_fields,
+            structlog.processors.JSONRenderer(serializer=json.dumps, ensure_ascii=False),
+        ]
+    else:
+        processors.append(render_text)
+
+    with _configure_lock:
+        structlog.configure(
+            processors=processors,
+            wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, level, logging.INFO)),
+            logger_factory=structlog.PrintLoggerFactory(stream or sys.stdout),
+            cache_logger_on_first_use=False,
+        )
+        _configured = True
+
+
+def get_logger(name: str) -> Any:
+    """获取 werewolf.<name> 日志器（debug/info/warning/error(event, **fields)）；第一次调用时按配置初始化"""
+    if not _configured:
+        configure_logging()
+    # 名称作为初始字段绑定（structlog 的 get_logger 保留了 logger 参数名）；
+    # 不缓存，configure_logging 重新配置后对已创建的日志器同样生效
+    return structlog.get_logger(logger_name=f"{ROOT_LOGGER_NAME}.{name}")
@@ -5,6 +5,8 @@ pytest configuration file
 
 import pytest
 import asyncio
+import json
+import re
 import sys
 import os
 from pathlib import Path
@@ -13,6 +15,10 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.services.llm.base import LLMProvider
+
+OPTIONS_PATTERN = re.compile(r'"(\w+)": "string" // 玩家姓名。从以下选项中选择：(.*)')
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -22,6 +28,62 @@ def event_loop():
     loop.close()
 
 
+class ScriptedProvider(LLMProvider):
+    """根据提示词中的选项返回合法响应的提供商"""
+
+    def __init__(self):
+        super().__init__({"api_key": "test"})
+        self.calls = 0
+
+    def generate(self, model, prompt, temperature=0.7, json_mode=True, response_schema=None, **kwargs):
+        self.calls += 1
+        response = {"bid": "1", "say": "我认为需要仔细观察。", "summary": "今天很平静。", "reasoning": "测试"}
+        match = OPTIONS_PATTERN.search(prompt)
+        if match:
+            response[match.group(1)] = match.group(2).split(", ")[0].strip()
+        return json.dumps(response, ensure_ascii=False)
+
+    def health_check(self) -> bool:
+        return True
+
+
+@pytest.fixture
+def scripted_llm(monkeypatch):
+    """把全局LLM客户端替换为脚本化提供商"""
+    from src.services.llm import generator
+    from src.services.llm.client import LLMClient
+
+    provider = ScriptedProvider()
+    monkeypatch.setattr(generator, "_global_llm_client", LLMClient({"siliconflow": provider}))
+    return provider
+
+
+@pytest.fixture
+def build_state():
+    """构造6人局（预言家、医生、1狼人、3村民）的工厂函数"""
+    from src.core.models.game_state import State
+    from src.core.models.player import Seer, Doctor, Villager, Werewolf
+
+    def factory():
+        model = "siliconflow/test-model"
+        seer = Seer(name="P1", model=model)
+        doctor = Doctor(name="P2", model=model)
+        werewolves = [Werewolf(name="P3", model=model)]
+        villagers = [Villager(name=name, model=model) for name in ("P4", "P5", "P6")]
+        names = ["P1", "P2", "P3", "P4", "P5", "P6"]
+        for player in [seer, doctor] + werewolves + villagers:
+            player.initialize_game_view(current_players=names, round_number=0, other_wolf=None)
+        return State(
+            villagers=villagers,
+            werewolves=werewolves,
+            seer=seer,
+            doctor=doctor,
+            session_id="test_session",
+        )
+
+    return factory
+
+
 @pytest.fixture
 def mock_llm_client():
     """模拟LLM客户端"""
@@ -97,6 +97,26 @@ class TestModelsAPI:
         assert "providers" in data
         assert isinstance(data["providers"], list)
 
+    def test_provider_circuit_status(self, monkeypatch):
+        """测试提供商熔断状态"""
+        from src.services.llm import generator
+        from src.services.llm.base import LLMProvider
+        from src.services.llm.breaker import BreakerRegistry
+        from src.services.llm.client import LLMClient
+
+        provider = Mock(spec=LLMProvider)
+        provider.validate_config.return_value = True
+        breakers = BreakerRegistry(min_calls=1)
+        breakers.record("glm", "glm/GLM-4", None, ConnectionError("down"))
+        monkeypatch.setattr(generator, "_global_llm_client", LLMClient({"glm": provider}, breakers=breakers))
+
+        data = client.get("/api/v1/models/providers").json()
+        assert data["providers"]["glm"]["circuit"]["state"] == "open"
+        assert data["available"] == 0
+        health = client.get("/api/v1/status/health").json()
+        assert health["status"] == "degraded"
+        assert "provider:glm" in health["open_circuits"]
+
     def test_model_info(self):
         """测试特定模型信息"""
         response = client.get("/api/v1/models/glm4")
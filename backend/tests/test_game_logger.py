@@ -0,0 +1,145 @@
+"""
+游戏日志持久化单元测试
+Unit tests for game persistence (snapshots and journal)
+"""
+
+import asyncio
+import json
+import os
+import random
+
+from src.core.game.game_master import GameMaster
+from src.core.models.game_state import to_dict
+from src.services.logger.game_logger import (
+    GameJournal,
+    JOURNAL_FILE,
+    SnapshotWriter,
+    load_game,
+    read_game_data,
+    read_journal,
+    read_logs,
+    save_game,
+)
+from src.services.logger.usage_report import USAGE_FILE, summarize_usage, write_usage
+
+
+async def _no_pause(self, seconds):
+    pass
+
+
+def play_game(monkeypatch, build_state, on_progress, first_round_only=False):
+    monkeypatch.setattr(GameMaster, "_pause", _no_pause)
+    random.seed(1)
+    state = build_state()
+    gamemaster = GameMaster(state, on_progress=on_progress)
+    on_progress(state, gamemaster.logs)
+    if first_round_only:
+        asyncio.run(gamemaster.run_round())
+        assert not state.winner
+    else:
+        gamemaster.run_game()
+    return state, gamemaster
+
+
+class TestGameJournal:
+    """增量日志持久化测试"""
+
+    def test_journal_matches_full_snapshot(self, tmp_path, monkeypatch, scripted_llm, build_state):
+        journal = GameJournal(str(tmp_path / "journal"), debounce=0.01, snapshot_interval=10_000)
+        state, gamemaster = play_game(monkeypatch, build_state, journal.record, first_round_only=True)
+        journal.flush(timeout=5)
+
+        # 未压缩前：快照 + 增量日志 可以还原完整游戏
+        assert read_journal(str(tmp_path / "journal"))
+        state_data, logs = read_game_data(str(tmp_path / "journal"))
+        assert state_data == state.to_dict()
+        assert logs == to_dict(gamemaster.logs)
+        assert read_logs(str(tmp_path / "journal")) == logs
+
+        journal.close()
+        assert not os.path.exists(tmp_path / "journal" / JOURNAL_FILE)
+
+        save_game(state, gamemaster.logs, str(tmp_path / "full"))
+        assert journal.get_stats()["snapshots"] == 2  # 初始快照 + 关闭时快照
+        for name in ("game_complete.json", "game_logs.json"):
+            with open(tmp_path / "journal" / name) as a, open(tmp_path / "full" / name) as b:
+                assert json.load(a) == json.load(b)
+
+        loaded_state, loaded_logs = load_game(str(tmp_path / "journal"))
+        assert [r.players for r in loaded_state.rounds] == [r.players for r in state.rounds]
+        assert len(loaded_logs) == len(gamemaster.logs)
+
+    def test_replaying_journal_over_newer_snapshot_is_idempotent(self, tmp_path, monkeypatch, scripted_llm, build_state):
+        directory = str(tmp_path)
+        journal = GameJournal(directory, debounce=0.01, snapshot_interval=10_000)
+        state, gamemaster = play_game(monkeypatch, build_state, journal.record, first_round_only=True)
+        journal.flush(timeout=5)
+        entries = read_journal(directory)
+        assert entries
+
+        # 模拟快照已写出但增量日志尚未删除时崩溃
+        journal.close()
+        with open(os.path.join(directory, JOURNAL_FILE), "w") as file:
+            file.write("".join(json.dumps(op) + "\n" for op in entries))
+            file.write('{"op": "round", "ind')  # 写了一半的行
+
+        state_data, logs = read_game_data(directory)
+        assert state_data == state.to_dict()
+        assert logs == to_dict(gamemaster.logs)
+
+    def test_records_are_coalesced(self, tmp_path, monkeypatch, scripted_llm, build_state):
+        journal = GameJournal(str(tmp_path), debounce=0.05, snapshot_interval=10_000)
+        play_game(monkeypatch, build_state, journal.record)
+        journal.close()
+
+        stats = journal.get_stats()
+        assert stats["writes"] < stats["records"]
+        assert stats["snapshots"] >= 2  # 初始快照 + 结束快照
+
+
+class TestSnapshotWriter:
+    """全量快照模式（persistence_mode=full）测试"""
+
+    def test_writes_snapshot_taken_at_record_time(self, tmp_path, monkeypatch, scripted_llm, build_state):
+        writer = SnapshotWriter(str(tmp_path))
+        state, gamemaster = play_game(monkeypatch, build_state, writer.record, first_round_only=True)
+        writer.flush(timeout=5)
+        expected = state.to_dict()
+
+        # 记录之后再修改状态，不影响已生成的快照
+        state.error_message = "之后的修改"
+        writer.flush(timeout=5)
+        state_data, logs = read_game_data(str(tmp_path))
+        assert state_data == expected
+        assert logs == to_dict(gamemaster.logs)
+
+        writer.record(state, gamemaster.logs)
+        writer.close()
+        assert read_game_data(str(tmp_path))[0]["error_message"] == "之后的修改"
+        stats = writer.get_stats()
+        assert 0 < stats["writes"] <= stats["records"]
+
+
+class TestUsageReport:
+    """LLM用量统计"""
+
+    def test_usage_grouped_by_player_role_and_action(self, tmp_path, monkeypatch, scripted_llm, build_state):
+        state, gamemaster = play_game(monkeypatch, build_state, lambda state, logs: None)
+
+        usage = write_usage(state.to_dict(), to_dict(gamemaster.logs), str(tmp_path))
+
+        session = usage["session"]
+        assert session["calls"] == scripted_llm.calls
+        assert session["total_tokens"] > 0 and session["estimated_calls"] == session["calls"]
+        for group in ("players", "roles", "actions", "models"):
+            assert sum(bucket["calls"] for bucket in usage[group].values()) == session["calls"]
+        assert {"debate", "vote", "summary", "eliminate", "protect", "investigate"} <= set(usage["actions"])
+        assert usage["roles"]["Seer"]["calls"] == usage["players"]["P1"]["calls"]
+        assert set(usage["models"]) == {"siliconflow/test-model"}
+        assert len(usage["most_tokens"]) == 10
+
+        with open(tmp_path / USAGE_FILE) as file:
+            assert json.load(file) == usage
+        # 保存的日志中每次生成都带有 token 数，可以重新汇总
+        save_game(state, gamemaster.logs, str(tmp_path))
+        assert summarize_usage(*read_game_data(str(tmp_path))) == usage
@@ -0,0 +1,359 @@
+"""
+游戏引擎单元测试
+Unit tests for the asyncio GameMaster engine
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.core.game.game_master import GameMaster
+from src.core.game.scheduler import RoundScheduler, Stage
+from src.core.models.game_state import Round
+from src.core.models.logs import LmLog, RoundLog
+from src.core.models.player import Doctor, Player, Seer, Villager, Werewolf
+from src.services.game_manager.event_bridge import event_bridge
+
+@pytest.fixture
+def fast_gamemaster(monkeypatch):
+    """去掉节奏暂停的游戏主控（事件桥未绑定时通知直接丢弃）"""
+    pauses = []
+
+    async def no_pause(self, seconds):
+        pauses.append(seconds)
+
+    monkeypatch.setattr(GameMaster, "_pause", no_pause)
+    return pauses
+
+
+class TestAsyncGameMaster:
+    """异步游戏引擎测试"""
+
+    def test_arun_game_plays_to_completion(self, scripted_llm, fast_gamemaster, build_state):
+        state = build_state()
+        gamemaster = GameMaster(state, num_threads=4)
+
+        winner = asyncio.run(gamemaster.arun_game())
+
+        assert winner in ("Villagers", "Werewolves")
+        assert state.rounds and all(r.success for r in state.rounds)
+        assert len(gamemaster.logs) == len(state.rounds)
+        assert scripted_llm.calls > 0
+        assert fast_gamemaster  # 所有暂停都经过 _pause
+
+    def test_run_game_is_sync_wrapper(self, scripted_llm, fast_gamemaster, build_state):
+        gamemaster = GameMaster(build_state())
+
+        assert gamemaster.run_game() in ("Villagers", "Werewolves")
+
+    def test_debate_streams_deltas(self, scripted_llm, fast_gamemaster, build_state, monkeypatch):
+        deltas = {}
+
+        def record(self, player_name, delta, turn_number, round_number, attempt):
+            deltas.setdefault((round_number, turn_number, player_name), []).append(delta)
+
+        monkeypatch.setattr(GameMaster, "_notify_debate_delta", record)
+        state = build_state()
+        asyncio.run(GameMaster(state).arun_game())
+
+        spoken = {(index, turn + 1, speaker): dialogue
+                  for index, round_ in enumerate(state.rounds)
+                  for turn, (speaker, dialogue) in enumerate(round_.debate)}
+        assert spoken
+        assert {key: "".join(parts) for key, parts in deltas.items()} == spoken
+
+    def test_vote_timeout_uses_default(self, scripted_llm, fast_gamemaster, build_state, monkeypatch):
+        state = build_state()
+        gamemaster = GameMaster(state)
+        state.rounds.append(Round())
+        gamemaster.this_round.players = list(state.players.keys())
+
+        async def slow_vote(self):
+            raise asyncio.TimeoutError()
+
+        monkeypatch.setattr(Villager, "avote", slow_vote)
+
+        votes, vote_logs = asyncio.run(gamemaster.run_voting())
+
+        assert set(votes) == set(state.players)
+        assert all(votes[name] != name for name in ("P4", "P5", "P6"))
+        assert any("Timeout" in str(log.log) for log in vote_logs)
+
+    def test_debate_pipeline_delivers_in_order(self, fast_gamemaster, build_state, monkeypatch):
+        from src.config import settings
+
+        events = []
+        running = []
+        peak = []
+
+        async def generate(self, speaker_name, turn_number=None):
+            running.append(speaker_name)
+            peak.append(len(running))
+            # 后面的发言先生成完，展示顺序仍然按发言顺序
+            await asyncio.sleep(0.01 * (7 - turn_number))
+            running.remove(speaker_name)
+            events.append(("generated", speaker_name))
+            return f"{speaker_name}的发言", f"log-{speaker_name}"
+
+        async def no_voting(self):
+            return {}, []
+
+        monkeypatch.setattr(settings.game, "debate_concurrent", 2)
+        monkeypatch.setattr(settings.game, "speculative_prefetch", False)
+        monkeypatch.setattr(GameMaster, "_generate_speech", generate)
+        monkeypatch.setattr(GameMaster, "run_voting", no_voting)
+        monkeypatch.setattr(GameMaster, "_notify_debate_turn",
+                            lambda self, player_name, **kwargs: events.append(("delivered", player_name)))
+        state = build_state()
+        gamemaster = GameMaster(state)
+        state.rounds.append(Round())
+        gamemaster.logs.append(RoundLog())
+        gamemaster.this_round.players = list(state.players.keys())
+
+        asyncio.run(gamemaster.run_day_phase())
+
+        speakers = [speaker for speaker, _ in gamemaster.this_round.debate]
+        assert [name for kind, name in events if kind == "delivered"] == speakers
+        assert max(peak) == 2
+        # 第一位发言在所有发言生成完之前就已展示
+        assert events.index(("delivered", speakers[0])) < events.index(("generated", speakers[-1]))
+        assert state.players["P1"].gamestate.debate == [(name, f"{name}的发言") for name in speakers]
+
+    def test_votes_and_summaries_prefetched(self, build_state, monkeypatch):
+        from src.config import settings
+
+        events = []
+
+        async def generate(self, speaker_name, turn_number=None):
+            return f"{speaker_name}的发言", f"log-{speaker_name}"
+
+        async def vote(self):
+            events.append(("vote", self.name, len(self.gamestate.debate)))
+            return "P4", LmLog(prompt="", raw_resp="", result={"vote": "P4"})
+
+        async def summarize(self, action, options):
+            events.append(("summary", self.name, self.observations[-1]))
+            return {"summary": f"{self.name}的总结"}, LmLog(prompt="", raw_resp="", result=None)
+
+        async def pause(self, seconds):
+            await asyncio.sleep(0.01)  # 展示暂停期间让预取任务运行
+
+        monkeypatch.setattr(settings.game, "speculative_prefetch", True)
+        monkeypatch.setattr(GameMaster, "_pause", pause)
+        monkeypatch.setattr(GameMaster, "_generate_speech", generate)
+        monkeypatch.setattr(GameMaster, "_notify_debate_turn",
+                            lambda self, player_name, **kwargs: events.append(("delivered", player_name)))
+        monkeypatch.setattr(Player, "avote", vote)
+        monkeypatch.setattr(Player, "_agenerate_action", summarize)
+        state = build_state()
+        gamemaster = GameMaster(state)
+        state.rounds.append(Round())
+        gamemaster.logs.append(RoundLog())
+        gamemaster.this_round.players = list(state.players.keys())
+
+        async def day():
+            await gamemaster.run_day_phase()
+            assert gamemaster._summary_prefetch is not None
+            gamemaster.exile()
+            await gamemaster.run_summaries()
+
+        asyncio.run(day())
+
+        kinds = [event[0] for event in events]
+        # 投票在最后一位发言展示之前就已开始，且看到的是完整的辩论
+        assert kinds.index("vote") < len(kinds) - 1 - kinds[::-1].index("delivered")
+        assert all(event[2] == 6 for event in events if event[0] == "vote")
+        assert gamemaster.this_round.exiled == "P4"
+        # 总结基于放逐公告生成，只记入真实玩家一次
+        summaries = [event for event in events if event[0] == "summary"]
+        assert len(summaries) == 5
+        assert all("P4 获得最高票数" in event[2] for event in summaries)
+        assert state.players["P1"].observations[-1] == "第0轮：总结：P1的总结"
+        assert state.players["P1"].observations[-2] == "第0轮：主持人公告：P4 获得最高票数(6票)，被投票放逐。"
+
+    def test_votes_collected_concurrently_and_revealed_in_order(
+            self, fast_gamemaster, build_state, monkeypatch):
+        from src.config import settings
+
+        delays = {"P1": 0.05, "P2": 0.01, "P3": 0.03, "P4": 0.02, "P5": 0.04, "P6": 5.0}
+        revealed = []
+
+        async def vote(self):
+            await asyncio.sleep(delays[self.name])
+            return "P3", LmLog(prompt="", raw_resp="", result={"vote": "P3"})
+
+        monkeypatch.setattr(Player, "avote", vote)
+        monkeypatch.setattr(settings.game, "vote_timeout", 0.2)
+        monkeypatch.setattr(GameMaster, "_notify_vote_cast",
+                            lambda self, voter, target, voter_role: revealed.append(voter))
+        state = build_state()
+        gamemaster = GameMaster(state)
+        state.rounds.append(Round())
+        gamemaster.this_round.players = list(state.players.keys())
+
+        started = time.monotonic()
+        votes, vote_logs = asyncio.run(gamemaster.run_voting())
+
+        assert time.monotonic() - started < 1.0  # 共用截止时间，不是逐个等待
+        assert revealed == gamemaster.this_round.players
+        assert votes == {"P1": "P3", "P2": "P3", "P3": "P3", "P4": "P3", "P5": "P3",
+                         "P6": gamemaster._default_vote("P6")}
+        assert [log.player for log in vote_logs if "Timeout" in str(log.log)] == ["P6"]
+
+    def test_night_actions_run_concurrently(self, scripted_llm, fast_gamemaster, build_state, monkeypatch):
+        from src.config import settings
+
+        running = []
+        peak = []
+        notified = []
+
+        def decision(target):
+            async def decide(self):
+                running.append(self.name)
+                peak.append(len(running))
+                await asyncio.sleep(0.05)
+                running.remove(self.name)
+                return target, LmLog(prompt="", raw_resp="", result={"reasoning": "测试"})
+            return decide
+
+        monkeypatch.setattr(settings.game, "night_concurrent", True)
+        monkeypatch.setattr(Werewolf, "aeliminate", decision("P4"))
+        monkeypatch.setattr(Doctor, "asave", decision("P4"))
+        monkeypatch.setattr(Seer, "aunmask", decision("P3"))
+        monkeypatch.setattr(GameMaster, "_notify_night_action",
+                            lambda self, action_type, **kwargs: notified.append(action_type))
+        state = build_state()
+        gamemaster = GameMaster(state)
+
+        asyncio.run(gamemaster.run_round())
+
+        stages = gamemaster.timing_stats["action_times"][0]["stages"]
+        decides = [stages[name] for name in ("decide_eliminate", "decide_protect", "decide_unmask")]
+        # 三个决定同时进行：每个都在其余决定结束前开始
+        assert max(peak) == 3
+        assert max(d["start"] for d in decides) < min(d["start"] + d["elapsed"] for d in decides)
+        assert stages["eliminate"]["start"] <= stages["protect"]["start"] <= stages["resolve_night"]["start"]
+        assert stages["resolve_night"]["start"] <= stages["unmask"]["start"]
+        assert notified == ["night_eliminate", "night_protect", "night_investigate"]
+        assert (state.rounds[0].eliminated, state.rounds[0].protected,
+                state.rounds[0].unmasked) == ("P4", "P4", "P3")
+        assert state.seer.previously_unmasked == {"P3": "Werewolf"}
+
+    def test_unmask_overlaps_night_resolution(self, scripted_llm, fast_gamemaster, build_state, monkeypatch):
+        from src.config import settings
+
+        async def slow_unmask(self):
+            await asyncio.sleep(0.2)
+            return "P3", LmLog(prompt="", raw_resp="", result={"reasoning": "测试"})
+
+        monkeypatch.setattr(settings.game, "night_concurrent", True)
+        monkeypatch.setattr(Seer, "aunmask", slow_unmask)
+        state = build_state()
+        gamemaster = GameMaster(state)
+
+        asyncio.run(gamemaster.run_round())
+
+        stages = gamemaster.timing_stats["action_times"][0]["stages"]
+        unmask_done = stages["decide_unmask"]["start"] + stages["decide_unmask"]["elapsed"]
+        # 夜晚结算和天亮不等待预言家的查验
+        assert stages["resolve_night"]["start"] < unmask_done
+        assert stages["dawn"]["start"] < unmask_done
+        # 查验结果在白天阶段读取观察记录之前记入
+        assert stages["check_night"]["start"] >= unmask_done
+        assert stages["day"]["start"] >= stages["unmask"]["start"]
+        assert state.seer.previously_unmasked == {"P3": "Werewolf"}
+
+
+class TestRoundScheduler:
+    """回合阶段依赖图调度"""
+
+    def test_runs_independent_stages_in_parallel(self):
+        order = []
+
+        async def work(name, seconds, value=None):
+            order.append(f"start:{name}")
+            await asyncio.sleep(seconds)
+            order.append(f"end:{name}")
+            return value
+
+        halted_after = []
+        scheduler = RoundScheduler(
+            [
+                Stage("a", lambda: work("a", 0.05, 1)),
+                Stage("b", lambda: work("b", 0.01, 2)),
+                Stage("sum", lambda a, b: a + b, needs=("a", "b")),
+                Stage("late", lambda: work("late", 0.0), after=("b",)),
+                Stage("skipped", lambda: order.append("skipped"), after=("sum",)),
+            ],
+            on_done=lambda stage, elapsed: halted_after.append(stage.name),
+            should_halt=lambda: "sum" in halted_after,
+        )
+
+        results = asyncio.run(scheduler.run())
+
+        assert order[:2] == ["start:a", "start:b"]
+        # late 只依赖 b，不等 a 完成
+        assert order.index("start:late") < order.index("end:a")
+        assert results["sum"] == 3
+        assert scheduler.halted and "skipped" not in order and "skipped" not in results
+        assert scheduler.timings["a"]["elapsed"] >= 0.05
+        assert scheduler.timings["sum"]["start"] >= scheduler.timings["a"]["elapsed"] - 0.002
+
+    def test_rejects_invalid_graphs(self):
+        noop = lambda *args: None
+        with pytest.raises(ValueError, match="unknown"):
+            RoundScheduler([Stage("a", noop, after=("missing",))])
+        with pytest.raises(ValueError, match="Cyclic"):
+            RoundScheduler([Stage("a", noop, after=("b",)), Stage("b", noop, needs=("a",))])
+        with pytest.raises(ValueError, match="Duplicate"):
+            RoundScheduler([Stage("a", noop), Stage("a", noop)])
+
+    def test_round_records_stage_timings(self, scripted_llm, fast_gamemaster, build_state):
+        gamemaster = GameMaster(build_state())
+        asyncio.run(gamemaster.arun_game())
+
+        timings = gamemaster.timing_stats["action_times"]
+        assert [entry["round"] for entry in timings] == list(range(len(gamemaster.state.rounds)))
+        assert {"decide_eliminate", "decide_protect", "decide_unmask", "resolve_night", "dawn"} <= set(
+            timings[0]["stages"])
+
+
+class TestEventBridge:
+    """事件桥测试"""
+
+    def test_events_from_threads_are_delivered_in_order(self):
+        received = []
+
+        async def notify(index):
+            received.append(index)
+
+        async def main():
+            event_bridge.attach(asyncio.get_running_loop(), maxsize=100)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, lambda: [event_bridge.publish(notify, i) for i in range(20)]
+            )
+            await event_bridge.aclose()
+
+        asyncio.run(main())
+
+        assert received == list(range(20))
+
+    def test_full_queue_drops_events(self):
+        async def notify():
+            pass
+
+        async def main():
+            event_bridge.attach(asyncio.get_running_loop(), maxsize=2)
+            accepted = [event_bridge.publish(notify) for _ in range(5)]
+            stats = event_bridge.get_stats()
+            await event_bridge.aclose()
+            return accepted, stats
+
+        before = event_bridge.get_stats()["dropped"]
+        accepted, stats = asyncio.run(main())
+
+        assert accepted == [True, True, False, False, False]
+        assert stats["dropped"] - before == 3
+        assert stats["queue_depth"] == 2
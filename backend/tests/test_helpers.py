@@ -0,0 +1,108 @@
+"""
+工具函数单元测试
+Unit tests for JSON parsing helpers and structured logging
+"""
+
+import io
+import json
+
+import pytest
+import structlog
+
+from src.utils.helpers import JsonFieldStream, extract_json, get_parse_stats, parse_json, reset_parse_stats
+from src.utils.log import Preview, SampleProcessor, configure_logging, get_logger
+
+
+class CountingPreview(Preview):
+    """记录被格式化次数的 Preview"""
+
+    calls = 0
+
+    def __str__(self):
+        CountingPreview.calls += 1
+        return super().__str__()
+
+
+class TestParseJson:
+    """parse_json 解析各种格式的模型输出"""
+
+    def test_plain_fenced_and_mixed(self):
+        assert parse_json('{"vote": "Alice"}') == {"vote": "Alice"}
+        assert parse_json('```json\n{"vote": "Bob"}\n```') == {"vote": "Bob"}
+        assert parse_json('我认为应该投票给他。\n{"vote": "Carol", "reasoning": "可疑"}') == {
+            "vote": "Carol", "reasoning": "可疑"}
+
+    def test_unparseable(self):
+        assert parse_json("") is None
+        assert parse_json(None) is None
+        assert parse_json("{not: [valid") is None
+
+    def test_tiers(self):
+        reset_parse_stats()
+        parse_json('  {"vote": "Alice"}\n')
+        parse_json('好的：```json\n{"vote": "Bob"}\n```')
+        parse_json("{vote: Carol}")
+        parse_json("{not: [valid")
+        assert get_parse_stats() == {"json": 1, "extract": 1, "fallback": 1, "failed": 1}
+
+    def test_extract_ignores_braces_inside_strings(self):
+        text = '说明 {"say": "他说}不对{", "nested": {"q": "\\"}"}} 以上'
+        assert extract_json(text) == {"say": "他说}不对{", "nested": {"q": '"}'}}
+        assert extract_json("{broken} 然后 {\"vote\": \"P2\"}") == {"vote": "P2"}
+
+
+class TestJsonFieldStream:
+    """从不完整的JSON中增量提取字段"""
+
+    def test_char_by_char(self):
+        text = '{"reasoning": "say \\"say\\": no", "say": "他说\\"好\\"\\n\\u4f60\\ud83d\\ude00", "x": 1}'
+        stream = JsonFieldStream("say")
+        pieces = [stream.feed(char) for char in text]
+        assert stream.done
+        assert "".join(pieces) == stream.value == json.loads(text)["say"]
+
+    def test_field_missing(self):
+        stream = JsonFieldStream("say")
+        assert stream.feed('{"vote": "P1"}') == ""
+        assert not stream.done
+
+
+class TestStructuredLogger:
+    """结构化日志：级别、采样和延迟格式化"""
+
+    def teardown_method(self):
+        configure_logging()
+
+    def test_info_level_skips_debug_formatting(self):
+        configure_logging(level="info")
+        CountingPreview.calls = 0
+        get_logger("test").debug("event", text=CountingPreview("x" * 500))
+        assert CountingPreview.calls == 0
+
+    def test_debug_output_is_structured(self):
+        stream = io.StringIO()
+        configure_logging(level="debug", fmt="json", stream=stream)
+
+        get_logger("test").debug("parsed", length=3, text=Preview("abcdef", 3))
+
+        record = json.loads(stream.getvalue())
+        assert record["logger"] == "werewolf.test"
+        assert record["event"] == "parsed"
+        assert record["level"] == "debug"
+        assert record["length"] == 3
+        assert record["text"].startswith("abc...")
+
+    def test_sampling_keeps_warnings(self):
+        sampler = SampleProcessor(rate=0.0)
+        with pytest.raises(structlog.DropEvent):
+            sampler(None, "debug", {"event": "e"})
+        assert sampler(None, "warning", {"event": "e"}) == {"event": "e"}
+
+    def test_text_format(self):
+        stream = io.StringIO()
+        configure_logging(level="info", fmt="text", stream=stream)
+
+        get_logger("llm").debug("hidden")
+        get_logger("llm").warning("result_rejected", result="Mallory")
+
+        assert stream.getvalue() == "[werewolf.llm] warning result_rejected result=Mallory\n"
@@ -0,0 +1,784 @@
+"""
+LLM服务层单元测试
+Unit tests for the LLM service layer
+"""
+
+import asyncio
+import json
+import random
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from src.services.llm.base import LLMProvider
+from src.services.llm.client import LLMClient
+from src.services.llm.breaker import BreakerRegistry, CircuitOpenError
+from src.services.llm.cache import CacheMissError, ResponseCache
+from src.services.llm.hedging import HedgePolicy
+from src.config.settings import Settings
+from src.services.llm.pool import PoolMember, ProviderPool
+from src.services.llm.routing import ProviderNotFoundError, RoutingTable
+from src.services.llm.usage import record_usage
+from src.services.llm.limiter import FairSemaphore, LLMLimiter, TokenBucket
+from src.services.llm import generator
+from src.services.llm.generator import generate, agenerate, format_prompt, get_template, repair_result
+from src.services.llm.retry import ErrorKind, RetryBudget, RetryPolicy, classify_error, current_retry_budget
+from src.services.llm.providers import GLMProvider, SiliconFlowProvider
+from src.services.llm.transport import http_pool
+from src.utils.helpers import estimate_tokens
+
+
+class FakeProvider(LLMProvider):
+    """记录调用参数并返回固定响应的提供商"""
+
+    def __init__(self, response: str = '{"vote": "Alice", "reasoning": "测试"}'):
+        super().__init__({"api_key": "test"})
+        self.response = response
+        self.calls = []
+
+    def generate(self, model, prompt, temperature=0.7, json_mode=True, response_schema=None, **kwargs):
+        self.calls.append({"model": model, "prompt": prompt, **kwargs})
+        return self.response
+
+    def health_check(self) -> bool:
+        return True
+
+
+class TestLLMClient:
+    """LLMClient 路由测试"""
+
+    def test_call_strips_provider_prefix(self):
+        provider = FakeProvider()
+        client = LLMClient({"siliconflow": provider})
+
+        client.call(model="siliconflow/Qwen/Qwen3-32B", prompt="hi")
+
+        assert provider.calls[0]["model"] == "Qwen/Qwen3-32B"
+
+    def test_acall_uses_same_routing(self):
+        provider = FakeProvider()
+        client = LLMClient({"glm": provider})
+
+        result = asyncio.run(client.acall(model="glm/GLM-4", prompt="hi", system_message="sys"))
+
+        assert result == provider.response
+        assert provider.calls[0]["model"] == "GLM-4"
+        assert provider.calls[0]["system_message"] == "sys"
+
+    def test_unknown_provider_raises(self):
+        client = LLMClient({"glm": FakeProvider()})
+        with pytest.raises(ValueError):
+            asyncio.run(client.acall(model="gpt-4o", prompt="hi"))
+
+
+class TestRoutingTable:
+    """由 models.yaml 编译的路由表"""
+
+    def test_routes_match_keyword_rules(self):
+        providers = {name: FakeProvider() for name in ("siliconflow", "glm", "openai", "openrouter", "minimax")}
+        table = RoutingTable.from_registry(providers)
+
+        assert table.resolve("siliconflow/Qwen/Qwen3-32B")[::2] == ("siliconflow", "Qwen/Qwen3-32B")
+        assert table.resolve("glm4")[::2] == ("glm", "GLM-4")  # models.yaml 中的ID
+        assert table.resolve("pro")[::2] == ("glm", "GLM-4")  # 别名
+        assert table.resolve("gpt-4o")[::2] == ("openai", "gpt-4o")
+        assert table.resolve("anthropic/claude-3.5-sonnet").provider_name == "openrouter"
+        assert table.resolve("MiniMaxAI/MiniMax-M1-80k").provider_name == "minimax"
+        assert table.resolve("abab-M2").provider_name == "minimax"
+        assert table.resolve("THUDM/GLM-Z1-9B-0414").provider_name == "siliconflow"
+        assert table.resolve("inclusionAI/Ling-mini-2.0").provider_name == "siliconflow"
+        assert table.resolve("gpt-4o").provider is providers["openai"]
+
+    def test_fallback_and_missing_provider(self):
+        table = RoutingTable.from_registry({"glm": FakeProvider()})
+
+        assert table.resolve("unknown-model").provider_name == "glm"
+        with pytest.raises(ProviderNotFoundError, match="openai"):
+            table.resolve("gpt-4o")
+        with pytest.raises(ValueError):
+            RoutingTable({}).resolve("anything")
+
+
+def _member(key, weight=1, **limits):
+    provider = FakeProvider(f'{{"vote": "{key}"}}')
+    provider.api_key = key
+    return PoolMember(provider, weight=weight, **limits)
+
+
+class TestProviderPool:
+    """多密钥负载均衡"""
+
+    def test_weighted_round_robin(self):
+        pool = ProviderPool("siliconflow", [_member("key-a", 2), _member("key-b", 1)],
+                            strategy="weighted_round_robin")
+
+        used = [pool.generate(model="m", prompt="hi") for _ in range(6)]
+
+        assert used.count('{"vote": "key-a"}') == 4
+        assert used[:3] == ['{"vote": "key-a"}', '{"vote": "key-b"}', '{"vote": "key-a"}']
+
+    def test_least_outstanding_prefers_idle_member(self):
+        pool = ProviderPool("siliconflow", [_member("key-a"), _member("key-b")])
+        busy, _ = pool._select("hi")
+
+        assert pool.generate(model="m", prompt="hi") != busy.provider.response
+        assert [m["in_flight"] for m in pool.get_stats()["members"]].count(1) == 1
+
+    def test_rate_limited_key_cools_down(self):
+        limited = _member("key-a")
+        limited.provider = FlakyProvider([_status_error(openai.RateLimitError, 429, {"retry-after": "30"})])
+        limited.provider.api_key = "key-a"
+        pool = ProviderPool("siliconflow", [limited, _member("key-b")], strategy="weighted_round_robin")
+
+        with pytest.raises(openai.RateLimitError):
+            pool.generate(model="m", prompt="hi")
+        results = {pool.generate(model="m", prompt="hi") for _ in range(3)}
+
+        assert results == {'{"vote": "key-b"}'}
+        stats = pool.get_stats()["members"][0]
+        assert stats["rate_limited"] == 1 and stats["cooldown_seconds"] > 20
+        assert stats["key"] == "...ey-a"
+
+    def test_per_key_quota(self):
+        pool = ProviderPool("siliconflow", [_member("key-a", rpm=1), _member("key-b", rpm=1)],
+                            strategy="weighted_round_robin")
+
+        pool.generate(model="m", prompt="hi")
+        pool.generate(model="m", prompt="hi")
+
+        assert [m["requests"] for m in pool.get_stats()["members"]] == [1, 1]
+        assert [m["rpm_remaining"] for m in pool.get_stats()["members"]] == [0, 0]
+
+    def test_from_settings_builds_pool(self, monkeypatch):
+        settings = Settings()
+        monkeypatch.setattr(settings.llm, "glm_api_key", "key-a, key-b")
+        monkeypatch.setattr(settings.llm, "siliconflow_api_key", "key-c")
+        client = LLMClient.from_settings(settings)
+
+        assert isinstance(client.providers["glm"], ProviderPool)
+        assert [m["key"] for m in client.get_pool_stats()["glm"]["members"]] == ["...ey-a", "...ey-b"]
+        assert not isinstance(client.providers["siliconflow"], ProviderPool)
+
+
+class UsageProvider(FakeProvider):
+    """依次返回给定的响应或抛出错误，并像真实提供商一样报告 usage"""
+
+    def __init__(self, outcomes):
+        super().__init__()
+        self.outcomes = list(outcomes)
+
+    def generate(self, model, prompt, temperature=0.7, json_mode=True, response_schema=None, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        record_usage(SimpleNamespace(usage=SimpleNamespace(prompt_tokens=12, completion_tokens=5)))
+        return outcome
+
+
+class TestUsageAccounting:
+    """每次生成的 token 数、耗时和重试次数"""
+
+    def test_usage_summed_over_attempts(self):
+        provider = UsageProvider([httpx.ConnectError("down"), "not json", '{"vote": "Alice"}'])
+        client = LLMClient({"siliconflow": provider})
+
+        result, log = generate(prompt_template="vote", response_schema={}, worldstate={}, model="siliconflow/x",
+                               allowed_values=["Alice"], result_key="vote", llm_client=client,
+                               retry_policy=RetryPolicy(max_attempts=3, base_delay=0, max_delay=0))
+
+        assert result == "Alice"
+        assert log.attempts == 3  # 传输错误 + 无效响应 + 成功
+        assert (log.prompt_tokens, log.completion_tokens, log.tokens_estimated) == (24, 10, False)
+        assert log.ttfb is not None and log.latency >= log.ttfb
+        assert log.to_dict()["prompt_tokens"] == 24
+
+    def test_streaming_usage_is_estimated(self):
+        client = LLMClient({"siliconflow": FakeProvider('{"say": "你好"}')})
+        meta = {}
+
+        async def collect():
+            return [delta async for delta in client.astream(model="siliconflow/x", prompt="hi", call_meta=meta)]
+
+        asyncio.run(collect())
+        assert meta["tokens_estimated"] is True
+        assert meta["completion_tokens"] > 0 and meta["ttfb"] <= meta["latency"]
+
+
+class SlowProvider(FakeProvider):
+    """记录同时进行中的请求数"""
+
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+
+    async def agenerate(self, model, prompt, temperature=0.7, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return prompt
+
+
+class TestLLMLimiter:
+    """并发与速率限制"""
+
+    def test_concurrency_is_capped_and_callers_queue(self):
+        provider = SlowProvider()
+        limiter = LLMLimiter(providers={"siliconflow": {"max_concurrency": 2}})
+        client = LLMClient({"siliconflow": provider}, limiter=limiter)
+
+        async def run():
+            return await asyncio.gather(*(client.acall(model="siliconflow/x", prompt=str(i)) for i in range(6)))
+
+        assert asyncio.run(run()) == [str(i) for i in range(6)]
+        assert provider.peak == 2
+        stats = limiter.get_stats()["providers"]["siliconflow"]
+        assert stats["calls"] == 6
+        assert stats["waited_calls"] == 4
+        assert stats["in_flight"] == 0 and stats["queued"] == 0
+
+    def test_fair_semaphore_is_fifo(self):
+        semaphore = FairSemaphore(1)
+        order = []
+
+        async def worker(index):
+            await semaphore.aacquire()
+            order.append(index)
+            await asyncio.sleep(0)
+            semaphore.release()
+
+        async def run():
+            await semaphore.aacquire()
+            tasks = [asyncio.create_task(worker(i)) for i in range(5)]
+            await asyncio.sleep(0)
+            semaphore.release()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        assert order == [0, 1, 2, 3, 4]
+
+    def test_cancelled_call_refunds_reservation(self):
+        limiter = LLMLimiter(providers={"siliconflow": {"rpm": 60, "tpm": 600}}, completion_tokens=100)
+        bucket = limiter._limits_for("siliconflow", "x")[-1].tokens
+
+        async def run():
+            # 耗尽令牌后，下一个调用在等待中被取消
+            async with limiter.alimit("siliconflow", "x", "a" * 2000) as ticket:
+                ticket.record_response("")
+            before = bucket.available
+            task = asyncio.create_task(limiter.alimit("siliconflow", "x", "hi").__aenter__())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return before
+
+        before = asyncio.run(run())
+        assert bucket.available == pytest.approx(before, abs=1)
+
+        # 调用中被取消：只退还为响应预留的部分
+        async def in_flight():
+            async with limiter.alimit("siliconflow", "y", "hi"):
+                raise asyncio.CancelledError
+
+        limiter = LLMLimiter(providers={"siliconflow": {"tpm": 600}}, completion_tokens=100)
+        bucket = limiter._limits_for("siliconflow", "y")[-1].tokens
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(in_flight())
+        assert bucket.available == pytest.approx(600 - estimate_tokens("hi"), abs=1)
+
+    def test_token_bucket_reservations(self):
+        bucket = TokenBucket(per_minute=60, capacity=2)
+        assert bucket.reserve(1) == 0
+        assert bucket.reserve(1) == 0
+        # 第三个请求需要等待约1秒（每秒补充1个）
+        assert 0.9 < bucket.reserve(1) <= 1.0
+
+
+class TestGenerator:
+    """generate / agenerate 测试"""
+
+    def test_generate_and_agenerate_agree(self):
+        client = LLMClient({"siliconflow": FakeProvider()})
+        kwargs = dict(
+            prompt_template="投票：{{options}}",
+            response_schema={},
+            worldstate={"options": "Alice, Bob"},
+            model="siliconflow/Qwen/Qwen3-32B",
+            allowed_values=["Alice", "Bob"],
+            result_key="vote",
+            llm_client=client,
+        )
+
+        sync_result, sync_log = generate(**kwargs)
+        async_result, async_log = asyncio.run(agenerate(**kwargs))
+
+        assert sync_result == async_result == "Alice"
+        assert async_log.prompt == "投票：Alice, Bob"
+
+    def test_agenerate_rejects_disallowed_values(self):
+        provider = FakeProvider(json.dumps({"vote": "Mallory"}))
+        client = LLMClient({"siliconflow": provider})
+
+        result, log = asyncio.run(agenerate(
+            prompt_template="vote",
+            response_schema={},
+            worldstate={},
+            model="siliconflow/x",
+            allowed_values=["Alice"],
+            result_key="vote",
+            llm_client=client,
+        ))
+
+        assert result is None
+        assert log.result is None
+
+
+    def test_agenerate_streams_say_field(self):
+        response = json.dumps({"reasoning": "先看看", "say": "我觉得\"P3\"很可疑\n大家注意"}, ensure_ascii=False)
+
+        class ChunkedProvider(FakeProvider):
+            async def astream(self, model, prompt, **kwargs):
+                for index in range(0, len(self.response), 3):
+                    yield self.response[index:index + 3]
+
+        deltas = []
+        result, log = asyncio.run(agenerate(
+            prompt_template="debate",
+            response_schema={},
+            worldstate={},
+            model="siliconflow/x",
+            llm_client=LLMClient({"siliconflow": ChunkedProvider(response)}),
+            on_delta=lambda delta, attempt: deltas.append((delta, attempt)),
+            stream_key="say",
+        ))
+
+        assert len(deltas) > 1
+        assert "".join(delta for delta, _ in deltas) == result["say"] == '我觉得"P3"很可疑\n大家注意'
+        assert log.raw_resp == response
+
+    def test_format_prompt_compiles_each_template_once(self, build_state):
+        import jinja2
+        from src.core.game.prompts import ACTION_PROMPTS_AND_SCHEMAS
+
+        player = build_state().players["P1"]
+        worldstate = player._get_game_state()
+        worldstate["options"] = "P2, P3"
+        get_template.cache_clear()
+
+        for _ in range(3):
+            for prompt_template, _schema in ACTION_PROMPTS_AND_SCHEMAS.values():
+                rendered = format_prompt(prompt_template, worldstate)
+                assert rendered == jinja2.Template(prompt_template).render(worldstate)
+
+        info = get_template.cache_info()
+        assert info.misses == len(ACTION_PROMPTS_AND_SCHEMAS)
+        assert info.hits == 2 * len(ACTION_PROMPTS_AND_SCHEMAS)
+
+
+def _status_error(cls, status, headers=None):
+    request = httpx.Request("POST", "https://api.test/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return cls("error", response=response, body=None)
+
+
+class FlakyProvider(FakeProvider):
+    """先依次抛出给定的错误，之后返回正常响应"""
+
+    def __init__(self, errors, response='{"vote": "Alice"}'):
+        super().__init__(response)
+        self.errors = list(errors)
+
+    def generate(self, model, prompt, temperature=0.7, json_mode=True, response_schema=None, **kwargs):
+        self.calls.append({"model": model, "temperature": temperature})
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.response
+
+
+class SequenceProvider(FakeProvider):
+    """依次返回给定的响应（可以是 None 或空字符串）"""
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+
+    def generate(self, model, prompt, temperature=0.7, json_mode=True, response_schema=None, **kwargs):
+        self.calls.append({"model": model, "temperature": temperature})
+        return self.responses.pop(0)
+
+
+class TestRetryPolicy:
+    """错误分类、退避和重试预算"""
+
+    VOTE = dict(prompt_template="vote", response_schema={}, worldstate={}, model="siliconflow/x",
+                allowed_values=["Alice", "Bob"], result_key="vote")
+
+    def test_classify_errors(self):
+        assert classify_error(_status_error(openai.RateLimitError, 429)) is ErrorKind.RATE_LIMIT
+        assert classify_error(_status_error(openai.InternalServerError, 503)) is ErrorKind.TRANSIENT
+        assert classify_error(_status_error(openai.AuthenticationError, 401)) is ErrorKind.FATAL
+        assert classify_error(httpx.ReadTimeout("slow")) is ErrorKind.TRANSIENT
+        assert classify_error(ProviderNotFoundError("No provider available for model: x")) is ErrorKind.FATAL
+        # 无法识别的错误按响应无效处理（重试次数受 max_attempts 限制）
+        assert classify_error(IndexError("list index out of range")) is ErrorKind.INVALID
+
+    def test_rate_limit_honours_retry_after(self, monkeypatch):
+        sleeps = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+
+        monkeypatch.setattr(generator.asyncio, "sleep", fake_sleep)
+        provider = FlakyProvider([_status_error(openai.RateLimitError, 429, {"retry-after": "7"}),
+                                  _status_error(openai.InternalServerError, 500)])
+        client = LLMClient({"siliconflow": provider})
+        policy = RetryPolicy(max_attempts=2, max_transport_retries=3, base_delay=0.5, max_delay=4)
+
+        result, _ = asyncio.run(agenerate(**self.VOTE, llm_client=client, retry_policy=policy))
+
+        assert result == "Alice"
+        assert len(provider.calls) == 3
+        assert sleeps[0] == 7
+        # 第二次重试：full jitter，上限 base_delay * 2
+        assert 0 <= sleeps[1] <= 1.0
+
+    def test_fatal_errors_are_not_retried(self):
+        provider = FlakyProvider([_status_error(openai.AuthenticationError, 401)])
+        result, _ = generate(**self.VOTE, llm_client=LLMClient({"siliconflow": provider}))
+        assert result is None
+        assert len(provider.calls) == 1
+
+    def test_empty_response_is_retried(self):
+        for empty in (None, ""):
+            provider = SequenceProvider([empty, '{"vote": "Alice"}'])
+            result, _ = generate(**self.VOTE, llm_client=LLMClient({"siliconflow": provider}),
+                                 retry_policy=RetryPolicy(max_attempts=2))
+            assert result == "Alice"
+            assert len(provider.calls) == 2
+
+        # 提供商返回格式异常时同样重新生成
+        provider = FlakyProvider([IndexError("list index out of range")])
+        result, _ = generate(**self.VOTE, llm_client=LLMClient({"siliconflow": provider}),
+                             retry_policy=RetryPolicy(max_attempts=2))
+        assert result == "Alice"
+        assert len(provider.calls) == 2
+
+    def test_invalid_result_is_repaired_locally(self):
+        provider = FakeProvider('{"vote": " bob。"}')
+        result, _ = generate(**self.VOTE, llm_client=LLMClient({"siliconflow": provider}))
+        assert result == "Bob"
+        assert len(provider.calls) == 1
+
+    def test_repair_requires_exact_value(self):
+        bids = [0, 1, 2, 3, 4]
+        assert repair_result(None, "4", "bid", bids) == 4
+        assert repair_result(None, 4.0, "bid", bids) == 4
+        assert repair_result('{"bid": 3}', None, "bid", bids) == 3
+        # 只是包含某个允许值的结果不会被修复，交给重试
+        assert repair_result(None, "44", "bid", bids) is None
+        assert repair_result(None, "-1", "bid", bids) is None
+        assert repair_result(None, "我投票给Bob", "vote", ["Alice", "Bob"]) is None
+
+        provider = FakeProvider('{"vote": "我投票给bob。"}')
+        result, _ = generate(**self.VOTE, llm_client=LLMClient({"siliconflow": provider}),
+                             retry_policy=RetryPolicy(max_attempts=2))
+        assert result is None
+        assert len(provider.calls) == 2
+
+    def test_session_budget_limits_retries(self):
+        provider = FakeProvider('{"vote": "Mallory"}')
+        budget = RetryBudget(1)
+        token = current_retry_budget.set(budget)
+        try:
+            for _ in range(3):
+                generate(**self.VOTE, llm_client=LLMClient({"siliconflow": provider}),
+                         retry_policy=RetryPolicy(max_attempts=2))
+        finally:
+            current_retry_budget.reset(token)
+        # 第一次调用用掉唯一的重试，之后都不再重试
+        assert len(provider.calls) == 4
+        assert budget.get_stats() == {"limit": 1, "spent": 1, "denied": 2}
+
+
+class TestResponseCache:
+    """响应缓存：read_through、LRU淘汰和 replay"""
+
+    def test_read_through_and_retry_bypass(self, tmp_path):
+        provider = FakeProvider()
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), mode="read_through")
+        client = LLMClient({"siliconflow": provider}, cache=cache)
+
+        for _ in range(3):
+            assert client.call(model="siliconflow/x", prompt="hi", temperature=0.5) == provider.response
+        assert len(provider.calls) == 1
+        # 不同温度是不同的键；use_cache=False 强制重新调用
+        client.call(model="siliconflow/x", prompt="hi", temperature=0.7)
+        client.call(model="siliconflow/x", prompt="hi", temperature=0.5, use_cache=False)
+        assert len(provider.calls) == 3
+        assert cache.get_stats()["hits"] == 2
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_entries=3)
+        for index in range(3):
+            cache.put(f"k{index}", f"p{index}", "m", f"r{index}")
+        cache.get("k0", "p0")
+        cache.put("k3", "p3", "m", "r3")
+        assert cache.get("k1", "p1") is None
+        assert cache.get("k0", "p0") == "r0"
+        assert cache.get_stats()["entries"] == 3
+
+    def test_entry_count_tracked_across_reopen(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = ResponseCache(path, max_entries=3)
+        cache.put("k0", "p0", "m", "r0")
+        cache.put("k0", "p0", "m", "r0b")  # 覆盖不增加条目数
+        cache.put("k1", "p1", "m", "r1")
+        assert cache.get_stats()["entries"] == 2
+        cache.close()
+
+        cache = ResponseCache(path, max_entries=3)
+        assert cache.get_stats()["entries"] == 2
+        cache.put("k2", "p2", "m", "r2")
+        cache.put("k3", "p3", "m", "r3")
+        assert cache.get_stats()["entries"] == 3
+        assert cache.get_stats()["entries"] == cache._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def test_replay_game_from_logs(self, tmp_path, monkeypatch, scripted_llm, build_state):
+        from src.config import settings
+        from src.core.game.game_master import GameMaster
+        from src.services.logger.game_logger import save_game
+
+        async def no_pause(self, seconds):
+            pass
+
+        monkeypatch.setattr(GameMaster, "_pause", no_pause)
+        # 对局随机性只来自 GAME__SEED，与全局 random 的状态无关
+        monkeypatch.setattr(settings.game, "seed", 3)
+
+        random.seed(1)
+        recorded = build_state()
+        gamemaster = GameMaster(recorded)
+        gamemaster.run_game()
+        save_game(recorded, gamemaster.logs, str(tmp_path / "game"))
+
+        cache = ResponseCache(str(tmp_path / "cache.sqlite"), mode="replay")
+        assert cache.import_game_logs(str(tmp_path / "game")) > 0
+        monkeypatch.setattr(generator, "_global_llm_client", LLMClient({}, cache=cache))
+
+        random.seed(2)
+        replayed = build_state()
+        GameMaster(replayed).run_game()
+
+        assert replayed.winner == recorded.winner
+        assert replayed.to_dict()["rounds"] == recorded.to_dict()["rounds"]
+        assert cache.get_stats()["misses"] == 0
+
+        with pytest.raises(CacheMissError):
+            LLMClient({}, cache=cache).call(model="siliconflow/x", prompt="没有记录的提示词")
+
+
+class AsyncDelayProvider(FakeProvider):
+    """异步等待 delay 秒后返回（或抛出 error）的提供商"""
+
+    def __init__(self, response, delay=0.0, error=None):
+        super().__init__(response)
+        self.delay = delay
+        self.error = error
+        self.cancelled = 0
+
+    async def agenerate(self, model, prompt, **kwargs):
+        self.calls.append({"model": model, "prompt": prompt})
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.response
+
+
+class TestHedging:
+    """对冲请求和故障转移"""
+
+    @staticmethod
+    def _policy(**kwargs):
+        return HedgePolicy({"siliconflow/x": ["glm/y"]}, initial_delay=0.05, min_delay=0.0, **kwargs)
+
+    def test_slow_primary_is_hedged(self):
+        slow = AsyncDelayProvider('{"say": "slow"}', delay=5)
+        fast = AsyncDelayProvider('{"say": "fast"}')
+        client = LLMClient({"siliconflow": slow, "glm": fast}, hedging=self._policy())
+
+        meta = {}
+        text = asyncio.run(client.acall(model="siliconflow/x", prompt="hi", call_meta=meta))
+
+        assert text == '{"say": "fast"}'
+        assert meta.items() >= {"provider": "glm", "model": "glm/y", "hedged": True}.items()
+        assert meta["tokens_estimated"] is True
+        assert slow.cancelled == 1
+        stats = client.hedging.get_stats()
+        assert stats["hedged"] == stats["hedge_wins"] == 1
+        assert stats["winners"] == {"glm/y": 1}
+
+    def test_fast_primary_is_not_hedged(self):
+        primary = AsyncDelayProvider('{"say": "primary"}')
+        backup = AsyncDelayProvider('{"say": "backup"}')
+        client = LLMClient({"siliconflow": primary, "glm": backup}, hedging=self._policy())
+
+        meta = {}
+        assert asyncio.run(client.acall(model="siliconflow/x", prompt="hi", call_meta=meta)) == '{"say": "primary"}'
+        assert meta["hedged"] is False and not backup.calls
+
+    def test_failover_after_repeated_failures(self):
+        broken = AsyncDelayProvider("", error=httpx.ConnectError("down"))
+        backup = AsyncDelayProvider('{"say": "backup"}')
+        client = LLMClient({"siliconflow": broken, "glm": backup},
+                           hedging=self._policy(failover_threshold=2))
+
+        for _ in range(3):
+            assert asyncio.run(client.acall(model="siliconflow/x", prompt="hi")) == '{"say": "backup"}'
+
+        # 连续失败两次后先调用等价模型，第三次不再访问故障的提供商
+        assert len(broken.calls) == 2
+        assert client.hedging.candidates("siliconflow/x") == ["glm/y", "siliconflow/x"]
+
+    def test_failover_is_not_counted_as_hedge(self):
+        broken = AsyncDelayProvider("", error=httpx.ConnectError("down"))
+        backup = AsyncDelayProvider('{"say": "backup"}')
+        client = LLMClient({"siliconflow": broken, "glm": backup}, hedging=self._policy())
+
+        meta = {}
+        assert asyncio.run(client.acall(model="siliconflow/x", prompt="hi", call_meta=meta)) == '{"say": "backup"}'
+
+        # 主模型很快失败后转移到等价模型，没有发出对冲请求
+        assert meta.items() >= {"model": "glm/y", "hedged": False}.items()
+        assert client.hedging.get_stats()["hedged"] == 0
+
+    def test_generator_records_winner_in_log(self):
+        client = LLMClient({"siliconflow": AsyncDelayProvider('{"vote": "Alice"}', delay=5),
+                            "glm": AsyncDelayProvider('{"vote": "Alice"}')}, hedging=self._policy())
+
+        result, log = asyncio.run(agenerate(
+            prompt_template="vote", response_schema={}, worldstate={}, model="siliconflow/x",
+            allowed_values=["Alice"], result_key="vote", llm_client=client,
+        ))
+
+        assert result == "Alice"
+        assert (log.provider, log.model, log.hedged) == ("glm", "glm/y", True)
+        assert log.to_dict()["hedged"] is True
+
+
+class TestCircuitBreaker:
+    """熔断器：打开、快速失败、探测恢复和转移"""
+
+    def test_opens_fast_fails_and_recovers(self):
+        provider = FlakyProvider([httpx.ConnectError("down")] * 3)
+        breakers = BreakerRegistry(min_calls=3, window=5, open_seconds=0.05)
+        client = LLMClient({"siliconflow": provider}, breakers=breakers)
+
+        for _ in range(3):
+            with pytest.raises(httpx.ConnectError):
+                client.call(model="siliconflow/x", prompt="hi")
+        with pytest.raises(CircuitOpenError) as excinfo:
+            client.call(model="siliconflow/x", prompt="hi")
+        assert classify_error(excinfo.value) is ErrorKind.FATAL
+        assert len(provider.calls) == 3
+        assert breakers.get_stats()["providers"]["siliconflow"]["state"] == "open"
+        assert client.health_check() == {"siliconflow": False}
+
+        time.sleep(0.06)
+        # half_open：放行一次探测调用，成功后恢复
+        assert client.call(model="siliconflow/x", prompt="hi") == provider.response
+        assert breakers.get_stats()["providers"]["siliconflow"]["state"] == "closed"
+
+    def test_invalid_responses_do_not_open(self):
+        breakers = BreakerRegistry(min_calls=2)
+        client = LLMClient({"siliconflow": FakeProvider("not json")}, breakers=breakers)
+        for _ in range(3):
+            generate(prompt_template="vote", response_schema={}, worldstate={}, model="siliconflow/x",
+                     allowed_values=["Alice"], result_key="vote", llm_client=client,
+                     retry_policy=RetryPolicy(max_attempts=1))
+        assert breakers.get_stats()["models"]["siliconflow/x"]["state"] == "closed"
+
+    def test_open_circuit_reroutes_to_equivalent(self):
+        primary = AsyncDelayProvider('{"say": "primary"}')
+        backup = AsyncDelayProvider('{"say": "backup"}')
+        breakers = BreakerRegistry(min_calls=1)
+        breakers.record("siliconflow", "siliconflow/x", None, httpx.ConnectError("down"))
+        client = LLMClient({"siliconflow": primary, "glm": backup}, breakers=breakers,
+                           hedging=HedgePolicy({"siliconflow/x": ["glm/y"]}, initial_delay=5))
+
+        assert asyncio.run(client.acall(model="siliconflow/x", prompt="hi")) == '{"say": "backup"}'
+        assert not primary.calls
+
+
+class TestOpenAICompatibleProvider:
+    """OpenAI兼容提供商测试"""
+
+    def test_messages_include_system_message(self):
+        messages = SiliconFlowProvider._build_messages("prompt", "system")
+        assert messages == [
+            {"role": "system", "content": "system"},
+            {"role": "user", "content": "prompt"},
+        ]
+
+    def test_async_client_is_cached_per_loop(self):
+        provider = SiliconFlowProvider({"api_key": "test"})
+
+        async def get_twice():
+            return provider._get_async_client(), provider._get_async_client()
+
+        first, second = asyncio.run(get_twice())
+        third, _ = asyncio.run(get_twice())
+
+        assert first is second
+        assert first is not third
+
+    def test_astream_yields_deltas(self, monkeypatch):
+        events = [
+            {"id": "1", "object": "chat.completion.chunk", "created": 0, "model": "m",
+             "choices": [{"index": 0, "finish_reason": None, "delta": {"content": text}}]}
+            for text in ('{"say": "你', '好"}')
+        ]
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+
+        async def handle(self, request):
+            return httpx.Response(200, content=body.encode(), request=request,
+                                  headers={"content-type": "text/event-stream"})
+
+        monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", handle)
+        provider = SiliconFlowProvider({"api_key": "a", "base_url": "https://stream.test/v1"})
+
+        async def collect():
+            return [delta async for delta in provider.astream(model="m", prompt="hi")]
+
+        assert asyncio.run(collect()) == ['{"say": "你', '好"}']
+
+    def test_providers_share_pooled_transport(self, monkeypatch):
+        completion = {
+            "id": "1", "object": "chat.completion", "created": 0, "model": "m",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": '{"vote": "Alice"}'}}],
+        }
+        monkeypatch.setattr(
+            httpx.HTTPTransport, "handle_request",
+            lambda self, request: httpx.Response(200, json=completion, request=request),
+        )
+        first = SiliconFlowProvider({"api_key": "a", "base_url": "https://pool.test/v1"})
+        second = SiliconFlowProvider({"api_key": "b", "base_url": "https://pool.test/v1/"})
+        other = GLMProvider({"api_key": "c", "base_url": "https://other.test/v1"})
+
+        assert first.client._client is second.client._client
+        assert first.client._client is not other.client._client
+
+        before = http_pool.get_stats()["hosts"]["https://pool.test/v1"]["requests"]
+        assert first.generate(model="m", prompt="hi") == '{"vote": "Alice"}'
+        assert second.generate(model="m", prompt="hi") == '{"vote": "Alice"}'
+        stats = http_pool.get_stats()["hosts"]["https://pool.test/v1"]
+        assert stats["requests"] - before == 2
+        assert stats["in_flight"] == 0
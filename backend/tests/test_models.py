@@ -0,0 +1,131 @@
+"""
+数据模型序列化单元测试
+Unit tests for model serialization
+"""
+
+import enum
+import json
+import random
+
+from src.core.game.game_master import GameMaster
+from src.core.models.context import ContextWindow
+from src.core.models.game_state import JsonEncoder, to_dict, to_json
+from src.core.models.logs import LmLog, VoteLog
+from src.core.models.player import group_and_format_observations
+from src.utils.helpers import estimate_tokens
+
+
+def legacy_to_dict(o):
+    """旧实现：编码为JSON字符串后再解析"""
+    return json.loads(JsonEncoder().encode(o))
+
+
+async def _no_pause(self, seconds):
+    pass
+
+
+class TestToDict:
+    """显式 to_dict 与旧实现输出一致"""
+
+    def test_played_game_matches_legacy(self, monkeypatch, scripted_llm, build_state):
+        monkeypatch.setattr(GameMaster, "_pause", _no_pause)
+        random.seed(3)
+        state = build_state()
+        gamemaster = GameMaster(state)
+        gamemaster.run_game()
+        # 日志中也可能出现字符串形式的默认日志
+        gamemaster.logs[0].votes.append([VoteLog("P1", "P2", "Default vote used")])
+
+        expected = legacy_to_dict(state)
+        current = state.rounds[-1].players
+        for name, player_data in expected["players"].items():
+            player_data["alive"] = name in current
+
+        assert state.to_dict() == expected
+        assert to_dict(gamemaster.logs) == legacy_to_dict(gamemaster.logs)
+
+    def test_to_dict_copies_mutable_fields(self, build_state):
+        state = build_state()
+        data = state.to_dict()
+        data["players"]["P1"]["observations"].append("x")
+        data["seer"]["gamestate"]["current_players"].clear()
+
+        assert state.seer.observations == []
+        assert len(state.seer.gamestate.current_players) == 6
+
+    def test_generic_values(self):
+        class Color(enum.Enum):
+            RED = "red"
+
+        value = {"a": (1, 2), "b": Color.RED, 3: None, "c": LmLog("p", "r", {"k": [1]})}
+
+        assert to_dict(value) == legacy_to_dict(value)
+        assert json.loads(to_json(value)) == legacy_to_dict(value)
+
+
+class TestContextWindow:
+    """观察记录和辩论历史按token预算裁剪"""
+
+    @staticmethod
+    def _history(rounds, repeat=20):
+        observations = []
+        for r in range(rounds):
+            observations.append(f"第{r}轮：主持人公告：P{r}在夜里被淘汰。")
+            observations.append(f"第{r}轮：总结：" + "我怀疑P3，因为他的发言前后矛盾。" * repeat)
+        return observations
+
+    def test_unlimited_matches_full_history(self):
+        observations = self._history(5)
+        window = ContextWindow()
+        assert window.observations(observations) == group_and_format_observations(observations)
+        assert window.observations(observations, budget=10**6) == group_and_format_observations(observations)
+
+    def test_condenses_then_drops_old_rounds(self):
+        observations = self._history(8)
+        full = group_and_format_observations(observations)
+        window = ContextWindow(recent_rounds=2, summary_chars=20)
+
+        condensed = window.observations(observations, budget=1500)
+        assert sum(estimate_tokens(text) for text in condensed) <= 1500
+        assert condensed[-2:] == full[-2:]
+        assert condensed[0].startswith("第0轮（摘要）：")
+        assert "主持人公告：P0在夜里被淘汰。" in condensed[0]
+
+        dropped = window.observations(observations, budget=850)
+        assert dropped[0] == "（第0-1轮的记录已省略）"
+        assert dropped[-2:] == full[-2:]
+
+        # 增量追加后只影响新回合
+        observations.append("第8轮：主持人公告：P8在夜里被淘汰。")
+        assert window.observations(observations)[-1] == "第8轮：\n   - 主持人公告：P8在夜里被淘汰。"
+
+    def test_replaced_history_is_reparsed(self):
+        window = ContextWindow()
+        window.observations(self._history(3))
+
+        # 同样长度的另一份历史（如加载了另一局）不会沿用旧的解析结果
+        other = [obs.replace("P3", "P5") for obs in self._history(3)]
+        assert window.observations(other) == group_and_format_observations(other)
+
+        # 原地修改开头的记录后同样重新解析
+        other[0] = "第0轮：主持人公告：平安夜。"
+        assert window.observations(other) == group_and_format_observations(other)
+
+    def test_player_state_keeps_debate_turns(self, monkeypatch, build_state):
+        from src.config import settings
+
+        player = build_state().players["P1"]
+        player.observations = self._history(6, repeat=5)
+        player.gamestate.debate = [("P2", "我觉得P3很可疑。" * 15)] * 5
+        monkeypatch.setattr(settings.game, "context_budget", 1000)
+        monkeypatch.setattr(settings.game, "context_budgets", {"vote": 0})
+
+        state = player._get_game_state()
+        assert sum(estimate_tokens(text) for text in state["observations"] + state["debate"]) <= 1000
+        assert len(state["debate"]) == 5
+        assert state["debate"][-1] == "P2: " + "我觉得P3很可疑。" * 15
+        assert state["debate_turns_left"] == player._get_game_state(action="vote")["debate_turns_left"]
+        assert state["observations"] != group_and_format_observations(player.observations)
+
+        assert player._get_game_state(action="vote")["observations"] == \
+            group_and_format_observations(player.observations)
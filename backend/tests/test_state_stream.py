@@ -0,0 +1,197 @@
+"""
+版本化状态与增量广播单元测试
+Unit tests for versioned state deltas
+"""
+
+import asyncio
+import json
+import random
+
+from src.api.v1.routes.websocket import ConnectionManager
+from src.config.settings import settings
+from src.core.game.game_master import GameMaster
+from src.services.game_manager.state_stream import StateStream
+from src.utils.json_patch import apply_patch, make_patch
+
+
+class FakeWebSocket:
+    """记录收到消息的WebSocket"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+class SlowWebSocket(FakeWebSocket):
+    """发送前需要等待放行的WebSocket，模拟网络很慢的客户端"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = asyncio.Event()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        await super().send_text(text)
+
+
+async def _no_pause(self, seconds):
+    pass
+
+
+def played_states(monkeypatch, build_state):
+    """逐次记录一局游戏中每次进度回调时的状态"""
+    monkeypatch.setattr(GameMaster, "_pause", _no_pause)
+    random.seed(5)
+    states = []
+    state = build_state()
+    gamemaster = GameMaster(state, on_progress=lambda s, logs: states.append(s.to_dict()))
+    gamemaster.run_game()
+    return states
+
+
+class TestJsonPatch:
+    """JSON Patch 生成与应用"""
+
+    def test_patches_replay_a_whole_game(self, monkeypatch, scripted_llm, build_state):
+        states = played_states(monkeypatch, build_state)
+        doc = states[0]
+        for new in states[1:]:
+            doc = apply_patch(doc, make_patch(doc, new))
+            assert doc == new
+
+    def test_paths_are_escaped(self):
+        old = {"players": {"Qwen/Qwen3-32B": {"alive": True}, "a~b": 1}}
+        new = {"players": {"Qwen/Qwen3-32B": {"alive": False}, "a~b": 2}}
+
+        patch = make_patch(old, new)
+
+        assert {"op": "replace", "path": "/players/Qwen~1Qwen3-32B/alive", "value": False} in patch
+        assert apply_patch(old, patch) == new
+
+    def test_appends_and_truncation(self):
+        old = {"debate": [["A", "x"]], "votes": [1, 2, 3]}
+        new = {"debate": [["A", "x"], ["B", "y"]], "votes": [1]}
+
+        patch = make_patch(old, new)
+
+        assert patch == [
+            {"op": "add", "path": "/debate/1", "value": ["B", "y"]},
+            {"op": "remove", "path": "/votes/2"},
+            {"op": "remove", "path": "/votes/1"},
+        ]
+        assert apply_patch(old, patch) == new
+
+
+class TestStateStream:
+    """版本号与补丁历史"""
+
+    def test_versions_and_deltas(self):
+        stream = StateStream(history_size=2)
+        assert stream.update({"a": 1}) is None
+        assert stream.update({"a": 1}) is None  # 无变化不增加版本
+        stream.update({"a": 2})
+        stream.update({"a": 3})
+        stream.update({"a": 4})
+
+        assert stream.version == 4
+        assert [v for v, _ in stream.deltas_since(2)] == [3, 4]
+        assert stream.deltas_since(4) == []
+        assert stream.deltas_since(1) is None  # 超出保留范围，需要完整快照
+        assert stream.deltas_since(9) is None
+
+
+class TestDeltaBroadcast:
+    """ConnectionManager 增量广播"""
+
+    def test_full_and_delta_clients(self):
+        manager = ConnectionManager()
+        full, delta = FakeWebSocket(), FakeWebSocket()
+
+        async def scenario():
+            await manager.connect(full, "s1")
+            await manager.connect(delta, "s1", delta=True)
+            await manager.broadcast_game_update("s1", {"game_state": {"rounds": []}, "status": "running"})
+            await manager.broadcast_game_update("s1", {"game_state": {"rounds": [{"players": ["A"]}]}, "status": "running"})
+            await manager.broadcast_game_update("s1", {"game_state": {"rounds": [{"players": ["A"]}]}, "status": "running"})
+            await manager.broadcast_phase_change("s1", "night", 0)
+            await manager.drain("s1")
+
+        asyncio.run(scenario())
+
+        assert [m["type"] for m in full.sent] == ["game_update"] * 3 + ["phase_change"]
+        assert full.sent[1]["data"]["version"] == 2
+        # 第一次收到完整快照，第三次没有变化，因此只收到一个补丁
+        assert [m["type"] for m in delta.sent] == ["game_update", "game_patch", "phase_change"]
+        assert delta.sent[1]["data"]["base_version"] == 1
+        assert delta.sent[1]["data"]["patch"] == [{"op": "add", "path": "/rounds/0", "value": {"players": ["A"]}}]
+
+    def test_reconnect_gets_deltas_since_version(self):
+        manager = ConnectionManager()
+        for index in range(3):
+            asyncio.run(manager.broadcast_game_update("s2", {"game_state": {"n": index}, "status": "running"}))
+        client, stale = FakeWebSocket(), FakeWebSocket()
+
+        asyncio.run(manager.send_state_sync(client, "s2", since_version=1))
+        asyncio.run(manager.send_state_sync(stale, "s2", since_version=None))
+
+        assert [m["data"]["version"] for m in client.sent] == [2, 3]
+        assert stale.sent[0]["type"] == "game_update"
+        assert stale.sent[0]["data"] == {"game_state": {"n": 2}, "status": "running", "version": 3}
+
+
+class TestSendQueues:
+    """每个连接独立的发送队列"""
+
+    def test_slow_client_does_not_block_others(self, monkeypatch):
+        monkeypatch.setattr(settings.server, "ws_send_queue_size", 2)
+        monkeypatch.setattr(settings.server, "ws_overflow_policy", "drop_oldest")
+        manager = ConnectionManager()
+        fast, slow = FakeWebSocket(), SlowWebSocket()
+
+        async def scenario():
+            await manager.connect(fast, "s3")
+            await manager.connect(slow, "s3")
+            for index in range(5):
+                await manager.broadcast_phase_change("s3", f"phase-{index}", index)
+                await manager.clients[fast].drain()
+            assert len(fast.sent) == 5
+            assert slow.sent == []
+            slow.gate.set()
+            await manager.drain("s3")
+            return manager.get_stats()
+
+        stats = asyncio.run(scenario())
+
+        # 慢客户端正在发送第一条，队列中只保留最新的两条
+        assert [m["data"]["phase"] for m in slow.sent] == ["phase-0", "phase-3", "phase-4"]
+        assert stats["messages_dropped"] == 2
+        assert stats["queue_depth_total"] == 0
+
+    def test_disconnect_policy(self, monkeypatch):
+        monkeypatch.setattr(settings.server, "ws_send_queue_size", 1)
+        monkeypatch.setattr(settings.server, "ws_overflow_policy", "disconnect")
+        manager = ConnectionManager()
+        fast, slow = FakeWebSocket(), SlowWebSocket()
+
+        async def scenario():
+            await manager.connect(fast, "s4")
+            await manager.connect(slow, "s4")
+            for index in range(3):
+                await manager.broadcast_phase_change("s4", f"phase-{index}", index)
+                await manager.clients[fast].drain()
+            await asyncio.sleep(0)
+
+        asyncio.run(scenario())
+
+        assert len(fast.sent) == 3
+        assert slow.close_code == 1013
+        assert manager.get_connection_count("s4") == 1
+        assert manager.slow_client_disconnects == 1
@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useParams } from "next/navigation";
 import { useRouter } from "next/navigation";
 import { Button, Card, Badge, ScrollArea } from "@/components/ui";
@@ -43,6 +43,10 @@ const LiveGamePage = () => {
   const [winner, setWinner] = useState<string>("");
   const [winnerName, setWinnerName] = useState<string>("");
   const [showChat, setShowChat] = useState<boolean>(false);
+  // 正在生成的发言草稿（debate_delta），key: "轮次-发言序号"
+  const speechDraftsRef = useRef<Record<string, { player: string; attempt: number; text: string }>>({});
+  // 本发言阶段已收到的完整发言数（debate_turn）
+  const deliveredTurnsRef = useRef<number>(0);
   const [showBetting, setShowBetting] = useState<boolean>(false);
 
   // 初始化WebSocket连接
@@ -90,6 +94,12 @@ const LiveGamePage = () => {
 
   // 处理WebSocket消息
   const handleWebSocketMessage = (data: any) => {
+    // 发言增量频率高，不进入消息记录
+    if (data.type === "debate_delta") {
+      handleDebateDelta(data.data);
+      return;
+    }
+
     console.log(`[WebSocket] 收到消息类型: ${data.type}`, data);
     console.log(`[WebSocket] 完整消息数据:`, JSON.stringify(data, null, 2));
 
@@ -180,6 +190,8 @@ const LiveGamePage = () => {
       setCurrentSpeech("");
     } else {
       console.log(`[阶段变更] 进入发言阶段，清空发言状态等待新发言`);
+      speechDraftsRef.current = {};
+      deliveredTurnsRef.current = 0;
       setCurrentSpeaker(-1);
       setCurrentSpeakerName("");
       setCurrentSpeech("");
@@ -236,6 +248,22 @@ const LiveGamePage = () => {
     setGamePhaseIcon(phaseIcon);
   };
 
+  // 处理发言增量：拼接草稿，下一位发言者的草稿实时显示
+  const handleDebateDelta = (data: any) => {
+    if (gameEnded) return;
+
+    const { player_name, turn_number, round_number, attempt, delta } = data;
+    const key = `${round_number}-${turn_number}`;
+    const draft = speechDraftsRef.current[key];
+    const text = draft && draft.attempt === attempt ? draft.text + delta : delta;
+    speechDraftsRef.current[key] = { player: player_name, attempt, text };
+
+    if (turn_number === deliveredTurnsRef.current + 1) {
+      setCurrentSpeakerName(player_name);
+      setCurrentSpeech(text);
+    }
+  };
+
   // 处理发言
   const handleDebateTurn = (data: any) => {
     console.log(`[发言处理] 🎯 开始处理发言消息，data:`, data);
@@ -257,6 +285,8 @@ const LiveGamePage = () => {
     console.log(`[发言处理] 当前玩家列表长度: ${players.length}`);
     console.log(`[发言处理] 当前玩家列表:`, players.map(p => ({ id: p.id, name: p.name })));
 
+    deliveredTurnsRef.current += 1;
+
     // 更新历史发言记录
     setHistorySpeeches(prev => [...prev.slice(-4), { name: player_name, content: dialogue }]);
 
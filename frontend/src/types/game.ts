@@ -120,6 +120,7 @@ export interface WebSocketMessage {
     | 'ping'
     | 'pong'
     | 'debate_turn'
+    | 'debate_delta'
     | 'vote_cast'
     | 'night_action'
     | 'phase_change'
@@ -164,6 +165,19 @@ export interface DebateTurnMessage extends WebSocketMessage {
   };
 }
 
+// 发言生成过程中的增量（不占序列号），按 round_number + turn_number 拼接，
+// attempt 变化表示重新生成；随后的 debate_turn 消息为最终内容
+export interface DebateDeltaMessage extends WebSocketMessage {
+  type: 'debate_delta';
+  data: {
+    player_name: string;
+    turn_number: number;
+    round_number: number;
+    attempt: number;
+    delta: string;
+  };
+}
+
 export interface VoteCastMessage extends WebSocketMessage {
   type: 'vote_cast';
   data: {